@@ -0,0 +1,296 @@
+"""Route-mix load test for the Server Management API.
+
+Replays a weighted mix of realistic operations against a running API and
+reports requests/sec and tail latency per route as JSON:
+
+    dashboard        one of the dashboard reads (health, servers, commands,
+                     playbooks, executions)
+    server_crud      create, read, update and delete a server (four requests)
+    playbook_launch  POST /api/playbooks/{id}/execute on a few seeded servers
+    awx_sync         AWXClient.sync_server_to_awx() against --awx-url
+    awx_launch       AWXClient launch of a job template, then a status poll
+
+The awx_* operations call AWXClient from this process, so they need
+``requests`` and an AWX (or benchmarks/awx_stub.py) at --awx-url:
+
+    python benchmarks/awx_stub.py --port 8052 --latency-ms 40 &
+    python benchmarks/api_load.py --base-url http://localhost:5000 \\
+        --mix dashboard=70 server_crud=15 playbook_launch=5 awx_sync=5 awx_launch=5 \\
+        --awx-url http://localhost:8052 --duration 60 --concurrency 32
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED_PREFIX = 'bench-load-seed-'
+CRUD_PREFIX = 'bench-load-crud-'
+PLAYBOOK_NAME = 'bench-load-playbook'
+PLAYBOOK_CONTENT = '---\n- hosts: all\n  tasks:\n    - name: ping\n      ping:\n'
+
+DASHBOARD_PATHS = ['/api/health', '/api/servers', '/api/commands', '/api/playbooks', '/api/executions']
+OPERATIONS = ['dashboard', 'server_crud', 'playbook_launch', 'awx_sync', 'awx_launch']
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _ms(value):
+    return round(value * 1000, 2) if value is not None else None
+
+
+def request_json(url, method='GET', body=None, timeout=120):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method)
+    if data is not None:
+        req.add_header('Content-Type', 'application/json')
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b'null')
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except Exception:
+        return 0, None
+
+
+class RouteStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, ok, elapsed):
+        with self.lock:
+            latencies, errors = self.routes.setdefault(route, ([], [0]))
+            latencies.append(elapsed)
+            if not ok:
+                errors[0] += 1
+
+    def summary(self, duration):
+        result = {}
+        for route, (latencies, errors) in sorted(self.routes.items()):
+            result[route] = {
+                'requests': len(latencies),
+                'errors': errors[0],
+                'rps': round(len(latencies) / duration, 2) if duration else 0,
+                'p50_ms': _ms(percentile(latencies, 50)),
+                'p95_ms': _ms(percentile(latencies, 95)),
+                'p99_ms': _ms(percentile(latencies, 99)),
+                'p999_ms': _ms(percentile(latencies, 99.9)),
+                'max_ms': _ms(max(latencies))
+            }
+        return result
+
+
+class LoadRunner:
+    def __init__(self, args):
+        self.args = args
+        self.base_url = args.base_url.rstrip('/')
+        self.stats = RouteStats()
+        self.seed_ids = []
+        self.playbook_id = None
+        self.awx = None
+        self.template_id = None
+        self.counter = 0
+        self.counter_lock = threading.Lock()
+
+    def call(self, route, path, method='GET', body=None):
+        start = time.perf_counter()
+        status, payload = request_json(self.base_url + path, method=method, body=body)
+        self.stats.record(route, 200 <= status < 400, time.perf_counter() - start)
+        return status, payload
+
+    def timed(self, route, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            result = None
+        self.stats.record(route, result is not None, time.perf_counter() - start)
+        return result
+
+    def unique(self):
+        with self.counter_lock:
+            self.counter += 1
+            return f'{os.getpid()}-{self.counter}'
+
+    def setup(self):
+        status, servers = request_json(f'{self.base_url}/api/servers')
+        if status != 200:
+            raise SystemExit(f'Cannot list servers at {self.base_url} (HTTP {status})')
+        existing = {server['name']: server['id'] for server in servers}
+        for i in range(self.args.seed_servers):
+            name = f'{SEED_PREFIX}{i:04d}'
+            if name in existing:
+                self.seed_ids.append(existing[name])
+                continue
+            status, server = request_json(f'{self.base_url}/api/servers', 'POST', self.server_payload(name, i))
+            if status != 201:
+                raise SystemExit(f'Seeding {name} failed (HTTP {status})')
+            self.seed_ids.append(server['id'])
+
+        status, playbooks = request_json(f'{self.base_url}/api/playbooks')
+        for playbook in playbooks or []:
+            if playbook['name'] == PLAYBOOK_NAME:
+                self.playbook_id = playbook['id']
+        if self.playbook_id is None:
+            status, playbook = request_json(f'{self.base_url}/api/playbooks', 'POST', {
+                'name': PLAYBOOK_NAME, 'content': PLAYBOOK_CONTENT, 'description': 'Load test playbook'
+            })
+            if status != 201:
+                raise SystemExit(f'Creating benchmark playbook failed (HTTP {status})')
+            self.playbook_id = playbook['id']
+
+        if any(op.startswith('awx_') for op in self.args.mix):
+            if not self.args.awx_url:
+                raise SystemExit('awx_* operations need --awx-url')
+            sys.path.insert(0, API_DIR)
+            from src.utils.awx_client import AWXClient
+            self.awx = AWXClient(self.args.awx_url, self.args.awx_username, self.args.awx_password)
+            templates = self.awx.get_job_templates()
+            if not templates or not templates.get('results'):
+                raise SystemExit(f'No job templates at {self.args.awx_url}')
+            self.template_id = templates['results'][0]['id']
+
+    def teardown(self):
+        if self.args.keep_seed:
+            return
+        for server_id in self.seed_ids:
+            request_json(f'{self.base_url}/api/servers/{server_id}', 'DELETE')
+
+    def server_payload(self, name, i):
+        return {
+            'name': name,
+            'hostname': f'{name}.bench.local',
+            'ip_address': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}',
+            'port': 22,
+            'username': 'bench',
+            'description': 'Load test server',
+            'tags': ['benchmark', 'load']
+        }
+
+    def dashboard(self, rng):
+        path = rng.choice(DASHBOARD_PATHS)
+        self.call(f'GET {path}', path)
+
+    def server_crud(self, rng):
+        name = CRUD_PREFIX + self.unique()
+        status, server = self.call('POST /api/servers', '/api/servers', 'POST',
+                                   self.server_payload(name, rng.randrange(1 << 24)))
+        if status != 201:
+            return
+        path = f"/api/servers/{server['id']}"
+        self.call('GET /api/servers/<id>', path)
+        self.call('PUT /api/servers/<id>', path, 'PUT', {'description': 'updated by load test'})
+        self.call('DELETE /api/servers/<id>', path, 'DELETE')
+
+    def playbook_launch(self, rng):
+        targets = rng.sample(self.seed_ids, min(len(self.seed_ids), self.args.launch_targets))
+        self.call('POST /api/playbooks/<id>/execute', f'/api/playbooks/{self.playbook_id}/execute', 'POST', {
+            'server_ids': targets, 'extra_vars': {'run': self.unique()}, 'executed_by': 'load-test'
+        })
+
+    def awx_sync(self, rng):
+        i = rng.randrange(1 << 24)
+        self.timed('AWX sync_server_to_awx', self.awx.sync_server_to_awx,
+                   self.server_payload(CRUD_PREFIX + self.unique(), i))
+
+    def awx_launch(self, rng):
+        job = self.timed('AWX launch_job_template', self.awx.launch_job_template,
+                         self.template_id, {'run': self.unique()})
+        if job and job.get('job'):
+            self.timed('AWX get_job_status', self.awx.get_job_status, job['job'])
+
+    def run(self):
+        operations = list(self.args.mix)
+        weights = [self.args.mix[op] for op in operations]
+        deadline = time.monotonic() + self.args.duration
+        executed = {op: 0 for op in operations}
+        executed_lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            while time.monotonic() < deadline:
+                op = rng.choices(operations, weights)[0]
+                getattr(self, op)(rng)
+                with executed_lock:
+                    executed[op] += 1
+
+        threads = [
+            threading.Thread(target=worker, args=(self.args.seed + i,), daemon=True)
+            for i in range(self.args.concurrency)
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=self.args.duration + 300)
+        elapsed = time.monotonic() - started
+
+        routes = self.stats.summary(elapsed)
+        total = sum(route['requests'] for route in routes.values())
+        return {
+            'benchmark': 'api_load',
+            'base_url': self.base_url,
+            'awx_url': self.args.awx_url,
+            'duration_s': round(elapsed, 2),
+            'concurrency': self.args.concurrency,
+            'mix': self.args.mix,
+            'operations': executed,
+            'total_rps': round(total / elapsed, 2) if elapsed else 0,
+            'routes': routes
+        }
+
+
+def parse_mix(values):
+    mix = {}
+    for value in values:
+        name, _, weight = value.partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'unknown operation {name!r}; choose from {OPERATIONS}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--mix', nargs='+', default=['dashboard=80', 'server_crud=15', 'playbook_launch=5'],
+                        help='operation=weight pairs')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to run')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seed-servers', type=int, default=50, help='servers kept registered during the run')
+    parser.add_argument('--launch-targets', type=int, default=5, help='servers per playbook launch')
+    parser.add_argument('--awx-url', default=None, help='AWX or awx_stub.py for awx_* operations')
+    parser.add_argument('--awx-username', default='admin')
+    parser.add_argument('--awx-password', default='password')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the operation mix')
+    parser.add_argument('--keep-seed', action='store_true', help='leave the seeded servers registered')
+    parser.add_argument('--output', default=None, help='write JSON results to this file')
+    args = parser.parse_args()
+    args.mix = parse_mix(args.mix)
+
+    runner = LoadRunner(args)
+    runner.setup()
+    try:
+        result = json.dumps(runner.run(), indent=2)
+    finally:
+        runner.teardown()
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(result + '\n')
+    print(result)
+
+
+if __name__ == '__main__':
+    main()
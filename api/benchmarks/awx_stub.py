@@ -0,0 +1,243 @@
+"""Lightweight stand-in for the AWX ``/api/v2/`` endpoints used by AWXClient.
+
+Serves organizations, inventories, hosts, credentials, projects, job
+templates (including launch) and jobs (detail and stdout) from memory, with
+AWX-style pagination (``count``/``next``/``previous``/``results``,
+``page`` and ``page_size``) and a configurable per-request delay. Launched
+jobs move from pending to running to successful over ``--job-seconds``.
+
+    python benchmarks/awx_stub.py --port 8052 --latency-ms 40 --jitter-ms 20 \\
+        --page-size 25 --seed-hosts 500
+
+Then point the API (or AWXClient) at it with AWX_HOST=http://localhost:8052.
+Only the standard library is used.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+COLLECTIONS = ['organizations', 'inventories', 'hosts', 'credentials', 'projects', 'job_templates', 'jobs']
+
+# Query parameters that filter a collection on a foreign key
+FILTERS = {'organization', 'inventory', 'project', 'job_template', 'status', 'name'}
+
+DETAIL = re.compile(r'^/api/v2/(?P<collection>[a-z_]+)/(?:(?P<id>\d+)/(?:(?P<action>launch|stdout)/)?)?$')
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class AWXStore:
+    """In-memory AWX objects keyed by collection and id"""
+
+    def __init__(self, job_seconds=2.0, stdout_lines=50):
+        self.lock = threading.Lock()
+        self.objects = {name: {} for name in COLLECTIONS}
+        self.next_id = {name: 1 for name in COLLECTIONS}
+        self.job_seconds = job_seconds
+        self.stdout_lines = stdout_lines
+
+    def create(self, collection, data):
+        with self.lock:
+            obj_id = self.next_id[collection]
+            self.next_id[collection] += 1
+            obj = dict(data, id=obj_id, type=collection.rstrip('s'), created=_now(), modified=_now())
+            obj['url'] = f'/api/v2/{collection}/{obj_id}/'
+            self.objects[collection][obj_id] = obj
+            return obj
+
+    def get(self, collection, obj_id):
+        with self.lock:
+            obj = self.objects[collection].get(obj_id)
+        if obj is not None and collection == 'jobs':
+            obj = self._job_state(obj)
+        return obj
+
+    def list(self, collection, filters):
+        with self.lock:
+            objects = list(self.objects[collection].values())
+        if collection == 'jobs':
+            objects = [self._job_state(obj) for obj in objects]
+        for key, value in filters.items():
+            objects = [obj for obj in objects if str(obj.get(key)) == value]
+        return objects
+
+    def seed(self, hosts):
+        org = self.create('organizations', {'name': 'Default', 'description': ''})
+        inventory = self.create('inventories', {
+            'name': 'Server Automation Inventory', 'description': '', 'organization': org['id']
+        })
+        project = self.create('projects', {'name': 'Playbooks', 'organization': org['id'], 'scm_type': ''})
+        self.create('credentials', {'name': 'Machine', 'credential_type': 1, 'organization': org['id'], 'inputs': {}})
+        self.create('job_templates', {
+            'name': 'Benchmark Template', 'job_type': 'run', 'inventory': inventory['id'],
+            'project': project['id'], 'playbook': 'site.yml'
+        })
+        for i in range(hosts):
+            self.create('hosts', {
+                'name': f'seed-host-{i:05d}', 'inventory': inventory['id'],
+                'variables': json.dumps({'ansible_host': f'10.0.{i // 250}.{i % 250 + 1}'})
+            })
+
+    def launch(self, template_id, data):
+        template = self.get('job_templates', template_id)
+        if template is None:
+            return None
+        job = self.create('jobs', {
+            'name': template['name'], 'job_template': template_id, 'job_type': template.get('job_type', 'run'),
+            'inventory': template.get('inventory'), 'project': template.get('project'),
+            'playbook': template.get('playbook'), 'extra_vars': json.dumps(data.get('extra_vars') or {}),
+            'launched_at': time.monotonic()
+        })
+        return dict(self._job_state(job), job=job['id'])
+
+    def _job_state(self, job):
+        elapsed = time.monotonic() - job['launched_at']
+        if elapsed < self.job_seconds / 4:
+            status = 'pending'
+        elif elapsed < self.job_seconds:
+            status = 'running'
+        else:
+            status = 'successful'
+        state = {key: value for key, value in job.items() if key != 'launched_at'}
+        state.update(status=status, failed=False, elapsed=round(min(elapsed, self.job_seconds), 3))
+        return state
+
+    def stdout(self, job):
+        lines = [f'TASK [step {i}] ' + '*' * 60 + f'\nok: [host] => step {i}\n' for i in range(self.stdout_lines)]
+        return {'content': ''.join(lines), 'range': {'start': 0, 'end': self.stdout_lines}}
+
+
+def make_handler(store, args):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are separate writes; avoid Nagle/delayed-ACK stalls
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *log_args):
+            if args.verbose:
+                super().log_message(format, *log_args)
+
+        def _delay(self):
+            seconds = (args.latency_ms + random.random() * args.jitter_ms) / 1000.0
+            if seconds > 0:
+                time.sleep(seconds)
+
+        def _send(self, status, body=None):
+            payload = json.dumps(body).encode() if body is not None else b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if not length:
+                return {}
+            try:
+                return json.loads(self.rfile.read(length))
+            except ValueError:
+                return None
+
+        def _route(self):
+            self._delay()
+            url = urlparse(self.path)
+            path = url.path if url.path.endswith('/') else url.path + '/'
+            match = DETAIL.match(path)
+            if not match or match.group('collection') not in COLLECTIONS:
+                return self._send(404, {'detail': 'Not found.'})
+            collection = match.group('collection')
+            obj_id = int(match.group('id')) if match.group('id') else None
+            action = match.group('action')
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+            if self.command == 'GET' and obj_id is None:
+                return self._list(collection, url.path, query)
+            if self.command == 'GET':
+                obj = store.get(collection, obj_id)
+                if obj is None:
+                    return self._send(404, {'detail': 'Not found.'})
+                if action == 'stdout':
+                    return self._send(200, store.stdout(obj))
+                return self._send(200, obj)
+            if self.command == 'POST':
+                data = self._body()
+                if data is None:
+                    return self._send(400, {'detail': 'JSON parse error.'})
+                if action == 'launch' and collection == 'job_templates':
+                    job = store.launch(obj_id, data)
+                    return self._send(201, job) if job else self._send(404, {'detail': 'Not found.'})
+                if obj_id is None and collection != 'jobs':
+                    if 'name' not in data:
+                        return self._send(400, {'name': ['This field is required.']})
+                    return self._send(201, store.create(collection, data))
+            return self._send(405, {'detail': f'Method "{self.command}" not allowed.'})
+
+        def _list(self, collection, path, query):
+            try:
+                page = max(1, int(query.pop('page', 1)))
+                page_size = min(args.max_page_size, max(1, int(query.pop('page_size', args.page_size))))
+            except ValueError:
+                return self._send(400, {'detail': 'Invalid page.'})
+            filters = {key: value for key, value in query.items() if key in FILTERS}
+            objects = store.list(collection, filters)
+            start = (page - 1) * page_size
+            if page > 1 and start >= len(objects):
+                return self._send(404, {'detail': 'Invalid page.'})
+
+            def link(number):
+                return f'{path}?{urlencode(dict(filters, page=number, page_size=page_size))}'
+
+            return self._send(200, {
+                'count': len(objects),
+                'next': link(page + 1) if start + page_size < len(objects) else None,
+                'previous': link(page - 1) if page > 1 else None,
+                'results': objects[start:start + page_size]
+            })
+
+        do_GET = _route
+        do_POST = _route
+
+    return Handler
+
+
+def serve(args):
+    store = AWXStore(job_seconds=args.job_seconds, stdout_lines=args.stdout_lines)
+    store.seed(args.seed_hosts)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store, args))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8052)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='delay added to every request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='random extra delay per request')
+    parser.add_argument('--page-size', type=int, default=25, help='default page size, as in AWX')
+    parser.add_argument('--max-page-size', type=int, default=200)
+    parser.add_argument('--seed-hosts', type=int, default=100, help='hosts created in the default inventory')
+    parser.add_argument('--job-seconds', type=float, default=2.0, help='time for a launched job to finish')
+    parser.add_argument('--stdout-lines', type=int, default=50)
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    server = serve(args)
+    print(f'AWX stand-in listening on http://{args.host}:{server.server_address[1]}/api/v2/', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
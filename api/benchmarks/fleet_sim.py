@@ -0,0 +1,217 @@
+"""In-process SSH server stand-ins for benchmarking the SSH execution path.
+
+Each simulated host is a paramiko server on its own localhost port. Hosts
+accept any username and key, answer every exec request with a configurable
+amount of output, and can be made slow, flaky, unreachable or hung:
+
+    latency_ms        delay before the handshake and before each reply
+    jitter_ms         random extra delay added to latency_ms
+    output_bytes      stdout bytes written per command
+    command_ms        how long each command runs after writing its output
+    failure_rate      fraction of commands that exit non-zero
+    unreachable_rate  fraction of hosts whose port refuses connections
+    hang_rate         fraction of hosts that accept TCP but never speak SSH
+    hang_seconds      how long a hung host holds a connection before closing
+
+Run the fleet in a separate process (``start_fleet``) so its crypto and
+threads do not share the GIL or RSS of the process being measured.
+"""
+import multiprocessing
+import random
+import selectors
+import socket
+import threading
+import time
+
+DEFAULT_PROFILE = {
+    'latency_ms': 0.0,
+    'jitter_ms': 0.0,
+    'output_bytes': 256,
+    'command_ms': 0.0,
+    'failure_rate': 0.0,
+    'unreachable_rate': 0.0,
+    'hang_rate': 0.0,
+    'hang_seconds': 15.0,
+    'seed': 1
+}
+
+OUTPUT_LINE = b'simulated output line from fleet host ................................\n'
+
+
+def _delay(profile, rng):
+    seconds = (profile['latency_ms'] + rng.random() * profile['jitter_ms']) / 1000.0
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def _output(size):
+    repeats = size // len(OUTPUT_LINE) + 1
+    return (OUTPUT_LINE * repeats)[:size]
+
+
+class SimulatedHost:
+    """Behaviour of one fleet host: normal, unreachable or hung"""
+
+    def __init__(self, index, profile, rng):
+        self.index = index
+        self.profile = profile
+        self.rng = random.Random(rng.random())
+        roll = rng.random()
+        if roll < profile['unreachable_rate']:
+            self.mode = 'unreachable'
+        elif roll < profile['unreachable_rate'] + profile['hang_rate']:
+            self.mode = 'hang'
+        else:
+            self.mode = 'normal'
+        self.output = _output(profile['output_bytes'])
+
+    def server_interface(self):
+        import paramiko
+
+        host = self
+
+        class Interface(paramiko.ServerInterface):
+            def get_allowed_auths(self, username):
+                return 'publickey,password'
+
+            def check_auth_publickey(self, username, key):
+                return paramiko.AUTH_SUCCESSFUL
+
+            def check_auth_password(self, username, password):
+                return paramiko.AUTH_SUCCESSFUL
+
+            def check_channel_request(self, kind, chanid):
+                if kind == 'session':
+                    return paramiko.OPEN_SUCCEEDED
+                return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+            def check_channel_exec_request(self, channel, command):
+                # Started by the transport once the request is acknowledged;
+                # replying sooner could close the channel before the client
+                # sees the acknowledgement
+                channel.pending_reply = host.reply
+                return True
+
+        return Interface()
+
+    def reply(self, channel):
+        try:
+            _delay(self.profile, self.rng)
+            if self.output:
+                channel.sendall(self.output)
+            if self.profile['command_ms']:
+                time.sleep(self.profile['command_ms'] / 1000.0)
+            failed = self.rng.random() < self.profile['failure_rate']
+            if failed:
+                channel.sendall_stderr(b'simulated failure\n')
+            channel.send_exit_status(1 if failed else 0)
+        except Exception:
+            pass
+        finally:
+            channel.close()
+
+    def handle(self, conn, host_key):
+        import paramiko
+
+        if self.mode == 'hang':
+            time.sleep(self.profile['hang_seconds'])
+            conn.close()
+            return
+
+        _delay(self.profile, self.rng)
+        transport = _transport_class()(conn)
+        transport.add_server_key(host_key)
+        try:
+            transport.start_server(server=self.server_interface())
+        except Exception:
+            transport.close()
+
+
+_transport = None
+
+
+def _transport_class():
+    """paramiko Transport that starts an exec reply after granting the request"""
+    global _transport
+    if _transport is None:
+        import paramiko
+        from paramiko.common import MSG_CHANNEL_REQUEST
+
+        def handle_request(channel, message):
+            # Sends the success message before returning
+            paramiko.Channel._handle_request(channel, message)
+            reply = getattr(channel, 'pending_reply', None)
+            if reply is not None:
+                channel.pending_reply = None
+                threading.Thread(target=reply, args=(channel,), daemon=True).start()
+
+        class Transport(paramiko.Transport):
+            _channel_handler_table = {
+                **paramiko.Transport._channel_handler_table, MSG_CHANNEL_REQUEST: handle_request
+            }
+
+        _transport = Transport
+    return _transport
+
+
+class Fleet:
+    """A set of simulated hosts served from one accept loop"""
+
+    def __init__(self, size, profile=None, bind='127.0.0.1'):
+        import paramiko
+
+        self.profile = dict(DEFAULT_PROFILE, **(profile or {}))
+        self.bind = bind
+        self.host_key = paramiko.RSAKey.generate(2048)
+        rng = random.Random(self.profile['seed'])
+        self.hosts = [SimulatedHost(i, self.profile, rng) for i in range(size)]
+        self.selector = selectors.DefaultSelector()
+        self.ports = []
+
+        for host in self.hosts:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((bind, 0))
+            self.ports.append(listener.getsockname()[1])
+            if host.mode == 'unreachable':
+                # Bound but never listening: connects are refused
+                host.listener = listener
+                continue
+            listener.listen(128)
+            listener.setblocking(False)
+            self.selector.register(listener, selectors.EVENT_READ, host)
+
+    def serve_forever(self):
+        while True:
+            for key, _ in self.selector.select():
+                try:
+                    conn, _ = key.fileobj.accept()
+                except BlockingIOError:
+                    continue
+                conn.setblocking(True)
+                threading.Thread(
+                    target=key.data.handle, args=(conn, self.host_key), daemon=True
+                ).start()
+
+    def describe(self):
+        return [
+            {'index': host.index, 'port': port, 'mode': host.mode}
+            for host, port in zip(self.hosts, self.ports)
+        ]
+
+
+def _fleet_process(size, profile, bind, ready):
+    fleet = Fleet(size, profile, bind)
+    ready.put(fleet.describe())
+    fleet.serve_forever()
+
+
+def start_fleet(size, profile=None, bind='127.0.0.1', start_timeout=60):
+    """Start a fleet in a child process; return (process, host descriptions)"""
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    process = context.Process(
+        target=_fleet_process, args=(size, profile, bind, ready), daemon=True
+    )
+    process.start()
+    return process, ready.get(timeout=start_timeout)
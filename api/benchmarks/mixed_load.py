@@ -0,0 +1,153 @@
+"""Mixed-load benchmark for the Server Management API.
+
+Runs fast "dashboard" reads (/api/health, /api/servers, /api/executions)
+while a number of slow requests (by default a command execution) are kept in
+flight, and reports requests/sec and latency percentiles per path as JSON.
+
+Compare serving modes by starting the API each way and pointing this script
+at it, e.g.:
+
+    python src/main.py
+    API_WORKER_CLASS=gthread gunicorn -c gunicorn.conf.py 'src.main:create_app()'
+    API_WORKER_CLASS=gevent gunicorn -c gunicorn.conf.py 'src.main:create_app()'
+
+    python benchmarks/mixed_load.py --base-url http://localhost:5000 \\
+        --slow-path /api/commands/1/execute --slow-body '{"server_ids": [1]}'
+
+The slow requests are identical, so start the API with
+EXECUTION_COALESCE_SECONDS=0; otherwise they join one execution and
+return at once.
+
+Only the standard library is used so the script runs anywhere.
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_FAST_PATHS = ['/api/health', '/api/servers', '/api/executions']
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timed_request(url, method='GET', body=None, timeout=120):
+    data = body.encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method)
+    if data is not None:
+        req.add_header('Content-Type', 'application/json')
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return status, time.perf_counter() - start
+
+
+class PathStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.errors = 0
+
+    def record(self, status, elapsed):
+        with self.lock:
+            self.latencies.append(elapsed)
+            if status == 0 or status >= 500:
+                self.errors += 1
+
+    def summary(self, duration):
+        latencies = self.latencies
+        return {
+            'requests': len(latencies),
+            'errors': self.errors,
+            'rps': round(len(latencies) / duration, 2) if duration else 0,
+            'p50_ms': _ms(percentile(latencies, 50)),
+            'p95_ms': _ms(percentile(latencies, 95)),
+            'p99_ms': _ms(percentile(latencies, 99)),
+            'max_ms': _ms(max(latencies) if latencies else None)
+        }
+
+
+def _ms(value):
+    return round(value * 1000, 2) if value is not None else None
+
+
+def run(args):
+    stats = {path: PathStats() for path in args.fast_paths}
+    if args.slow_path:
+        stats[args.slow_path] = PathStats()
+
+    deadline = time.monotonic() + args.duration
+    threads = []
+
+    def fast_worker(offset):
+        i = offset
+        while time.monotonic() < deadline:
+            path = args.fast_paths[i % len(args.fast_paths)]
+            i += 1
+            stats[path].record(*timed_request(args.base_url + path))
+
+    def slow_worker():
+        while time.monotonic() < deadline:
+            stats[args.slow_path].record(*timed_request(
+                args.base_url + args.slow_path, method='POST', body=args.slow_body))
+
+    if args.slow_path:
+        for _ in range(args.slow_concurrency):
+            threads.append(threading.Thread(target=slow_worker, daemon=True))
+    for i in range(args.concurrency):
+        threads.append(threading.Thread(target=fast_worker, args=(i,), daemon=True))
+
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=args.duration + 180)
+    elapsed = time.monotonic() - started
+
+    fast_latencies = [lat for path in args.fast_paths for lat in stats[path].latencies]
+    return {
+        'benchmark': 'mixed_load',
+        'base_url': args.base_url,
+        'duration_s': round(elapsed, 2),
+        'concurrency': args.concurrency,
+        'slow_concurrency': args.slow_concurrency if args.slow_path else 0,
+        'fast_rps': round(len(fast_latencies) / elapsed, 2) if elapsed else 0,
+        'fast_p95_ms': _ms(percentile(fast_latencies, 95)),
+        'paths': {path: path_stats.summary(elapsed) for path, path_stats in stats.items()}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to run')
+    parser.add_argument('--concurrency', type=int, default=16, help='fast-path clients')
+    parser.add_argument('--fast-paths', nargs='+', default=DEFAULT_FAST_PATHS)
+    parser.add_argument('--slow-path', default=None, help='POST path kept in flight, e.g. /api/commands/1/execute')
+    parser.add_argument('--slow-body', default='{"server_ids": [1]}')
+    parser.add_argument('--slow-concurrency', type=int, default=4)
+    parser.add_argument('--output', default=None, help='write JSON results to this file')
+    args = parser.parse_args()
+
+    result = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(result + '\n')
+    print(result)
+
+
+if __name__ == '__main__':
+    main()
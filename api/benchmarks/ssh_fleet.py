@@ -0,0 +1,408 @@
+"""Simulated-fleet benchmark for the SSH execution path.
+
+Starts a fleet of in-process SSH server stand-ins (see fleet_sim.py),
+registers them as servers, then drives the ping, execute and info endpoints
+at each combination of fleet size and client concurrency. Throughput,
+latency percentiles and peak RSS are reported per run as JSON, tagged with
+the git commit, so results can be diffed across commits.
+
+By default the API runs in this process through create_app() and the Flask
+test client, against the database in DATABASE_URL:
+
+    DATABASE_URL=postgresql://... python benchmarks/ssh_fleet.py \\
+        --fleet-sizes 1 10 50 --concurrency 1 8 --latency-ms 20 \\
+        --output-bytes 4096 --failure-rate 0.05 --hang-rate 0.02
+
+Or point it at a running API (the fleet must be reachable from it) and pass
+the server's PID to sample its RSS:
+
+    EXECUTION_COALESCE_SECONDS=0 gunicorn ...   # on the API side
+    python benchmarks/ssh_fleet.py --base-url http://localhost:5000 --server-pid 1234
+
+Concurrent execute requests are identical, so the API would coalesce them
+into one execution and the figures would measure no-ops. The in-process
+API runs with coalescing off; a running API must be started with
+``EXECUTION_COALESCE_SECONDS=0``. Each run reports how many responses were
+coalesced, and should report 0.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from fleet_sim import start_fleet
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NAME_PREFIX = 'bench-fleet-'
+COMMAND_NAME = 'bench-fleet-command'
+OPERATIONS = ['ping', 'execute', 'info']
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _ms(value):
+    return round(value * 1000, 2) if value is not None else None
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=API_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _rss_kb(pid):
+    """Resident set size of a process and its direct children, in KiB"""
+    total = 0
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            pids.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    for each in pids:
+        try:
+            with open(f'/proc/{each}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class RSSSampler:
+    """Track peak RSS of a process tree while a run is in progress"""
+
+    def __init__(self, pid, interval=0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak_kb = _rss_kb(self.pid)
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_kb = max(self.peak_kb, _rss_kb(self.pid))
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_kb = max(self.peak_kb, _rss_kb(self.pid))
+
+    def peak_mb(self):
+        if not self.peak_kb and self.pid == os.getpid():
+            # No /proc: fall back to the process high-water mark
+            return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)
+        return round(self.peak_kb / 1024.0, 1) if self.peak_kb else None
+
+
+class HTTPClient:
+    """Talk to a running API over HTTP"""
+
+    def __init__(self, base_url, timeout=900):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            try:
+                return e.code, json.loads(e.read() or b'null')
+            except ValueError:
+                return e.code, None
+        except Exception:
+            return 0, None
+
+
+class AppClient:
+    """Talk to an in-process app through one Flask test client per thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+
+def build_app(database_url):
+    # Every execute request must run; see the module docstring
+    os.environ['EXECUTION_COALESCE_SECONDS'] = '0'
+    sys.path.insert(0, API_DIR)
+    from src.main import create_app
+    from src.models.server import db
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def write_client_key(directory):
+    """Write an Ed25519 key for the benchmark servers (any key is accepted)"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519
+
+    path = os.path.join(directory, 'bench_fleet_ed25519')
+    pem = ed25519.Ed25519PrivateKey.generate().private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.OpenSSH,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    with open(path, 'wb') as f:
+        f.write(pem)
+    os.chmod(path, 0o600)
+    return path
+
+
+def register_fleet(client, hosts, fleet_host, key_path):
+    """Create (or repoint) one server per simulated host; return server ids"""
+    status, existing = client.request('GET', '/api/servers')
+    if status != 200:
+        raise RuntimeError(f'Listing servers failed with HTTP {status}')
+    by_name = {server['name']: server for server in existing}
+
+    server_ids = []
+    for host in hosts:
+        name = f"{NAME_PREFIX}{host['index']:04d}"
+        payload = {
+            'name': name,
+            'hostname': fleet_host,
+            'ip_address': '127.0.0.1',
+            'port': host['port'],
+            'username': 'bench',
+            'ssh_key_path': key_path,
+            'description': f"Simulated fleet host ({host['mode']})",
+            'tags': ['benchmark']
+        }
+        if name in by_name:
+            status, server = client.request('PUT', f"/api/servers/{by_name[name]['id']}", payload)
+        else:
+            status, server = client.request('POST', '/api/servers', payload)
+        if status not in (200, 201):
+            raise RuntimeError(f'Registering {name} failed with HTTP {status}: {server}')
+        server_ids.append(server['id'])
+    return server_ids
+
+
+def ensure_command(client, timeout):
+    status, commands = client.request('GET', '/api/commands')
+    if status != 200:
+        raise RuntimeError(f'Listing commands failed with HTTP {status}')
+    for command in commands:
+        if command['name'] == COMMAND_NAME:
+            return command['id']
+    status, command = client.request('POST', '/api/commands', {
+        'name': COMMAND_NAME,
+        'description': 'Simulated fleet benchmark command',
+        'command': 'bench',
+        'timeout': timeout
+    })
+    if status != 201:
+        raise RuntimeError(f'Creating benchmark command failed with HTTP {status}: {command}')
+    return command['id']
+
+
+def unregister_fleet(client, server_ids):
+    for server_id in server_ids:
+        client.request('DELETE', f'/api/servers/{server_id}')
+
+
+def run_once(client, operation, server_ids, command_id, concurrency, requests, rss_pid):
+    """Issue ``requests`` calls of one operation from ``concurrency`` clients"""
+    lock = threading.Lock()
+    latencies = []
+    statuses = {}
+    host_outcomes = {'success': 0, 'failed': 0, 'error': 0}
+    coalesced = 0
+    counter = iter(range(requests))
+
+    def call(i):
+        if operation == 'execute':
+            return client.request('POST', f'/api/commands/{command_id}/execute', {
+                'server_ids': server_ids, 'executed_by': 'benchmark'
+            })
+        server_id = server_ids[i % len(server_ids)]
+        if operation == 'ping':
+            return client.request('POST', f'/api/servers/{server_id}/ping')
+        return client.request('GET', f'/api/servers/{server_id}/info')
+
+    def worker():
+        nonlocal coalesced
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            status, body = call(i)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                if operation == 'execute' and isinstance(body, dict) and body.get('coalesced'):
+                    coalesced += 1
+                elif operation == 'execute' and isinstance(body, dict):
+                    for result in body.get('results', []):
+                        if result.get('status') != 'success':
+                            host_outcomes['error'] += 1
+                        elif result.get('exit_code') == 0:
+                            host_outcomes['success'] += 1
+                        else:
+                            host_outcomes['failed'] += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    with RSSSampler(rss_pid) as sampler:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    hosts_contacted = len(latencies) * (len(server_ids) if operation == 'execute' else 1)
+    result = {
+        'operation': operation,
+        'fleet_size': len(server_ids),
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'statuses': statuses,
+        'duration_s': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else 0,
+        'hosts_per_s': round(hosts_contacted / elapsed, 2) if elapsed else 0,
+        'p50_ms': _ms(percentile(latencies, 50)),
+        'p95_ms': _ms(percentile(latencies, 95)),
+        'p99_ms': _ms(percentile(latencies, 99)),
+        'max_ms': _ms(max(latencies) if latencies else None),
+        'peak_rss_mb': sampler.peak_mb()
+    }
+    if operation == 'execute':
+        result['host_outcomes'] = host_outcomes
+        result['coalesced'] = coalesced
+    return result
+
+
+def run(args):
+    profile = {
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'output_bytes': args.output_bytes,
+        'failure_rate': args.failure_rate,
+        'unreachable_rate': args.unreachable_rate,
+        'hang_rate': args.hang_rate,
+        'hang_seconds': args.hang_seconds,
+        'seed': args.seed
+    }
+    fleet_process, hosts = start_fleet(max(args.fleet_sizes), profile, bind=args.fleet_bind)
+
+    if args.base_url:
+        client = HTTPClient(args.base_url)
+        rss_pid = args.server_pid
+    else:
+        database_url = args.database_url or os.environ.get('DATABASE_URL')
+        if not database_url:
+            raise SystemExit('Set DATABASE_URL or --database-url, or use --base-url')
+        client = AppClient(build_app(database_url))
+        rss_pid = os.getpid()
+
+    key_dir = tempfile.mkdtemp(prefix='bench-fleet-')
+    key_path = args.key_path or write_client_key(key_dir)
+    server_ids = register_fleet(client, hosts, args.fleet_host or args.fleet_bind, key_path)
+    command_id = ensure_command(client, args.command_timeout)
+
+    runs = []
+    try:
+        for fleet_size in args.fleet_sizes:
+            for concurrency in args.concurrency:
+                for operation in args.operations:
+                    requests = args.execute_requests if operation == 'execute' else args.requests
+                    runs.append(run_once(
+                        client, operation, server_ids[:fleet_size], command_id,
+                        concurrency, requests, rss_pid
+                    ))
+                    print(json.dumps(runs[-1]), file=sys.stderr)
+    finally:
+        if not args.keep_servers:
+            unregister_fleet(client, server_ids)
+        fleet_process.terminate()
+
+    modes = [host['mode'] for host in hosts]
+    return {
+        'benchmark': 'ssh_fleet',
+        'git_commit': git_commit(),
+        'mode': 'http' if args.base_url else 'in-process',
+        'ssh_max_parallel': os.environ.get('SSH_MAX_PARALLEL'),
+        'fleet': dict(profile, size=len(hosts), unreachable=modes.count('unreachable'), hung=modes.count('hang')),
+        'runs': runs
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default=None, help='drive a running API instead of an in-process app')
+    parser.add_argument('--database-url', default=None, help='database for the in-process app (default: $DATABASE_URL)')
+    parser.add_argument('--server-pid', type=int, default=None, help='PID of the running API, for RSS sampling')
+    parser.add_argument('--fleet-sizes', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=OPERATIONS)
+    parser.add_argument('--requests', type=int, default=50, help='ping/info requests per run')
+    parser.add_argument('--execute-requests', type=int, default=10, help='execute requests per run (each hits the whole fleet)')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--output-bytes', type=int, default=256)
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of commands exiting non-zero')
+    parser.add_argument('--unreachable-rate', type=float, default=0.0, help='fraction of hosts refusing connections')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='fraction of hosts that never complete the handshake')
+    parser.add_argument('--hang-seconds', type=float, default=15.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--command-timeout', type=int, default=60)
+    parser.add_argument('--fleet-bind', default='127.0.0.1', help='address the simulated hosts listen on')
+    parser.add_argument('--fleet-host', default=None, help='hostname the API uses to reach the fleet (default: --fleet-bind)')
+    parser.add_argument('--key-path', default=None, help='client key path as seen by the API (default: generated)')
+    parser.add_argument('--keep-servers', action='store_true', help='leave the benchmark servers registered')
+    parser.add_argument('--output', default=None, help='write JSON results to this file')
+    args = parser.parse_args()
+
+    result = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(result + '\n')
+    print(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Import/startup time budget check for the Server Management API.
+
+Spawns fresh interpreters, times ``import src.main`` and ``create_app()``,
+and verifies that the heavy SSH/AWX dependencies were not imported along the
+way. Prints JSON and exits non-zero when the median exceeds the budget, so it
+can gate CI:
+
+    python benchmarks/startup_time.py --runs 5 --budget-ms 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['paramiko', 'cryptography', 'yaml', 'requests', 'alembic', 'redis', 'croniter']
+
+PROBE = '''
+import json, sys, time
+sys.path.insert(0, {api_dir!r})
+start = time.perf_counter()
+import src.main
+imported = time.perf_counter()
+src.main.create_app()
+created = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'heavy_modules_loaded': [m for m in {heavy!r} if m in sys.modules]
+}}))
+'''
+
+
+def probe_once():
+    code = PROBE.format(api_dir=API_DIR, heavy=HEAVY_MODULES)
+    env = dict(os.environ)
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    output = subprocess.run(
+        [sys.executable, '-c', code], env=env, cwd=API_DIR,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=800.0,
+                        help='budget for median import + create_app time')
+    args = parser.parse_args()
+
+    samples = [probe_once() for _ in range(args.runs)]
+    totals = [s['import_ms'] + s['create_app_ms'] for s in samples]
+    loaded = sorted({m for s in samples for m in s['heavy_modules_loaded']})
+    median_total = statistics.median(totals)
+
+    result = {
+        'benchmark': 'startup_time',
+        'runs': args.runs,
+        'import_ms_median': round(statistics.median(s['import_ms'] for s in samples), 1),
+        'create_app_ms_median': round(statistics.median(s['create_app_ms'] for s in samples), 1),
+        'total_ms_median': round(median_total, 1),
+        'total_ms_max': round(max(totals), 1),
+        'budget_ms': args.budget_ms,
+        'heavy_modules_loaded': loaded,
+        'within_budget': median_total <= args.budget_ms and not loaded
+    }
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result['within_budget'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+#!/bin/sh
+# Apply pending schema migrations once, then hand over to the server process.
+# Concurrent replicas serialize on a Postgres advisory lock (migrations/env.py).
+set -e
+
+if [ "${RUN_MIGRATIONS:-1}" = "1" ]; then
+    flask db upgrade
+fi
+
+# Per-process metric files from a previous run would be aggregated into /metrics
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+exec "$@"
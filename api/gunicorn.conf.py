@@ -0,0 +1,57 @@
+# Gunicorn configuration for the Server Management API
+#
+# Usage: gunicorn -c gunicorn.conf.py 'src.main:create_app()'
+#
+# Worker classes:
+#   gthread - (default) N processes x M OS threads. Blocking SSH, AWX and
+#             database I/O only occupies the thread that issued it.
+#   gevent  - N processes each running a cooperative event loop. The stdlib
+#             (sockets, threads, ssl) is monkey-patched by the worker before
+#             the application is imported, so paramiko and requests yield
+#             while waiting on the network. psycopg2 is made cooperative in
+#             post_worker_init below.
+import multiprocessing
+import os
+
+bind = os.environ.get('API_BIND', f"0.0.0.0:{os.environ.get('API_PORT', '5000')}")
+
+worker_class = os.environ.get('API_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('API_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get('API_THREADS', '16'))
+worker_connections = int(os.environ.get('API_WORKER_CONNECTIONS', '1000'))
+
+# Command executions are synchronous requests and may run for the full
+# command timeout, so the worker timeout must be generous.
+timeout = int(os.environ.get('API_WORKER_TIMEOUT', '660'))
+graceful_timeout = int(os.environ.get('API_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('API_KEEPALIVE', '5'))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.environ.get('API_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.environ.get('API_MAX_REQUESTS_JITTER', '200'))
+
+accesslog = os.environ.get('API_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('API_LOG_LEVEL', 'info')
+
+
+def post_worker_init(worker):
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+        worker.log.info("psycopg2 patched for gevent")
+
+    # Every worker may run the scheduler: each run is claimed by exactly one
+    if os.environ.get('SCHEDULER_ENABLED', '0') == '1':
+        from src.utils.scheduler import start_scheduler
+        start_scheduler(worker.wsgi)
+    if os.environ.get('HEALTH_ROLLUP_ENABLED', os.environ.get('SCHEDULER_ENABLED', '0')) == '1':
+        from src.utils.health_history import start_health_rollups
+        start_health_rollups(worker.wsgi)
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges from the aggregated /metrics output
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
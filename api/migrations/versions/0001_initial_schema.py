@@ -0,0 +1,128 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-10-20 09:00:00
+
+Databases bootstrapped from database_schema.sql already have these tables;
+they are left untouched and only missing ones are created, so this revision
+can be applied to both fresh and existing installations.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    # Offline (--sql) runs cannot inspect the database; emit everything
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('servers'):
+        op.create_table(
+            'servers',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(length=255), nullable=False, unique=True),
+            sa.Column('hostname', sa.String(length=255), nullable=False),
+            sa.Column('ip_address', postgresql.INET(), nullable=False),
+            sa.Column('port', sa.Integer(), server_default='22'),
+            sa.Column('username', sa.String(length=100), nullable=False),
+            sa.Column('ssh_key_path', sa.String(length=500)),
+            sa.Column('description', sa.Text()),
+            sa.Column('tags', postgresql.ARRAY(sa.String())),
+            sa.Column('status', sa.String(length=50), server_default='active'),
+            sa.Column('last_ping', sa.DateTime()),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now())
+        )
+        op.create_index('idx_servers_status', 'servers', ['status'])
+        op.create_index('idx_servers_tags', 'servers', ['tags'], postgresql_using='gin')
+
+    if not _has_table('custom_commands'):
+        op.create_table(
+            'custom_commands',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(length=255), nullable=False, unique=True),
+            sa.Column('description', sa.Text()),
+            sa.Column('command', sa.Text(), nullable=False),
+            sa.Column('timeout', sa.Integer(), server_default='300'),
+            sa.Column('created_by', sa.String(length=100)),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now())
+        )
+
+    if not _has_table('custom_playbooks'):
+        op.create_table(
+            'custom_playbooks',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(length=255), nullable=False, unique=True),
+            sa.Column('description', sa.Text()),
+            sa.Column('file_path', sa.String(length=500), nullable=False),
+            sa.Column('variables', sa.JSON()),
+            sa.Column('created_by', sa.String(length=100)),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now())
+        )
+
+    if not _has_table('execution_logs'):
+        op.create_table(
+            'execution_logs',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('execution_type', sa.String(length=50), nullable=False),
+            sa.Column('target_servers', postgresql.ARRAY(sa.Integer())),
+            sa.Column('command_id', sa.Integer(), sa.ForeignKey('custom_commands.id')),
+            sa.Column('playbook_id', sa.Integer(), sa.ForeignKey('custom_playbooks.id')),
+            sa.Column('status', sa.String(length=50), nullable=False),
+            sa.Column('output', sa.Text()),
+            sa.Column('error_message', sa.Text()),
+            sa.Column('started_at', sa.DateTime(), server_default=sa.func.now()),
+            sa.Column('completed_at', sa.DateTime()),
+            sa.Column('executed_by', sa.String(length=100))
+        )
+        op.create_index('idx_execution_logs_status', 'execution_logs', ['status'])
+        op.create_index('idx_execution_logs_type', 'execution_logs', ['execution_type'])
+        op.create_index('idx_execution_logs_started_at', 'execution_logs', ['started_at'])
+
+    if not _has_table('server_groups'):
+        op.create_table(
+            'server_groups',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(length=255), nullable=False, unique=True),
+            sa.Column('description', sa.Text()),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now())
+        )
+
+    if not _has_table('server_group_members'):
+        op.create_table(
+            'server_group_members',
+            sa.Column('server_id', sa.Integer(), sa.ForeignKey('servers.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('group_id', sa.Integer(), sa.ForeignKey('server_groups.id', ondelete='CASCADE'), primary_key=True)
+        )
+
+    if not _has_table('user'):
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('username', sa.String(length=80), nullable=False, unique=True),
+            sa.Column('email', sa.String(length=120), nullable=False, unique=True)
+        )
+
+
+def downgrade():
+    op.drop_table('user')
+    op.drop_table('server_group_members')
+    op.drop_table('server_groups')
+    op.drop_table('execution_logs')
+    op.drop_table('custom_playbooks')
+    op.drop_table('custom_commands')
+    op.drop_table('servers')
@@ -0,0 +1,50 @@
+"""Add schedules
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-27 09:00:00
+
+Recurring command/playbook schedules. next_run_at is both the due-time
+index the scheduler polls and the compare-and-set token that lets only
+one scheduler instance fire each run.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'schedules',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(length=255), nullable=False, unique=True),
+        sa.Column('description', sa.Text()),
+        sa.Column('command_id', sa.Integer(), sa.ForeignKey('custom_commands.id', ondelete='CASCADE')),
+        sa.Column('playbook_id', sa.Integer(), sa.ForeignKey('custom_playbooks.id', ondelete='CASCADE')),
+        sa.Column('cron_expression', sa.String(length=100), nullable=False),
+        sa.Column('target_selector', sa.JSON(), nullable=False),
+        sa.Column('max_concurrency', sa.Integer(), server_default='10'),
+        sa.Column('jitter_seconds', sa.Integer(), server_default='0'),
+        sa.Column('enabled', sa.Boolean(), server_default=sa.true()),
+        sa.Column('next_run_at', sa.DateTime()),
+        sa.Column('last_run_at', sa.DateTime()),
+        sa.Column('last_execution_id', sa.Integer(), sa.ForeignKey('execution_logs.id', ondelete='SET NULL')),
+        sa.Column('created_by', sa.String(length=100)),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.CheckConstraint(
+            '(command_id IS NULL) <> (playbook_id IS NULL)', name='ck_schedules_one_target'
+        )
+    )
+    op.create_index('idx_schedules_next_run_at', 'schedules', ['next_run_at'])
+
+
+def downgrade():
+    op.drop_index('idx_schedules_next_run_at', table_name='schedules')
+    op.drop_table('schedules')
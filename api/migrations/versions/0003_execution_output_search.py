@@ -0,0 +1,124 @@
+"""Add execution output search index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-11-03 09:00:00
+
+One row per distinct output of an execution, with the hosts that
+returned it. ``search`` is a generated tsvector behind a GIN index for
+word queries; a trigram GIN index on ``content`` serves substring
+queries. Existing executions are indexed by this migration. On other
+databases (embedded SQLite) only the table is created and search scans it.
+"""
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from src.models.types import Array
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 500
+
+
+def upgrade():
+    postgres = op.get_context().dialect.name == 'postgresql'
+    if postgres:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    columns = [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('execution_id', sa.Integer(),
+                  sa.ForeignKey('execution_logs.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('output_id', sa.String(length=16), nullable=False),
+        sa.Column('server_ids', Array(sa.Integer()), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False)
+    ]
+    if postgres:
+        columns.append(sa.Column('search', postgresql.TSVECTOR(),
+                                 sa.Computed("to_tsvector('simple', content)", persisted=True)))
+    op.create_table('execution_outputs', *columns)
+    op.create_index('idx_execution_outputs_execution_id', 'execution_outputs', ['execution_id'])
+    if postgres:
+        op.create_index('idx_execution_outputs_search', 'execution_outputs', ['search'], postgresql_using='gin')
+        op.create_index(
+            'idx_execution_outputs_content_trgm', 'execution_outputs', ['content'],
+            postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'}
+        )
+    backfill()
+
+
+def _output_id(output, error):
+    return hashlib.sha256(f'{output}\0{error}'.encode()).hexdigest()[:16]
+
+
+def _index_rows(execution_id, output):
+    """execution_outputs rows for a stored ExecutionLog.output.
+
+    A frozen copy of execution_stats.load_results and
+    output_search.index_rows as of this revision, so later changes to the
+    app cannot change what this migration writes.
+    """
+    try:
+        stored = json.loads(output)
+    except ValueError:
+        return []
+    if isinstance(stored, list):
+        # Host results from before outputs were stored compacted
+        outputs, results = {}, []
+        for result in stored:
+            content = result.get('output', '')
+            error = result.get('error') or ''
+            key = _output_id(content, error)
+            outputs.setdefault(key, {'output': content, 'error': error})
+            results.append({'server_id': result.get('server_id'), 'output_id': key})
+    elif isinstance(stored, dict) and 'outputs' in stored and 'results' in stored:
+        outputs, results = stored['outputs'], stored['results']
+    else:
+        return []
+
+    server_ids = {}
+    for entry in results:
+        server_ids.setdefault(entry['output_id'], []).append(entry.get('server_id'))
+    return [
+        {
+            'execution_id': execution_id,
+            'output_id': key,
+            'server_ids': hosts,
+            'content': '\n'.join(part for part in (outputs[key]['output'], outputs[key]['error']) if part)
+        }
+        for key, hosts in server_ids.items()
+    ]
+
+
+def backfill():
+    conn = op.get_bind()
+    table = sa.table(
+        'execution_outputs',
+        sa.column('execution_id', sa.Integer()),
+        sa.column('output_id', sa.String()),
+        sa.column('server_ids', Array(sa.Integer())),
+        sa.column('content', sa.Text())
+    )
+    executions = conn.execution_options(stream_results=True, yield_per=BACKFILL_BATCH).execute(
+        sa.text("SELECT id, output FROM execution_logs WHERE output IS NOT NULL AND execution_type = 'command'")
+    )
+    rows = []
+    for execution_id, output in executions:
+        rows.extend(_index_rows(execution_id, output))
+        if len(rows) >= BACKFILL_BATCH:
+            op.bulk_insert(table, rows)
+            rows = []
+    if rows:
+        op.bulk_insert(table, rows)
+
+
+def downgrade():
+    op.drop_table('execution_outputs')
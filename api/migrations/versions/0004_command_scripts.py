@@ -0,0 +1,29 @@
+"""Add run_as_script to custom commands
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-11-10 09:00:00
+
+Commands flagged run_as_script are uploaded once per host to a script
+cache named by content hash and invoked from there.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'custom_commands',
+        sa.Column('run_as_script', sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+
+
+def downgrade():
+    op.drop_column('custom_commands', 'run_as_script')
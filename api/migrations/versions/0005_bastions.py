@@ -0,0 +1,49 @@
+"""Add bastions
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-11-17 09:00:00
+
+Jump hosts for servers on private networks. A server uses its own
+bastion, or else the bastion of a group it belongs to.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'bastions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(length=255), nullable=False, unique=True),
+        sa.Column('hostname', sa.String(length=255), nullable=False),
+        sa.Column('port', sa.Integer(), server_default='22'),
+        sa.Column('username', sa.String(length=100), nullable=False),
+        sa.Column('ssh_key_path', sa.String(length=500)),
+        sa.Column('max_channels', sa.Integer()),
+        sa.Column('description', sa.Text()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now())
+    )
+    # Batch mode: SQLite cannot add a foreign key with ALTER TABLE
+    for table in ('servers', 'server_groups'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('bastion_id', sa.Integer()))
+            # PostgreSQL's default constraint name
+            batch_op.create_foreign_key(
+                f'{table}_bastion_id_fkey', 'bastions', ['bastion_id'], ['id'], ondelete='SET NULL'
+            )
+
+
+def downgrade():
+    for table in ('servers', 'server_groups'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('bastion_id')
+    op.drop_table('bastions')
@@ -0,0 +1,48 @@
+"""Add server health history
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-11-24 09:00:00
+
+Raw probe samples of each server and their 1m/1h/1d rollups.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'server_health_samples',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), primary_key=True),
+        sa.Column('server_id', sa.Integer(), sa.ForeignKey('servers.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('ts', sa.DateTime(), nullable=False),
+        sa.Column('ok', sa.Boolean(), nullable=False),
+        sa.Column('rtt_ms', sa.Float())
+    )
+    op.create_index('ix_server_health_samples_server_ts', 'server_health_samples', ['server_id', 'ts'])
+    op.create_index('ix_server_health_samples_ts', 'server_health_samples', ['ts'])
+
+    op.create_table(
+        'server_health_rollups',
+        sa.Column('server_id', sa.Integer(), sa.ForeignKey('servers.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('resolution', sa.String(length=2), primary_key=True),
+        sa.Column('bucket', sa.DateTime(), primary_key=True),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.Column('ok', sa.Integer(), nullable=False),
+        sa.Column('rtt_min', sa.Float()),
+        sa.Column('rtt_max', sa.Float()),
+        sa.Column('rtt_sum', sa.Float(), nullable=False, server_default='0')
+    )
+    op.create_index('ix_server_health_rollups_resolution_bucket', 'server_health_rollups', ['resolution', 'bucket'])
+
+
+def downgrade():
+    op.drop_table('server_health_rollups')
+    op.drop_table('server_health_samples')
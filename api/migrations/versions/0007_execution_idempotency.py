@@ -0,0 +1,41 @@
+"""Add idempotency keys and coalescing to executions
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-12-01 09:00:00
+
+Unique keys that stop duplicate requests from starting the same
+execution twice (see src/utils/coalescing.py). A request that joins an
+in-flight execution records its Idempotency-Key too, so an execution
+can have several keys.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('execution_logs', sa.Column('inflight_key', sa.String(length=32)))
+    op.create_index('uq_execution_logs_inflight_key', 'execution_logs', ['inflight_key'], unique=True)
+    op.create_table(
+        'execution_idempotency_keys',
+        sa.Column('idempotency_key', sa.String(length=255), primary_key=True),
+        sa.Column('execution_id', sa.Integer(), sa.ForeignKey('execution_logs.id', ondelete='CASCADE'),
+                  nullable=False),
+        sa.Column('request_fingerprint', sa.String(length=32), nullable=False),
+        sa.Column('created_at', sa.DateTime())
+    )
+    op.create_index('ix_execution_idempotency_keys_execution_id', 'execution_idempotency_keys', ['execution_id'])
+
+
+def downgrade():
+    op.drop_table('execution_idempotency_keys')
+    op.drop_index('uq_execution_logs_inflight_key', table_name='execution_logs')
+    with op.batch_alter_table('execution_logs') as batch_op:
+        batch_op.drop_column('inflight_key')
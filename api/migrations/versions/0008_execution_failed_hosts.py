@@ -0,0 +1,54 @@
+"""Count failed hosts per execution
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-12-10 09:00:00
+
+The dashboard ranks commands by failed host results. Executions of the
+past week (the dashboard's window) are counted from their stored output.
+"""
+import json
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('execution_logs', sa.Column('failed_hosts', sa.Integer()))
+
+    executions = sa.table(
+        'execution_logs', sa.column('id'), sa.column('command_id'), sa.column('output'), sa.column('started_at'),
+        sa.column('failed_hosts')
+    )
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(executions.c.id, executions.c.output).where(
+        executions.c.command_id.isnot(None), executions.c.output.isnot(None),
+        executions.c.started_at >= datetime.utcnow() - timedelta(days=7)
+    )).all()
+    for execution_id, output in rows:
+        try:
+            stored = json.loads(output)
+        except ValueError:
+            continue
+        # Compacted ({'outputs', 'results'}) or a plain list of host results
+        results = stored.get('results') if isinstance(stored, dict) else stored
+        if not isinstance(results, list):
+            continue
+        failed = sum(
+            1 for entry in results
+            if isinstance(entry, dict) and (entry.get('status') == 'error' or entry.get('exit_code') not in (0, None))
+        )
+        connection.execute(executions.update().where(executions.c.id == execution_id).values(failed_hosts=failed))
+
+
+def downgrade():
+    with op.batch_alter_table('execution_logs') as batch_op:
+        batch_op.drop_column('failed_hosts')
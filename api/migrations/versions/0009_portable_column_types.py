@@ -0,0 +1,44 @@
+"""Use portable column types
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-12-15 09:00:00
+
+Array and address columns created by 0001 with PostgreSQL's ARRAY and
+INET get the portable types of src/models/types.py. PostgreSQL already
+has them, so this only changes other databases (embedded SQLite), where
+0001 created the columns as text.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.models.types import Array, IPAddress
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+COLUMNS = {
+    'servers': {'ip_address': (IPAddress, False), 'tags': (Array(sa.String()), True)},
+    'execution_logs': {'target_servers': (Array(sa.Integer()), True)}
+}
+
+
+def _alter(portable):
+    if op.get_context().dialect.name == 'postgresql':
+        return
+    for table, columns in COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column, (type_, nullable) in columns.items():
+                batch_op.alter_column(column, type_=type_ if portable else sa.Text(), nullable=nullable)
+
+
+def upgrade():
+    _alter(portable=True)
+
+
+def downgrade():
+    _alter(portable=False)
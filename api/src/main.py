@@ -10,54 +10,98 @@ from src.routes.user import user_bp
 from src.routes.servers import servers_bp
 from src.routes.ssh_keys import ssh_keys_bp
 from src.routes.playbooks import playbooks_bp
+from src.routes.schedules import schedules_bp
+from src.routes.dashboard import dashboard_bp
+from src.routes.files import files_bp
+from src.routes.bastions import bastions_bp
+from src.routes.metrics import metrics_bp
+from src.routes.events import events_bp
+from src.utils.metrics import init_metrics
+from src.utils.db_routing import configure_database
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
 
-# Enable CORS for all routes
-CORS(app, origins="*")
+def create_app(config=None):
+    """Create and configure the Flask application.
 
-# Configuration
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
+    Heavy SSH/AWX dependencies (paramiko, cryptography, requests, yaml) are
+    imported on first use rather than here, and the schema is managed by
+    versioned migrations (``flask db upgrade``) instead of ``create_all``,
+    so building an app stays cheap for every worker and test process.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 
-# Database configuration
-database_url = os.environ.get('DATABASE_URL', 'sqlite:///app.db')
-if database_url.startswith('sqlite'):
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-else:
-    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    # Enable CORS for all routes
+    CORS(app, origins="*")
 
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Configuration
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
 
-# Initialize database
-db.init_app(app)
+    # Database configuration
+    # Without DATABASE_URL the API runs embedded on SQLite; an absolute
+    # sqlite:////path/app.db puts the file elsewhere (e.g. a data volume)
+    database_url = os.environ.get('DATABASE_URL', 'sqlite:///app.db')
+    if database_url == 'sqlite:///app.db':
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+    else:
+        app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(servers_bp, url_prefix='/api')
-app.register_blueprint(ssh_keys_bp, url_prefix='/api')
-app.register_blueprint(playbooks_bp, url_prefix='/api')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-# Create tables
-with app.app_context():
-    db.create_all()
+    if config:
+        app.config.update(config)
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
+    # Pool settings and the optional read replica (see utils/db_routing)
+    configure_database(app)
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
+    # Initialize database
+    db.init_app(app)
+
+    # Migrations are applied through the `flask db` CLI; server processes
+    # never run them, so they skip importing alembic.
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+        from flask_migrate import Migrate
+        Migrate(app, db, directory=MIGRATIONS_DIR)
+
+    # Register blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(servers_bp, url_prefix='/api')
+    app.register_blueprint(ssh_keys_bp, url_prefix='/api')
+    app.register_blueprint(playbooks_bp, url_prefix='/api')
+    app.register_blueprint(schedules_bp, url_prefix='/api')
+    app.register_blueprint(dashboard_bp, url_prefix='/api')
+    app.register_blueprint(files_bp, url_prefix='/api')
+    app.register_blueprint(bastions_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp)
+
+    # Request latency, per-request DB cost and pool usage
+    init_metrics(app)
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
+                return "Static folder not configured", 404
+
+        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+            return send_from_directory(static_folder_path, path)
         else:
-            return "index.html not found", 404
+            index_path = os.path.join(static_folder_path, 'index.html')
+            if os.path.exists(index_path):
+                return send_from_directory(static_folder_path, 'index.html')
+            else:
+                return "index.html not found", 404
 
+    return app
 
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
 
+if __name__ == '__main__':
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    app = create_app()
+    from src.utils.scheduler import start_scheduler
+    from src.utils.health_history import start_health_rollups
+    start_scheduler(app)
+    start_health_rollups(app)
+    app.run(host='0.0.0.0', port=5000, debug=os.environ.get('FLASK_DEBUG', '1') == '1', threaded=True)
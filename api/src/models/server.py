@@ -1,9 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from sqlalchemy.dialects.postgresql import ARRAY, INET
+from src.models.types import Array, IPAddress
 import json
+from src.utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Server(db.Model):
     __tablename__ = 'servers'
@@ -11,13 +12,15 @@ class Server(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False, unique=True)
     hostname = db.Column(db.String(255), nullable=False)
-    ip_address = db.Column(INET, nullable=False)
+    ip_address = db.Column(IPAddress, nullable=False)
     port = db.Column(db.Integer, default=22)
     username = db.Column(db.String(100), nullable=False)
     ssh_key_path = db.Column(db.String(500))
     description = db.Column(db.Text)
-    tags = db.Column(ARRAY(db.String), default=[])
+    tags = db.Column(Array(db.String), default=[])
     status = db.Column(db.String(50), default='active')
+    # Jump host; when unset, the bastion of the server's group (if any) is used
+    bastion_id = db.Column(db.Integer, db.ForeignKey('bastions.id', ondelete='SET NULL'))
     last_ping = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -34,11 +37,41 @@ class Server(db.Model):
             'description': self.description,
             'tags': self.tags or [],
             'status': self.status,
+            'bastion_id': self.bastion_id,
             'last_ping': self.last_ping.isoformat() if self.last_ping else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class Bastion(db.Model):
+    __tablename__ = 'bastions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False, unique=True)
+    hostname = db.Column(db.String(255), nullable=False)
+    port = db.Column(db.Integer, default=22)
+    username = db.Column(db.String(100), nullable=False)
+    ssh_key_path = db.Column(db.String(500))
+    # Concurrent tunnels through this bastion, per API or worker process
+    max_channels = db.Column(db.Integer)
+    description = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'hostname': self.hostname,
+            'port': self.port,
+            'username': self.username,
+            'ssh_key_path': self.ssh_key_path,
+            'max_channels': self.max_channels,
+            'description': self.description,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
 class CustomCommand(db.Model):
     __tablename__ = 'custom_commands'
     
@@ -47,6 +80,8 @@ class CustomCommand(db.Model):
     description = db.Column(db.Text)
     command = db.Column(db.Text, nullable=False)
     timeout = db.Column(db.Integer, default=300)
+    # Upload once per host to the remote script cache instead of sending the body on every run
+    run_as_script = db.Column(db.Boolean, nullable=False, default=False)
     created_by = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -58,6 +93,7 @@ class CustomCommand(db.Model):
             'description': self.description,
             'command': self.command,
             'timeout': self.timeout,
+            'run_as_script': self.run_as_script,
             'created_by': self.created_by,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
@@ -92,7 +128,7 @@ class ExecutionLog(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     execution_type = db.Column(db.String(50), nullable=False)
-    target_servers = db.Column(ARRAY(db.Integer))
+    target_servers = db.Column(Array(db.Integer))
     command_id = db.Column(db.Integer, db.ForeignKey('custom_commands.id'))
     playbook_id = db.Column(db.Integer, db.ForeignKey('custom_playbooks.id'))
     status = db.Column(db.String(50), nullable=False)
@@ -101,6 +137,14 @@ class ExecutionLog(db.Model):
     started_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
     executed_by = db.Column(db.String(100))
+    # Fingerprint of a request other identical ones may join (see utils/coalescing)
+    inflight_key = db.Column(db.String(32))
+    # Host results that errored or exited non-zero; set when a command execution finishes
+    failed_hosts = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index('uq_execution_logs_inflight_key', 'inflight_key', unique=True),
+    )
     
     def to_dict(self):
         return {
@@ -117,12 +161,75 @@ class ExecutionLog(db.Model):
             'executed_by': self.executed_by
         }
 
+class ExecutionIdempotencyKey(db.Model):
+    __tablename__ = 'execution_idempotency_keys'
+
+    # An Idempotency-Key header and the execution its request started or joined
+    idempotency_key = db.Column(db.String(255), primary_key=True)
+    execution_id = db.Column(db.Integer, db.ForeignKey('execution_logs.id', ondelete='CASCADE'), nullable=False,
+                             index=True)
+    request_fingerprint = db.Column(db.String(32), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ExecutionOutput(db.Model):
+    __tablename__ = 'execution_outputs'
+
+    # Search index of execution output: one row per distinct output. The
+    # tsvector column and GIN indexes exist only in the database (0003)
+    id = db.Column(db.Integer, primary_key=True)
+    execution_id = db.Column(db.Integer, db.ForeignKey('execution_logs.id', ondelete='CASCADE'), nullable=False)
+    output_id = db.Column(db.String(16), nullable=False)
+    server_ids = db.Column(Array(db.Integer), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+
+class Schedule(db.Model):
+    __tablename__ = 'schedules'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False, unique=True)
+    description = db.Column(db.Text)
+    command_id = db.Column(db.Integer, db.ForeignKey('custom_commands.id'))
+    playbook_id = db.Column(db.Integer, db.ForeignKey('custom_playbooks.id'))
+    cron_expression = db.Column(db.String(100), nullable=False)
+    # {"server_ids": [...], "tags": [...], "group_ids": [...]}; a host matching any part is targeted
+    target_selector = db.Column(db.JSON, nullable=False)
+    max_concurrency = db.Column(db.Integer, default=10)
+    jitter_seconds = db.Column(db.Integer, default=0)
+    enabled = db.Column(db.Boolean, default=True)
+    next_run_at = db.Column(db.DateTime)
+    last_run_at = db.Column(db.DateTime)
+    last_execution_id = db.Column(db.Integer, db.ForeignKey('execution_logs.id'))
+    created_by = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'command_id': self.command_id,
+            'playbook_id': self.playbook_id,
+            'cron_expression': self.cron_expression,
+            'target_selector': self.target_selector or {},
+            'max_concurrency': self.max_concurrency,
+            'jitter_seconds': self.jitter_seconds,
+            'enabled': self.enabled,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_execution_id': self.last_execution_id,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
 class ServerGroup(db.Model):
     __tablename__ = 'server_groups'
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False, unique=True)
     description = db.Column(db.Text)
+    bastion_id = db.Column(db.Integer, db.ForeignKey('bastions.id', ondelete='SET NULL'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def to_dict(self):
@@ -130,6 +237,7 @@ class ServerGroup(db.Model):
             'id': self.id,
             'name': self.name,
             'description': self.description,
+            'bastion_id': self.bastion_id,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -139,3 +247,37 @@ class ServerGroupMember(db.Model):
     server_id = db.Column(db.Integer, db.ForeignKey('servers.id'), primary_key=True)
     group_id = db.Column(db.Integer, db.ForeignKey('server_groups.id'), primary_key=True)
 
+
+class ServerHealthSample(db.Model):
+    __tablename__ = 'server_health_samples'
+
+    # One row per probe (ping or execution connection); pruned after rollup
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    server_id = db.Column(db.Integer, db.ForeignKey('servers.id', ondelete='CASCADE'), nullable=False)
+    ts = db.Column(db.DateTime, nullable=False)
+    ok = db.Column(db.Boolean, nullable=False)
+    # SSH session setup latency (connect, key exchange, auth); null when the probe failed
+    rtt_ms = db.Column(db.Float)
+
+    __table_args__ = (
+        db.Index('ix_server_health_samples_server_ts', 'server_id', 'ts'),
+        db.Index('ix_server_health_samples_ts', 'ts'),
+    )
+
+class ServerHealthRollup(db.Model):
+    __tablename__ = 'server_health_rollups'
+
+    # Aggregate of the samples in one bucket ('1m', '1h' or '1d' from its start)
+    server_id = db.Column(db.Integer, db.ForeignKey('servers.id', ondelete='CASCADE'), primary_key=True)
+    resolution = db.Column(db.String(2), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)
+    samples = db.Column(db.Integer, nullable=False)
+    ok = db.Column(db.Integer, nullable=False)
+    rtt_min = db.Column(db.Float)
+    rtt_max = db.Column(db.Float)
+    # Sum over successful samples; the average is rtt_sum / ok
+    rtt_sum = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_server_health_rollups_resolution_bucket', 'resolution', 'bucket'),
+    )
@@ -0,0 +1,26 @@
+"""Column types that work on PostgreSQL and SQLite.
+
+PostgreSQL keeps its native types: ``ARRAY`` (GIN-indexable, with
+``&&``/``@>`` operators) and ``INET``. Other databases, such as the
+embedded SQLite mode, store arrays as JSON and addresses as text. Values
+read back are plain lists and strings either way.
+
+Python-side comparators are those of the portable type. Queries that use
+array operators check the dialect and wrap the column with ``pg_array``.
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, INET
+
+
+def Array(item_type):
+    """List column: ARRAY on PostgreSQL, JSON elsewhere"""
+    return sa.JSON().with_variant(ARRAY(item_type), 'postgresql')
+
+
+def pg_array(column, item_type):
+    """``column`` typed as a PostgreSQL ARRAY, for its operators"""
+    return sa.type_coerce(column, ARRAY(item_type))
+
+
+# Long enough for an IPv6 address with a prefix length
+IPAddress = sa.String(64).with_variant(INET(), 'postgresql')
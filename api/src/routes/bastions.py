@@ -0,0 +1,127 @@
+from flask import Blueprint, request, jsonify
+from src.models.server import db, Bastion, Server, ServerGroup
+from src.utils.db_routing import read_replica
+from datetime import datetime
+
+bastions_bp = Blueprint('bastions', __name__)
+
+def _bastion_dict(bastion):
+    group_ids = [group_id for group_id, in db.session.query(ServerGroup.id).filter_by(bastion_id=bastion.id)]
+    return {**bastion.to_dict(), 'group_ids': group_ids}
+
+def _assign_groups(bastion, group_ids):
+    """Make ``bastion`` the jump host of exactly the groups in ``group_ids``"""
+    ServerGroup.query.filter(
+        ServerGroup.bastion_id == bastion.id, ServerGroup.id.notin_(group_ids)
+    ).update({'bastion_id': None}, synchronize_session=False)
+    if group_ids:
+        ServerGroup.query.filter(ServerGroup.id.in_(group_ids)).update(
+            {'bastion_id': bastion.id}, synchronize_session=False
+        )
+
+def _validate(data):
+    """Return an error message for invalid bastion fields, or None"""
+    max_channels = data.get('max_channels')
+    if max_channels is not None and (not isinstance(max_channels, int) or max_channels < 1):
+        return f'Invalid max_channels: {max_channels}'
+    group_ids = data.get('group_ids')
+    if group_ids is not None and (not isinstance(group_ids, list) or not all(isinstance(i, int) for i in group_ids)):
+        return 'group_ids must be a list of group ids'
+    return None
+
+@bastions_bp.route('/bastions', methods=['GET'])
+@read_replica
+def get_bastions():
+    """Get all bastions"""
+    try:
+        bastions = Bastion.query.order_by(Bastion.name).all()
+        return jsonify([_bastion_dict(bastion) for bastion in bastions])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bastions_bp.route('/bastions', methods=['POST'])
+def create_bastion():
+    """Create a new bastion"""
+    try:
+        data = request.get_json()
+
+        required_fields = ['name', 'hostname', 'username']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        error = _validate(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        if Bastion.query.filter_by(name=data['name']).first():
+            return jsonify({'error': 'Bastion name already exists'}), 400
+
+        bastion = Bastion(
+            name=data['name'],
+            hostname=data['hostname'],
+            port=data.get('port', 22),
+            username=data['username'],
+            ssh_key_path=data.get('ssh_key_path'),
+            max_channels=data.get('max_channels'),
+            description=data.get('description')
+        )
+        db.session.add(bastion)
+        db.session.flush()
+        if data.get('group_ids'):
+            _assign_groups(bastion, data['group_ids'])
+        db.session.commit()
+
+        return jsonify(_bastion_dict(bastion)), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bastions_bp.route('/bastions/<int:bastion_id>', methods=['GET'])
+def get_bastion(bastion_id):
+    """Get a specific bastion"""
+    try:
+        bastion = Bastion.query.get_or_404(bastion_id)
+        return jsonify(_bastion_dict(bastion))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bastions_bp.route('/bastions/<int:bastion_id>', methods=['PUT'])
+def update_bastion(bastion_id):
+    """Update a bastion"""
+    try:
+        bastion = Bastion.query.get_or_404(bastion_id)
+        data = request.get_json()
+
+        error = _validate(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        for field in ['name', 'hostname', 'port', 'username', 'ssh_key_path', 'max_channels', 'description']:
+            if field in data:
+                setattr(bastion, field, data[field])
+        if 'group_ids' in data:
+            _assign_groups(bastion, data['group_ids'])
+
+        bastion.updated_at = datetime.utcnow()
+        db.session.commit()
+
+        return jsonify(_bastion_dict(bastion))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bastions_bp.route('/bastions/<int:bastion_id>', methods=['DELETE'])
+def delete_bastion(bastion_id):
+    """Delete a bastion; its servers and groups are connected to directly again"""
+    try:
+        bastion = Bastion.query.get_or_404(bastion_id)
+        for model in (Server, ServerGroup):
+            model.query.filter_by(bastion_id=bastion.id).update({'bastion_id': None}, synchronize_session=False)
+        db.session.delete(bastion)
+        db.session.commit()
+
+        return jsonify({'message': 'Bastion deleted successfully'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,14 @@
+from flask import Blueprint, jsonify
+from src.utils.dashboard import get_summary
+from src.utils.db_routing import read_replica
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+@dashboard_bp.route('/dashboard/summary', methods=['GET'])
+@read_replica
+def get_dashboard_summary():
+    """Get server, command and execution counts for the dashboard"""
+    try:
+        return jsonify(get_summary())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,34 @@
+from flask import Blueprint, request
+from flask_sock import Sock
+from src.utils.live_events import HEARTBEAT, LIVE_EVENTS_HEARTBEAT_SECONDS, TOPICS, get_event_hub
+from src.utils.metrics import LIVE_EVENT_CLIENTS
+
+events_bp = Blueprint('events', __name__)
+sock = Sock()
+
+@sock.route('/events', bp=events_bp)
+def live_events(ws):
+    """Push server and execution events to a WebSocket client"""
+    requested = request.args.get('topics')
+    topics = [topic for topic in requested.split(',') if topic] if requested else TOPICS
+    unknown = set(topics) - set(TOPICS)
+    if unknown:
+        ws.close(reason=1008, message=f"Unknown topics: {', '.join(sorted(unknown))}")
+        return
+    
+    hub = get_event_hub()
+    client = hub.connect(topics)
+    if client is None:
+        # The browser retries later; the REST endpoints stay usable meanwhile
+        ws.close(reason=1013, message='Live events unavailable on this worker')
+        return
+    
+    LIVE_EVENT_CLIENTS.inc()
+    try:
+        # Heartbeats keep proxies from closing an idle connection and
+        # detect clients that went away
+        while ws.connected:
+            ws.send(client.get(LIVE_EVENTS_HEARTBEAT_SECONDS) or HEARTBEAT)
+    finally:
+        hub.disconnect(client)
+        LIVE_EVENT_CLIENTS.dec()
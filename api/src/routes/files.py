@@ -0,0 +1,110 @@
+from flask import Blueprint, request, jsonify
+from src.models.server import db, Server
+from src.utils.ssh_manager import get_ssh_manager
+from src.utils.bastion import bastion_params
+import hashlib
+import os
+import tempfile
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+files_bp = Blueprint('files', __name__)
+
+UPLOADS_DIR = os.environ.get('UPLOADS_DIR', '/app/data/uploads')
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def _store_upload(upload):
+    """Copy an uploaded file to UPLOADS_DIR in chunks; return (path, sha256, size)"""
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(dir=UPLOADS_DIR, prefix='distribute-')
+    try:
+        with os.fdopen(fd, 'wb') as target:
+            while True:
+                chunk = upload.stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+                target.write(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest(), size
+
+@files_bp.route('/files/distribute', methods=['POST'])
+def distribute_file():
+    """Upload a file once and push it to servers over SFTP"""
+    try:
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'error': 'No file provided'}), 400
+
+        remote_path = request.form.get('remote_path', '')
+        if not remote_path.startswith('/') or remote_path.endswith('/'):
+            return jsonify({'error': 'remote_path must be an absolute file path'}), 400
+
+        try:
+            # Each server once, in the order given
+            server_ids = list(dict.fromkeys(
+                int(server_id) for server_id in request.form.get('server_ids', '').split(',') if server_id.strip()
+            ))
+            mode = int(request.form['mode'], 8) if request.form.get('mode') else None
+        except ValueError as e:
+            return jsonify({'error': f'Invalid field: {str(e)}'}), 400
+        if not server_ids:
+            return jsonify({'error': 'No servers specified'}), 400
+
+        servers = {server.id: server for server in Server.query.filter(Server.id.in_(server_ids)).all()}
+        missing = [server_id for server_id in server_ids if server_id not in servers]
+        if missing:
+            return jsonify({'error': f'Servers not found: {missing}'}), 404
+        bastions = bastion_params(servers.values())
+
+        names = {server_id: server.name for server_id, server in servers.items()}
+        hosts = [
+            {
+                'hostname': servers[server_id].hostname,
+                'port': servers[server_id].port,
+                'username': servers[server_id].username,
+                'key_path': servers[server_id].ssh_key_path,
+                'bastion': bastions[server_id]
+            }
+            for server_id in server_ids
+        ]
+        # Return the connection to the pool before the transfers, which can
+        # take minutes
+        db.session.commit()
+        db.session.close()
+
+        local_path, checksum, size = _store_upload(upload)
+        try:
+            started = time.perf_counter()
+            host_results = get_ssh_manager().distribute_file(hosts, local_path, remote_path, checksum, mode=mode)
+            elapsed = time.perf_counter() - started
+        finally:
+            os.remove(local_path)
+
+        results = [
+            {'server_id': server_id, 'server_name': names[server_id], **result}
+            for server_id, result in zip(server_ids, host_results)
+        ]
+        summary = {status: sum(1 for result in results if result['status'] == status)
+                   for status in ('uploaded', 'skipped', 'error')}
+        bytes_sent = sum(result['bytes'] for result in results)
+        logger.info(f"Distributed {upload.filename} ({size} bytes) to {len(results)} servers: {summary}")
+
+        return jsonify({
+            'file': {'name': upload.filename, 'size': size, 'sha256': checksum, 'remote_path': remote_path},
+            'summary': {
+                **summary,
+                'bytes_sent': bytes_sent,
+                'elapsed_ms': round(elapsed * 1000, 2),
+                'throughput_mb_s': round(bytes_sent / elapsed / 1e6, 2) if elapsed else None
+            },
+            'results': results
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,10 @@
+from flask import Blueprint, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from src.utils.metrics import get_registry
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(generate_latest(get_registry()), mimetype=CONTENT_TYPE_LATEST)
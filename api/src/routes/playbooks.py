@@ -1,9 +1,13 @@
 from flask import Blueprint, request, jsonify, send_file
 from werkzeug.utils import secure_filename
 from src.models.server import db, CustomPlaybook, ExecutionLog
-from src.utils.awx_client import AWXClient
+from src.utils.serialization import list_response
+from src.utils.db_routing import read_replica
+from src.utils.live_events import publish_execution
+from src.utils.coalescing import (
+    MAX_IDEMPOTENCY_KEY_LENGTH, IdempotencyConflict, coalesced_response, fingerprint, start_execution
+)
 import os
-import yaml
 import json
 from datetime import datetime
 import logging
@@ -18,11 +22,14 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 @playbooks_bp.route('/playbooks', methods=['GET'])
+@read_replica
 def get_playbooks():
     """Get all custom playbooks"""
     try:
-        playbooks = CustomPlaybook.query.all()
-        return jsonify([playbook.to_dict() for playbook in playbooks])
+        return list_response(CustomPlaybook.query, [
+            CustomPlaybook.id, CustomPlaybook.name, CustomPlaybook.description, CustomPlaybook.file_path,
+            CustomPlaybook.variables, CustomPlaybook.created_by, CustomPlaybook.created_at, CustomPlaybook.updated_at
+        ], {'variables': {}})
     except Exception as e:
         logger.error(f"Failed to fetch playbooks: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -30,6 +37,8 @@ def get_playbooks():
 @playbooks_bp.route('/playbooks', methods=['POST'])
 def create_playbook():
     """Create a new playbook (upload or create)"""
+    import yaml
+    
     try:
         # Check if it's a file upload
         if 'file' in request.files:
@@ -86,6 +95,8 @@ def create_playbook():
 
 def upload_playbook():
     """Handle playbook file upload"""
+    import yaml
+    
     try:
         file = request.files['file']
         
@@ -174,6 +185,8 @@ def get_playbook(playbook_id):
 @playbooks_bp.route('/playbooks/<int:playbook_id>', methods=['PUT'])
 def update_playbook(playbook_id):
     """Update a playbook"""
+    import yaml
+    
     try:
         playbook = CustomPlaybook.query.get_or_404(playbook_id)
         data = request.get_json()
@@ -253,6 +266,30 @@ def download_playbook(playbook_id):
         logger.error(f"Failed to download playbook: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def run_playbook(playbook, server_ids, extra_vars):
+    """Run a playbook on servers and return the execution output"""
+    # Initialize AWX client (requests is only imported on first use)
+    from src.utils.awx_client import AWXClient
+    awx_client = AWXClient()
+    
+    # For now, we'll simulate playbook execution
+    # In a full implementation, you would:
+    # 1. Create/update AWX inventory with selected servers
+    # 2. Create/update AWX project with the playbook
+    # 3. Create/update job template
+    # 4. Launch the job template
+    
+    # Simulate execution
+    import time
+    time.sleep(2)  # Simulate execution time
+    
+    return {
+        'message': 'Playbook execution simulated successfully',
+        'servers': server_ids,
+        'playbook': playbook.name,
+        'extra_vars': extra_vars
+    }
+
 @playbooks_bp.route('/playbooks/<int:playbook_id>/execute', methods=['POST'])
 def execute_playbook(playbook_id):
     """Execute a playbook using AWX"""
@@ -266,42 +303,36 @@ def execute_playbook(playbook_id):
         if not server_ids:
             return jsonify({'error': 'No servers specified'}), 400
         
-        # Create execution log
-        execution_log = ExecutionLog(
-            execution_type='playbook',
-            target_servers=server_ids,
-            playbook_id=playbook_id,
-            status='running',
-            executed_by=data.get('executed_by', 'admin')
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({'error': f'Idempotency-Key must be 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters'}), 400
+        
+        # Create execution log, unless this request duplicates one in flight
+        execution_log, coalesced = start_execution(
+            ExecutionLog(
+                execution_type='playbook',
+                target_servers=server_ids,
+                playbook_id=playbook_id,
+                status='running',
+                executed_by=data.get('executed_by', 'admin')
+            ),
+            fingerprint('playbook', playbook_id, server_ids, {'extra_vars': extra_vars}),
+            idempotency_key
         )
-        db.session.add(execution_log)
-        db.session.commit()
+        if coalesced:
+            body, status_code = coalesced_response(execution_log)
+            return jsonify(body), status_code
+        publish_execution(execution_log.id)
         
         try:
-            # Initialize AWX client
-            awx_client = AWXClient()
-            
-            # For now, we'll simulate playbook execution
-            # In a full implementation, you would:
-            # 1. Create/update AWX inventory with selected servers
-            # 2. Create/update AWX project with the playbook
-            # 3. Create/update job template
-            # 4. Launch the job template
-            
-            # Simulate execution
-            import time
-            time.sleep(2)  # Simulate execution time
+            output = run_playbook(playbook, server_ids, extra_vars)
             
             # Update execution log
             execution_log.status = 'completed'
             execution_log.completed_at = datetime.utcnow()
-            execution_log.output = json.dumps({
-                'message': 'Playbook execution simulated successfully',
-                'servers': server_ids,
-                'playbook': playbook.name,
-                'extra_vars': extra_vars
-            })
+            execution_log.output = json.dumps(output)
             db.session.commit()
+            publish_execution(execution_log.id)
             
             return jsonify({
                 'execution_id': execution_log.id,
@@ -315,24 +346,30 @@ def execute_playbook(playbook_id):
             execution_log.error_message = str(awx_error)
             execution_log.completed_at = datetime.utcnow()
             db.session.commit()
+            publish_execution(execution_log.id)
             
             return jsonify({
                 'error': 'Playbook execution failed',
                 'details': str(awx_error)
             }), 500
             
+    except IdempotencyConflict as e:
+        return jsonify({'error': str(e)}), 422
     except Exception as e:
         logger.error(f"Failed to execute playbook: {str(e)}")
-        if 'execution_log' in locals():
+        if 'execution_log' in locals() and not coalesced:
             execution_log.status = 'failed'
             execution_log.error_message = str(e)
             execution_log.completed_at = datetime.utcnow()
             db.session.commit()
+            publish_execution(execution_log.id)
         return jsonify({'error': str(e)}), 500
 
 @playbooks_bp.route('/playbooks/<int:playbook_id>/validate', methods=['POST'])
 def validate_playbook(playbook_id):
     """Validate a playbook's YAML syntax"""
+    import yaml
+    
     try:
         playbook = CustomPlaybook.query.get_or_404(playbook_id)
         
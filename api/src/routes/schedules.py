@@ -0,0 +1,144 @@
+from flask import Blueprint, request, jsonify, current_app
+from src.models.server import db, Schedule, CustomCommand, CustomPlaybook
+from src.utils.scheduler import Scheduler, next_run_after, validate_cron
+from src.utils.db_routing import read_replica
+from datetime import datetime
+
+schedules_bp = Blueprint('schedules', __name__)
+
+def _validate(data, schedule=None):
+    """Return an error message for invalid schedule fields, or None"""
+    cron_expression = data.get('cron_expression', schedule.cron_expression if schedule else None)
+    if not validate_cron(cron_expression):
+        return f'Invalid cron expression: {cron_expression}'
+
+    command_id = data.get('command_id', schedule.command_id if schedule else None)
+    playbook_id = data.get('playbook_id', schedule.playbook_id if schedule else None)
+    if bool(command_id) == bool(playbook_id):
+        return 'Exactly one of command_id or playbook_id is required'
+    if command_id and not CustomCommand.query.get(command_id):
+        return f'Command {command_id} not found'
+    if playbook_id and not CustomPlaybook.query.get(playbook_id):
+        return f'Playbook {playbook_id} not found'
+
+    selector = data.get('target_selector', schedule.target_selector if schedule else None)
+    if not isinstance(selector, dict) or not any(selector.get(key) for key in ('server_ids', 'tags', 'group_ids')):
+        return 'target_selector needs server_ids, tags or group_ids'
+
+    for field in ('max_concurrency', 'jitter_seconds'):
+        value = data.get(field)
+        # bool is an int subclass, but true is not a count
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)
+                                  or value < (1 if field == 'max_concurrency' else 0)):
+            return f'Invalid {field}: {value}'
+    return None
+
+@schedules_bp.route('/schedules', methods=['GET'])
+@read_replica
+def get_schedules():
+    """Get all schedules"""
+    try:
+        schedules = Schedule.query.order_by(Schedule.name).all()
+        return jsonify([schedule.to_dict() for schedule in schedules])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@schedules_bp.route('/schedules', methods=['POST'])
+def create_schedule():
+    """Create a new schedule"""
+    try:
+        data = request.get_json()
+
+        required_fields = ['name', 'cron_expression', 'target_selector']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        error = _validate(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        if Schedule.query.filter_by(name=data['name']).first():
+            return jsonify({'error': 'Schedule name already exists'}), 400
+
+        schedule = Schedule(
+            name=data['name'],
+            description=data.get('description'),
+            command_id=data.get('command_id'),
+            playbook_id=data.get('playbook_id'),
+            cron_expression=data['cron_expression'],
+            target_selector=data['target_selector'],
+            max_concurrency=data.get('max_concurrency', 10),
+            jitter_seconds=data.get('jitter_seconds', 0),
+            enabled=data.get('enabled', True),
+            next_run_at=next_run_after(data['cron_expression'], datetime.utcnow()),
+            created_by=data.get('created_by', 'admin')
+        )
+
+        db.session.add(schedule)
+        db.session.commit()
+
+        return jsonify(schedule.to_dict()), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@schedules_bp.route('/schedules/<int:schedule_id>', methods=['GET'])
+def get_schedule(schedule_id):
+    """Get a specific schedule"""
+    try:
+        schedule = Schedule.query.get_or_404(schedule_id)
+        return jsonify(schedule.to_dict())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@schedules_bp.route('/schedules/<int:schedule_id>', methods=['PUT'])
+def update_schedule(schedule_id):
+    """Update a schedule"""
+    try:
+        schedule = Schedule.query.get_or_404(schedule_id)
+        data = request.get_json()
+
+        error = _validate(data, schedule)
+        if error:
+            return jsonify({'error': error}), 400
+
+        for field in ['name', 'description', 'command_id', 'playbook_id', 'cron_expression',
+                      'target_selector', 'max_concurrency', 'jitter_seconds', 'enabled']:
+            if field in data:
+                setattr(schedule, field, data[field])
+
+        # A new expression or re-enabling starts counting from now
+        if 'cron_expression' in data or data.get('enabled'):
+            schedule.next_run_at = next_run_after(schedule.cron_expression, datetime.utcnow())
+
+        db.session.commit()
+        return jsonify(schedule.to_dict())
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@schedules_bp.route('/schedules/<int:schedule_id>', methods=['DELETE'])
+def delete_schedule(schedule_id):
+    """Delete a schedule"""
+    try:
+        schedule = Schedule.query.get_or_404(schedule_id)
+        db.session.delete(schedule)
+        db.session.commit()
+        return jsonify({'message': 'Schedule deleted successfully'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@schedules_bp.route('/schedules/<int:schedule_id>/run', methods=['POST'])
+def run_schedule(schedule_id):
+    """Run a schedule now, outside its cron timing"""
+    try:
+        Schedule.query.get_or_404(schedule_id)
+        execution_id = Scheduler(current_app._get_current_object()).fire(schedule_id)
+        if execution_id is None:
+            return jsonify({'error': 'Previous run is still in progress'}), 409
+        return jsonify({'execution_id': execution_id, 'status': 'running'}), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
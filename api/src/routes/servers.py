@@ -1,18 +1,43 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from src.models.server import db, Server, CustomCommand, CustomPlaybook, ExecutionLog
-from datetime import datetime
-import paramiko
-import os
+from src.utils.ssh_manager import CONNECTION_KEYS, get_ssh_manager
+from src.utils.bastion import bastion_params
+from src.utils.execution_stats import (
+    compact_results, expand_results, failed_hosts, group_results, host_result, load_results, skipped_hosts,
+    summarize_timings
+)
+from src.utils.circuit_breaker import get_circuit_breaker
+from src.utils.execution_queue import EXECUTION_BACKEND, get_execution_queue
+from src.utils.execution_control import (
+    EXECUTION_DEADLINE_SECONDS, ExecutionControl, cancel_local, final_status, watch
+)
+from src.utils.serialization import list_response
+from src.utils.output_search import SEARCH_MODES, index_outputs, search_outputs
+from src.utils.health_history import history, record_probe, record_results, MAX_SPAN, RESOLUTIONS
+from src.utils.export import (
+    EXECUTION_FIELDS, EXPORT_FORMATS, HOST_RESULT_FIELDS, execution_row, host_result_row, stream_export
+)
+from src.utils.db_routing import read_replica
+from src.utils.write_batcher import batched_write
+from src.utils.live_events import publish_execution, publish_server, publish_server_deleted
+from src.utils.coalescing import (
+    MAX_IDEMPOTENCY_KEY_LENGTH, IdempotencyConflict, coalesced_response, fingerprint, start_execution
+)
+from datetime import datetime, timedelta
 import json
 
 servers_bp = Blueprint('servers', __name__)
 
 @servers_bp.route('/servers', methods=['GET'])
+@read_replica
 def get_servers():
     """Get all servers"""
     try:
-        servers = Server.query.all()
-        return jsonify([server.to_dict() for server in servers])
+        return list_response(Server.query, [
+            Server.id, Server.name, Server.hostname, Server.ip_address, Server.port, Server.username,
+            Server.ssh_key_path, Server.description, Server.tags, Server.status, Server.bastion_id,
+            Server.last_ping, Server.created_at, Server.updated_at
+        ], {'tags': []})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -42,11 +67,13 @@ def create_server():
             username=data['username'],
             ssh_key_path=data.get('ssh_key_path'),
             description=data.get('description'),
-            tags=data.get('tags', [])
+            tags=data.get('tags', []),
+            bastion_id=data.get('bastion_id')
         )
         
         db.session.add(server)
         db.session.commit()
+        publish_server(server.to_dict())
         
         return jsonify(server.to_dict()), 201
     except Exception as e:
@@ -70,12 +97,14 @@ def update_server(server_id):
         data = request.get_json()
         
         # Update fields
-        for field in ['name', 'hostname', 'ip_address', 'port', 'username', 'ssh_key_path', 'description', 'tags']:
+        for field in ['name', 'hostname', 'ip_address', 'port', 'username', 'ssh_key_path', 'description', 'tags',
+                      'bastion_id']:
             if field in data:
                 setattr(server, field, data[field])
         
         server.updated_at = datetime.utcnow()
         db.session.commit()
+        publish_server(server.to_dict())
         
         return jsonify(server.to_dict())
     except Exception as e:
@@ -89,6 +118,7 @@ def delete_server(server_id):
         server = Server.query.get_or_404(server_id)
         db.session.delete(server)
         db.session.commit()
+        publish_server_deleted(server_id)
         
         return jsonify({'message': 'Server deleted successfully'})
     except Exception as e:
@@ -100,69 +130,84 @@ def ping_server(server_id):
     """Test SSH connection to a server"""
     try:
         server = Server.query.get_or_404(server_id)
+        connection = {
+            'hostname': server.hostname,
+            'port': server.port,
+            'username': server.username,
+            'key_path': server.ssh_key_path,
+            'bastion': bastion_params([server])[server.id]
+        }
         
-        # Create SSH client
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        # Return the pooled database connection while SSH I/O is in flight
+        db.session.commit()
         
-        try:
-            # Connect to server
-            if server.ssh_key_path and os.path.exists(server.ssh_key_path):
-                ssh.connect(
-                    hostname=server.hostname,
-                    port=server.port,
-                    username=server.username,
-                    key_filename=server.ssh_key_path,
-                    timeout=10
-                )
-            else:
-                # For demo purposes, we'll assume password authentication
-                # In production, you'd want to handle this more securely
-                ssh.connect(
-                    hostname=server.hostname,
-                    port=server.port,
-                    username=server.username,
-                    timeout=10
-                )
-            
-            # Execute a simple command
-            stdin, stdout, stderr = ssh.exec_command('echo "Connection successful"')
-            output = stdout.read().decode().strip()
-            
-            # Update server status
-            server.status = 'active'
-            server.last_ping = datetime.utcnow()
-            db.session.commit()
-            
-            ssh.close()
-            
+        result = get_ssh_manager().test_ssh_connection(timeout=10, **connection)
+        
+        # Update server status; concurrent pings share a commit on SQLite
+        state = {'status': 'active' if result['success'] else 'error', 'last_ping': datetime.utcnow()}
+        def save():
+            Server.query.filter_by(id=server_id).update(state, synchronize_session=False)
+            record_probe(server_id, result['success'], result['timings_ms'])
+        batched_write(save)
+        publish_server({'id': server_id, **state})
+        
+        if result['success']:
             return jsonify({
                 'status': 'success',
                 'message': 'Server is reachable',
-                'output': output
+                'output': result['output'],
+                'timings_ms': result['timings_ms']
             })
+        
+        return jsonify({
+            'status': 'error',
+            'message': f"SSH connection failed: {result['error']}"
+        }), 400
             
-        except Exception as ssh_error:
-            server.status = 'error'
-            server.last_ping = datetime.utcnow()
-            db.session.commit()
-            
-            ssh.close()
-            
-            return jsonify({
-                'status': 'error',
-                'message': f'SSH connection failed: {str(ssh_error)}'
-            }), 400
-            
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@servers_bp.route('/servers/<int:server_id>/health-history', methods=['GET'])
+@read_replica
+def get_server_health_history(server_id):
+    """Get a server's reachability and SSH latency over time"""
+    try:
+        server = Server.query.get_or_404(server_id)
+
+        try:
+            until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else datetime.utcnow()
+            since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else until - timedelta(hours=24)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid date: {str(e)}'}), 400
+        if since >= until:
+            return jsonify({'error': 'since must be before until'}), 400
+
+        resolution = request.args.get('resolution', 'auto')
+        if resolution != 'auto' and resolution not in RESOLUTIONS:
+            return jsonify({'error': f'Unsupported resolution: {resolution}'}), 400
+        # The same cap auto applies, so an explicit resolution cannot return unbounded points
+        if MAX_SPAN.get(resolution) is not None and until - since > MAX_SPAN[resolution]:
+            return jsonify({'error': f'Resolution {resolution} serves at most {MAX_SPAN[resolution]}; '
+                                     f'use a coarser one or auto'}), 400
+
+        return jsonify({
+            'server_id': server.id,
+            'since': since.isoformat(),
+            'until': until.isoformat(),
+            **history(server.id, since, until, None if resolution == 'auto' else resolution)
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @servers_bp.route('/commands', methods=['GET'])
+@read_replica
 def get_commands():
     """Get all custom commands"""
     try:
-        commands = CustomCommand.query.all()
-        return jsonify([command.to_dict() for command in commands])
+        return list_response(CustomCommand.query, [
+            CustomCommand.id, CustomCommand.name, CustomCommand.description, CustomCommand.command,
+            CustomCommand.timeout, CustomCommand.run_as_script, CustomCommand.created_by, CustomCommand.created_at, CustomCommand.updated_at
+        ])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -189,6 +234,7 @@ def create_command():
             description=data.get('description'),
             command=data['command'],
             timeout=data.get('timeout', 300),
+            run_as_script=data.get('run_as_script', False),
             created_by=data.get('created_by', 'admin')
         )
         
@@ -211,92 +257,271 @@ def execute_command(command_id):
         if not server_ids:
             return jsonify({'error': 'No servers specified'}), 400
         
-        # Create execution log
-        execution_log = ExecutionLog(
-            execution_type='command',
-            target_servers=server_ids,
-            command_id=command_id,
-            status='running',
-            executed_by=data.get('executed_by', 'admin')
+        deadline_seconds = data.get('deadline_seconds', EXECUTION_DEADLINE_SECONDS)
+        if isinstance(deadline_seconds, bool) or not isinstance(deadline_seconds, (int, float)) or deadline_seconds <= 0:
+            return jsonify({'error': 'deadline_seconds must be a positive number'}), 400
+        # Hosts whose circuit is open are reported as skipped rather than failed
+        skip_open_circuits = bool(data.get('skip_open_circuits', False))
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({'error': f'Idempotency-Key must be 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters'}), 400
+        
+        queued = EXECUTION_BACKEND == 'queue'
+        
+        # Create execution log, unless this request duplicates one in flight
+        execution_log, coalesced = start_execution(
+            ExecutionLog(
+                execution_type='command',
+                target_servers=server_ids,
+                command_id=command_id,
+                status='queued' if queued else 'running',
+                executed_by=data.get('executed_by', 'admin')
+            ),
+            fingerprint('command', command_id, server_ids, {
+                'command': command.command, 'timeout': command.timeout, 'script': command.run_as_script,
+                'deadline_seconds': deadline_seconds, 'skip_open_circuits': skip_open_circuits
+            }),
+            idempotency_key
         )
-        db.session.add(execution_log)
+        if coalesced:
+            body, status_code = coalesced_response(execution_log)
+            return jsonify(body), status_code
+        publish_execution(execution_log.id)
+        control = ExecutionControl.with_timeout(execution_log.id, deadline_seconds)
+        
+        # Snapshot connection details here: the fan-out threads must not
+        # touch ORM objects or the request's database session.
+        servers = {
+            server.id: server
+            for server in Server.query.filter(Server.id.in_(server_ids)).all()
+        }
+        bastions = bastion_params(servers.values())
+        targets = [
+            {
+                'server_id': servers[server_id].id,
+                'server_name': servers[server_id].name,
+                'hostname': servers[server_id].hostname,
+                'port': servers[server_id].port,
+                'username': servers[server_id].username,
+                'key_path': servers[server_id].ssh_key_path,
+                'bastion': bastions[server_id]
+            }
+            for server_id in server_ids if server_id in servers
+        ]
+        command_text = command.command
+        command_timeout = command.timeout
+        command_script = command.run_as_script
+        
+        # Return the pooled database connection while SSH I/O is in flight
         db.session.commit()
         
-        results = []
-        
-        for server_id in server_ids:
-            server = Server.query.get(server_id)
-            if not server:
-                continue
-                
-            try:
-                # Execute command via SSH
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                
-                if server.ssh_key_path and os.path.exists(server.ssh_key_path):
-                    ssh.connect(
-                        hostname=server.hostname,
-                        port=server.port,
-                        username=server.username,
-                        key_filename=server.ssh_key_path,
-                        timeout=10
-                    )
-                else:
-                    ssh.connect(
-                        hostname=server.hostname,
-                        port=server.port,
-                        username=server.username,
-                        timeout=10
-                    )
-                
-                stdin, stdout, stderr = ssh.exec_command(command.command, timeout=command.timeout)
-                output = stdout.read().decode()
-                error = stderr.read().decode()
-                
-                ssh.close()
-                
-                results.append({
-                    'server_id': server_id,
-                    'server_name': server.name,
-                    'status': 'success',
-                    'output': output,
-                    'error': error
-                })
-                
-            except Exception as ssh_error:
-                results.append({
-                    'server_id': server_id,
-                    'server_name': server.name,
-                    'status': 'error',
-                    'error': str(ssh_error)
-                })
-        
-        # Update execution log
-        execution_log.status = 'completed'
+        if queued:
+            # Workers (python -m src.worker) run the batches and finalize the log
+            tasks = get_execution_queue().enqueue(
+                execution_log.id, targets, command_text, command_timeout, script=command_script,
+                deadline=control.deadline, skip_open_circuits=skip_open_circuits
+            )
+            return jsonify({
+                'execution_id': execution_log.id,
+                'status': 'queued',
+                'tasks': tasks
+            }), 202
+        
+        hosts = [
+            {key: target[key] for key in CONNECTION_KEYS}
+            for target in targets
+        ]
+        with watch(control, current_app._get_current_object()):
+            host_results = get_ssh_manager().execute_on_hosts(
+                hosts, command_text, timeout=command_timeout, script=command_script, control=control,
+                skip_open_circuits=skip_open_circuits
+            )
+        
+        results = [host_result(target, result) for target, result in zip(targets, host_results)]
+        stored = compact_results(results)
+        
+        # Update execution log; reading the status reloads it, in case it
+        # was cancelled after the last host returned
+        execution_log.status = final_status(control, cancelling=execution_log.status == 'cancelling')
         execution_log.completed_at = datetime.utcnow()
-        execution_log.output = json.dumps(results)
+        execution_log.output = json.dumps(stored)
+        execution_log.failed_hosts = failed_hosts(stored['results'])
+        index_outputs(execution_log.id, stored)
+        record_results(stored['results'])
         db.session.commit()
+        publish_execution(execution_log.id)
+        
+        if request.args.get('expand') == 'true':
+            return jsonify({
+                'execution_id': execution_log.id,
+                'status': execution_log.status,
+                'skipped': skipped_hosts(stored),
+                'results': results
+            })
         
         return jsonify({
             'execution_id': execution_log.id,
-            'results': results
+            'status': execution_log.status,
+            'skipped': skipped_hosts(stored),
+            'groups': group_results(stored),
+            'outputs': stored['outputs'],
+            'results': stored['results']
         })
         
+    except IdempotencyConflict as e:
+        return jsonify({'error': str(e)}), 422
     except Exception as e:
-        if 'execution_log' in locals():
+        if 'execution_log' in locals() and not coalesced:
             execution_log.status = 'failed'
             execution_log.error_message = str(e)
             execution_log.completed_at = datetime.utcnow()
             db.session.commit()
+            publish_execution(execution_log.id)
+        return jsonify({'error': str(e)}), 500
+
+@servers_bp.route('/executions/<int:execution_id>/cancel', methods=['POST'])
+def cancel_execution(execution_id):
+    """Cancel a queued or running command execution"""
+    try:
+        execution = ExecutionLog.query.get_or_404(execution_id)
+        if execution.execution_type != 'command':
+            return jsonify({'error': 'Only command executions can be cancelled'}), 400
+        
+        # Whichever process runs the execution stops it and records the
+        # partial results, ending in status cancelled
+        cancelling = ExecutionLog.query.filter(
+            ExecutionLog.id == execution_id, ExecutionLog.status.in_(['queued', 'running'])
+        ).update({'status': 'cancelling'}, synchronize_session=False)
+        db.session.commit()
+        if not cancelling:
+            db.session.refresh(execution)
+            return jsonify({'error': f'Execution is already {execution.status}'}), 409
+        
+        publish_execution(execution_id)
+        cancel_local(execution_id)
+        return jsonify({'execution_id': execution_id, 'status': 'cancelling'}), 202
+    except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @servers_bp.route('/executions', methods=['GET'])
+@read_replica
 def get_executions():
     """Get execution history"""
     try:
-        executions = ExecutionLog.query.order_by(ExecutionLog.started_at.desc()).limit(100).all()
-        return jsonify([execution.to_dict() for execution in executions])
+        return list_response(ExecutionLog.query.order_by(ExecutionLog.started_at.desc()).limit(100), [
+            ExecutionLog.id, ExecutionLog.execution_type, ExecutionLog.target_servers, ExecutionLog.command_id,
+            ExecutionLog.playbook_id, ExecutionLog.status, ExecutionLog.output, ExecutionLog.error_message,
+            ExecutionLog.started_at, ExecutionLog.completed_at, ExecutionLog.executed_by
+        ], {'target_servers': []})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@servers_bp.route('/executions/export', methods=['GET'])
+@read_replica
+def export_executions():
+    """Stream execution history as NDJSON or CSV"""
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+
+        fields = list(EXECUTION_FIELDS)
+        if request.args.get('include_output') == 'true':
+            fields.append('output')
+
+        query = ExecutionLog.query.with_entities(*(getattr(ExecutionLog, field) for field in fields))
+        for field in ('status', 'execution_type'):
+            if request.args.get(field):
+                query = query.filter(getattr(ExecutionLog, field) == request.args[field])
+        try:
+            if request.args.get('since'):
+                query = query.filter(ExecutionLog.started_at >= datetime.fromisoformat(request.args['since']))
+            if request.args.get('until'):
+                query = query.filter(ExecutionLog.started_at < datetime.fromisoformat(request.args['until']))
+        except ValueError as e:
+            return jsonify({'error': f'Invalid date: {str(e)}'}), 400
+
+        rows = (execution_row(row) for row in query.order_by(ExecutionLog.id).yield_per(1000))
+        return stream_export(rows, export_format, fields, 'executions')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@servers_bp.route('/executions/search', methods=['GET'])
+@read_replica
+def search_executions():
+    """Search stored execution output"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Missing search query: q'}), 400
+
+        mode = request.args.get('mode', 'substring')
+        if mode not in SEARCH_MODES:
+            return jsonify({'error': f'Unsupported mode: {mode}'}), 400
+
+        try:
+            since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else None
+            until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else None
+        except ValueError as e:
+            return jsonify({'error': f'Invalid date: {str(e)}'}), 400
+
+        limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+        return jsonify(search_outputs(query, mode, since, until, limit))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@servers_bp.route('/executions/<int:execution_id>/results/export', methods=['GET'])
+@read_replica
+def export_execution_results(execution_id):
+    """Stream an execution's per-host results as NDJSON or CSV"""
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+
+        execution = ExecutionLog.query.get_or_404(execution_id)
+        stored = load_results(execution.output)
+        if stored is None:
+            return jsonify({'error': 'Execution has no per-host results'}), 400
+
+        if export_format == 'csv':
+            rows = (host_result_row(result) for result in expand_results(stored))
+        else:
+            rows = expand_results(stored)
+        return stream_export(rows, export_format, HOST_RESULT_FIELDS, f'execution-{execution_id}-results')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@servers_bp.route('/executions/<int:execution_id>', methods=['GET'])
+def get_execution(execution_id):
+    """Get an execution with its per-host results and timing summary"""
+    try:
+        execution = ExecutionLog.query.get_or_404(execution_id)
+        result = execution.to_dict()
+        stored = load_results(execution.output)
+        
+        # Playbook executions store a summary object rather than host results
+        if stored is not None:
+            del result['output']
+            if request.args.get('expand') == 'true':
+                result['results'] = expand_results(stored)
+            else:
+                result['groups'] = group_results(stored)
+                result['outputs'] = stored['outputs']
+                result['results'] = stored['results']
+            result['skipped'] = skipped_hosts(stored)
+            result['timing_summary'] = summarize_timings(stored['results'])
+        
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@servers_bp.route('/circuits', methods=['GET'])
+def get_circuits():
+    """Get the hosts this process has seen failing, with their circuit state"""
+    try:
+        return jsonify(get_circuit_breaker().stats())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
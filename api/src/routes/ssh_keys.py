@@ -1,12 +1,12 @@
 from flask import Blueprint, request, jsonify
-from src.utils.ssh_manager import SSHManager
+from src.utils.ssh_manager import get_ssh_manager
+from src.utils.bastion import bastion_params
 from src.models.server import db, Server
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 ssh_keys_bp = Blueprint('ssh_keys', __name__)
-ssh_manager = SSHManager()
 
 @ssh_keys_bp.route('/ssh-keys/generate', methods=['POST'])
 def generate_ssh_key():
@@ -19,7 +19,7 @@ def generate_ssh_key():
             return jsonify({'error': 'Key name is required'}), 400
         
         # Generate key pair
-        result = ssh_manager.generate_ssh_key_pair(key_name)
+        result = get_ssh_manager().generate_ssh_key_pair(key_name)
         
         return jsonify({
             'message': 'SSH key pair generated successfully',
@@ -43,7 +43,7 @@ def test_ssh_connection():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        result = ssh_manager.test_ssh_connection(
+        result = get_ssh_manager().test_ssh_connection(
             hostname=data['hostname'],
             port=data['port'],
             username=data['username'],
@@ -69,7 +69,7 @@ def copy_public_key():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        result = ssh_manager.copy_public_key_to_server(
+        result = get_ssh_manager().copy_public_key_to_server(
             hostname=data['hostname'],
             port=data['port'],
             username=data['username'],
@@ -89,11 +89,12 @@ def get_server_info(server_id):
     try:
         server = Server.query.get_or_404(server_id)
         
-        result = ssh_manager.get_server_info(
+        result = get_ssh_manager().get_server_info(
             hostname=server.hostname,
             port=server.port,
             username=server.username,
-            key_path=server.ssh_key_path
+            key_path=server.ssh_key_path,
+            bastion=bastion_params([server])[server.id]
         )
         
         return jsonify({
@@ -113,21 +114,24 @@ def setup_ssh_for_server(server_id):
         server = Server.query.get_or_404(server_id)
         data = request.get_json()
         
+        bastion = bastion_params([server])[server.id]
+        
         # Generate SSH key pair for this server
         key_name = f"server_{server.id}_{server.name}"
-        key_result = ssh_manager.generate_ssh_key_pair(key_name)
+        key_result = get_ssh_manager().generate_ssh_key_pair(key_name)
         
         # Copy public key to server (requires password for initial setup)
         password = data.get('password')
         if not password:
             return jsonify({'error': 'Password required for initial SSH setup'}), 400
         
-        copy_result = ssh_manager.copy_public_key_to_server(
+        copy_result = get_ssh_manager().copy_public_key_to_server(
             hostname=server.hostname,
             port=server.port,
             username=server.username,
             public_key_content=key_result['public_key_content'],
-            password=password
+            password=password,
+            bastion=bastion
         )
         
         if not copy_result['success']:
@@ -141,11 +145,12 @@ def setup_ssh_for_server(server_id):
         db.session.commit()
         
         # Test the new key-based connection
-        test_result = ssh_manager.test_ssh_connection(
+        test_result = get_ssh_manager().test_ssh_connection(
             hostname=server.hostname,
             port=server.port,
             username=server.username,
-            key_path=key_result['private_key_path']
+            key_path=key_result['private_key_path'],
+            bastion=bastion
         )
         
         return jsonify({
@@ -164,7 +169,7 @@ def setup_ssh_for_server(server_id):
 def list_ssh_keys():
     """List all SSH keys in the keys directory"""
     try:
-        keys_dir = ssh_manager.ssh_keys_dir
+        keys_dir = get_ssh_manager().ssh_keys_dir
         
         if not os.path.exists(keys_dir):
             return jsonify({'keys': []})
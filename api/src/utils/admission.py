@@ -0,0 +1,198 @@
+"""Admission control for outgoing SSH sessions.
+
+Every SSH session opened by SSHManager first takes a slot from the
+process-wide AdmissionController. There are two caps:
+
+- ``SSH_MAX_SESSIONS`` bounds concurrent sessions across all executions,
+  keeping the API's file descriptors and threads in check.
+- ``SSH_MAX_SESSIONS_PER_HOST`` bounds concurrent sessions to one host,
+  so that parallel executions stay under sshd's ``MaxStartups``.
+
+Sessions that cannot start wait in a queue. Free slots go round-robin
+between executions (admission groups), and FIFO within each execution, so
+a 1000-host fan-out cannot starve a single ping queued behind it. A waiter
+whose host is at its cap is skipped without blocking other hosts. When an
+execution is cancelled, drop_group() removes its waiters at once.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from src.utils.metrics import SSH_ADMISSION_WAIT_SECONDS, SSH_QUEUE_DEPTH, SSH_SESSIONS_IN_FLIGHT
+
+SSH_MAX_SESSIONS = int(os.environ.get('SSH_MAX_SESSIONS', '200'))
+SSH_MAX_SESSIONS_PER_HOST = int(os.environ.get('SSH_MAX_SESSIONS_PER_HOST', '4'))
+SSH_ADMISSION_TIMEOUT = float(os.environ.get('SSH_ADMISSION_TIMEOUT', '300'))
+
+
+class AdmissionTimeout(Exception):
+    """Raised when a session waited longer than the admission timeout"""
+
+
+class AdmissionDropped(Exception):
+    """Raised when a waiting session's group was dropped from the queue"""
+
+
+class _Waiter:
+    __slots__ = ('host', 'group', 'event', 'dropped')
+
+    def __init__(self, host, group):
+        self.host = host
+        self.group = group
+        self.event = threading.Event()
+        self.dropped = False
+
+
+class AdmissionController:
+    def __init__(self, max_sessions=SSH_MAX_SESSIONS, max_per_host=SSH_MAX_SESSIONS_PER_HOST,
+                 timeout=SSH_ADMISSION_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._active = 0
+        self._active_per_host = {}
+        # group -> deque of waiters, in round-robin order
+        self._queues = OrderedDict()
+
+    def stats(self):
+        """Current occupancy, for health and debugging endpoints"""
+        with self._lock:
+            return {
+                'active': self._active,
+                'waiting': sum(len(queue) for queue in self._queues.values()),
+                'max_sessions': self.max_sessions,
+                'max_per_host': self.max_per_host,
+                'busiest_host_sessions': max(self._active_per_host.values(), default=0)
+            }
+
+    def _has_capacity(self, host):
+        return (self._active < self.max_sessions
+                and self._active_per_host.get(host, 0) < self.max_per_host)
+
+    def _take(self, host):
+        self._active += 1
+        self._active_per_host[host] = self._active_per_host.get(host, 0) + 1
+
+    def _dispatch(self):
+        """Grant free slots to queued waiters; caller holds the lock"""
+        progress = True
+        while progress and self._queues and self._active < self.max_sessions:
+            progress = False
+            for group in list(self._queues):
+                queue = self._queues[group]
+                waiter = next((w for w in queue if self._active_per_host.get(w.host, 0) < self.max_per_host), None)
+                if waiter is None:
+                    continue
+                queue.remove(waiter)
+                self._take(waiter.host)
+                waiter.event.set()
+                # The group goes to the back of the rotation
+                self._queues.move_to_end(group)
+                if not queue:
+                    del self._queues[group]
+                progress = True
+                break
+
+    def acquire(self, host, group=None, timeout=None):
+        """Take a session slot for ``host``, waiting if necessary.
+
+        ``group`` identifies the execution the session belongs to; sessions
+        without one are each their own group. Returns the seconds spent
+        waiting, or raises AdmissionTimeout (or AdmissionDropped).
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+
+        with self._lock:
+            if not self._queues and self._has_capacity(host):
+                self._take(host)
+                waiter = None
+            else:
+                waiter = _Waiter(host, group if group is not None else object())
+                self._queues.setdefault(waiter.group, deque()).append(waiter)
+                self._dispatch()
+
+        if waiter is not None and not waiter.event.is_set():
+            SSH_QUEUE_DEPTH.inc()
+            try:
+                granted = waiter.event.wait(timeout if timeout > 0 else None)
+            finally:
+                SSH_QUEUE_DEPTH.dec()
+            if not granted:
+                with self._lock:
+                    granted = waiter.event.is_set()
+                    if not granted:
+                        queue = self._queues.get(waiter.group)
+                        queue.remove(waiter)
+                        if not queue:
+                            del self._queues[waiter.group]
+                if not granted:
+                    waited = time.perf_counter() - start
+                    SSH_ADMISSION_WAIT_SECONDS.labels('timeout').observe(waited)
+                    raise AdmissionTimeout(
+                        f'Timed out after {waited:.1f}s waiting for an SSH session slot for {host[0]}'
+                    )
+
+        if waiter is not None and waiter.dropped:
+            waited = time.perf_counter() - start
+            SSH_ADMISSION_WAIT_SECONDS.labels('dropped').observe(waited)
+            raise AdmissionDropped(f'Dropped from the SSH session queue for {host[0]}')
+
+        waited = time.perf_counter() - start
+        SSH_ADMISSION_WAIT_SECONDS.labels('admitted').observe(waited)
+        SSH_SESSIONS_IN_FLIGHT.inc()
+        return waited
+
+    def release(self, host):
+        with self._lock:
+            self._active -= 1
+            remaining = self._active_per_host[host] - 1
+            if remaining:
+                self._active_per_host[host] = remaining
+            else:
+                del self._active_per_host[host]
+            self._dispatch()
+        SSH_SESSIONS_IN_FLIGHT.dec()
+
+    def drop_group(self, group):
+        """Remove every waiter of ``group``; each raises AdmissionDropped"""
+        with self._lock:
+            queue = self._queues.pop(group, ())
+            for waiter in queue:
+                waiter.dropped = True
+                waiter.event.set()
+        return len(queue)
+
+    @contextmanager
+    def slot(self, host, group=None, timings=None, timeout=None):
+        """Hold a session slot for the duration of the block.
+
+        The wait is recorded as ``timings['queue']`` in milliseconds.
+        """
+        start = time.perf_counter()
+        try:
+            self.acquire(host, group, timeout)
+        finally:
+            if timings is not None:
+                timings['queue'] = round((time.perf_counter() - start) * 1000, 2)
+        try:
+            yield
+        finally:
+            self.release(host)
+
+
+_shared_controller = None
+_shared_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """Return the process-wide AdmissionController, creating it on first use"""
+    global _shared_controller
+    if _shared_controller is None:
+        with _shared_controller_lock:
+            if _shared_controller is None:
+                _shared_controller = AdmissionController()
+    return _shared_controller
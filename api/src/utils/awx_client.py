@@ -1,8 +1,10 @@
 import requests
 import json
 import os
+import time
 import logging
 from urllib.parse import urljoin
+from src.utils.metrics import AWX_REQUEST_SECONDS, awx_endpoint_label
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +27,8 @@ class AWXClient:
     def _make_request(self, method, endpoint, data=None, params=None):
         """Make a request to AWX API"""
         url = urljoin(f"{self.base_url}/api/v2/", endpoint.lstrip('/'))
+        start = time.perf_counter()
+        outcome = 'error'
         
         try:
             response = self.session.request(
@@ -34,6 +38,7 @@ class AWXClient:
                 params=params,
                 timeout=30
             )
+            outcome = str(response.status_code)
             
             if response.status_code in [200, 201, 202, 204]:
                 if response.content:
@@ -46,6 +51,10 @@ class AWXClient:
         except Exception as e:
             logger.error(f"AWX API request failed: {str(e)}")
             return None
+        finally:
+            AWX_REQUEST_SECONDS.labels(method, awx_endpoint_label(endpoint), outcome).observe(
+                time.perf_counter() - start
+            )
     
     def get_organizations(self):
         """Get all organizations"""
@@ -0,0 +1,168 @@
+"""Shared jump-host (bastion) transports.
+
+Servers on private networks are reached through a bastion. Rather than
+a full bastion handshake per target, each process keeps one authenticated
+transport per bastion and opens a ``direct-tcpip`` channel over it for
+every target session. A fan-out of hundreds of hosts behind one bastion
+pays the outer handshake once. A transport that has dropped is
+re-established on next use.
+
+Each bastion allows at most ``max_channels`` concurrent tunnels per
+process (``BASTION_MAX_CHANNELS`` when unset), as sshd's ``MaxSessions``
+and the bastion's own resources are shared by every target behind it.
+Tunnels beyond that wait for a free channel.
+
+A bastion that cannot be reached opens its own circuit (see
+circuit_breaker) at the first failure: for ``BASTION_BACKOFF_SECONDS``,
+doubling while probes keep failing, tunnels through it fail at once
+with CircuitOpen instead of each retrying the connect timeout.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+from src.utils.circuit_breaker import CircuitBreaker
+
+BASTION_MAX_CHANNELS = int(os.environ.get('BASTION_MAX_CHANNELS', '64'))
+BASTION_KEEPALIVE_SECONDS = int(os.environ.get('BASTION_KEEPALIVE_SECONDS', '30'))
+BASTION_BACKOFF_SECONDS = float(os.environ.get('BASTION_BACKOFF_SECONDS', '5'))
+BASTION_MAX_BACKOFF_SECONDS = float(os.environ.get('BASTION_MAX_BACKOFF_SECONDS', '60'))
+
+
+class BastionBusy(Exception):
+    """Raised when no bastion channel became free within the timeout"""
+
+
+class TunnelFailed(Exception):
+    """Raised when a live bastion could not open a channel to the target"""
+
+
+class _Bastion:
+    def __init__(self, max_channels):
+        self.lock = threading.Lock()
+        self.transport = None
+        self.slots = threading.BoundedSemaphore(max_channels)
+
+
+class BastionPool:
+    def __init__(self, connect):
+        """``connect`` opens an authenticated transport, as SSHManager._connect"""
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._bastions = {}
+        self.circuits = CircuitBreaker(threshold=1, backoff=BASTION_BACKOFF_SECONDS,
+                                       max_backoff=BASTION_MAX_BACKOFF_SECONDS)
+
+    def _entry(self, bastion):
+        max_channels = bastion.get('max_channels') or BASTION_MAX_CHANNELS
+        key = (bastion['hostname'], bastion['port'], bastion['username'], bastion.get('key_path'), max_channels)
+        with self._lock:
+            entry = self._bastions.get(key)
+            if entry is None:
+                entry = self._bastions[key] = _Bastion(max_channels)
+            return entry
+
+    def _transport(self, entry, bastion, timeout):
+        with entry.lock:
+            if entry.transport is None or not entry.transport.is_active():
+                if entry.transport is not None:
+                    entry.transport.close()
+                    entry.transport = None
+                # Tunnels that queued behind a failed connect fail here at once
+                host = (bastion['hostname'], bastion['port'])
+                self.circuits.before(host)
+                try:
+                    entry.transport = self._connect(
+                        bastion['hostname'], bastion['port'], bastion['username'],
+                        key_path=bastion.get('key_path'), timeout=timeout
+                    )
+                except Exception as e:
+                    self.circuits.failure(host, e)
+                    raise
+                self.circuits.success(host)
+                entry.transport.set_keepalive(BASTION_KEEPALIVE_SECONDS)
+            return entry.transport
+
+    @contextmanager
+    def tunnel(self, bastion, destination, timeout=10, wait_timeout=None, timings=None):
+        """Yield a channel to ``destination`` (host, port) through ``bastion``.
+
+        ``bastion`` is a dict of hostname, port, username, key_path and
+        max_channels. Waiting for a free channel and (re)connecting the
+        bastion are recorded as ``timings['bastion']``, opening the channel
+        as ``timings['connect']`` (milliseconds). A channel the bastion
+        could not open raises TunnelFailed.
+        """
+        from src.utils.ssh_manager import timed_phase
+        
+        timings = {} if timings is None else timings
+        entry = self._entry(bastion)
+        with timed_phase('bastion', timings):
+            if not entry.slots.acquire(timeout=wait_timeout if wait_timeout else None):
+                raise BastionBusy(f"No free channel on bastion {bastion['hostname']} after {wait_timeout}s")
+            try:
+                transport = self._transport(entry, bastion, timeout)
+            except Exception:
+                entry.slots.release()
+                raise
+        try:
+            with timed_phase('connect', timings):
+                try:
+                    channel = transport.open_channel('direct-tcpip', destination, ('127.0.0.1', 0), timeout=timeout)
+                except Exception as e:
+                    # A dropped bastion is reconnected (and judged) on next use;
+                    # with the bastion up, the target refused or did not answer
+                    if not transport.is_active():
+                        raise
+                    raise TunnelFailed(
+                        f"Bastion {bastion['hostname']} could not reach {destination[0]}:{destination[1]}: {str(e)}"
+                    ) from e
+            try:
+                yield channel
+            finally:
+                channel.close()
+        finally:
+            entry.slots.release()
+
+    def close(self):
+        """Close every bastion transport"""
+        with self._lock:
+            entries = list(self._bastions.values())
+        for entry in entries:
+            with entry.lock:
+                if entry.transport is not None:
+                    entry.transport.close()
+                    entry.transport = None
+
+
+def bastion_params(servers):
+    """Map each server's id to the connection dict of its bastion, or None.
+
+    A server's own bastion wins over its groups'. Among groups, the one
+    with the lowest id decides.
+    """
+    from src.models.server import db, Bastion, ServerGroup, ServerGroupMember
+
+    group_bastions = {}
+    server_ids = [server.id for server in servers if server.bastion_id is None]
+    if server_ids:
+        rows = db.session.query(ServerGroupMember.server_id, ServerGroup.bastion_id).join(
+            ServerGroup, ServerGroup.id == ServerGroupMember.group_id
+        ).filter(
+            ServerGroupMember.server_id.in_(server_ids), ServerGroup.bastion_id.isnot(None)
+        ).order_by(ServerGroup.id)
+        for server_id, bastion_id in rows:
+            group_bastions.setdefault(server_id, bastion_id)
+
+    bastion_ids = {server.bastion_id or group_bastions.get(server.id) for server in servers} - {None}
+    bastions = {
+        bastion.id: {
+            'hostname': bastion.hostname,
+            'port': bastion.port,
+            'username': bastion.username,
+            'key_path': bastion.ssh_key_path,
+            'max_channels': bastion.max_channels
+        }
+        for bastion in (Bastion.query.filter(Bastion.id.in_(bastion_ids)).all() if bastion_ids else [])
+    }
+    return {server.id: bastions.get(server.bastion_id or group_bastions.get(server.id)) for server in servers}
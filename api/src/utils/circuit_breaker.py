@@ -0,0 +1,135 @@
+"""Per-host circuit breaker for SSH sessions.
+
+Every session outcome feeds the breaker of its host: executions, file
+uploads, server info and pings alike. Only connection failures count:
+resolve, connect, key exchange or authentication errors. A command that
+exits non-zero, or a session that never got an admission slot, does not.
+
+- **Closed**: sessions run normally. ``CIRCUIT_FAILURE_THRESHOLD``
+  consecutive failures open the circuit.
+- **Open**: sessions fail at once without connecting, sparing fan-outs
+  the connect timeout of every dead host. After a backoff the circuit
+  becomes half-open. The backoff starts at ``CIRCUIT_BACKOFF_SECONDS`` and
+  doubles each time a probe fails, up to ``CIRCUIT_MAX_BACKOFF_SECONDS``.
+- **Half-open**: one session is let through as a probe. Success closes
+  the circuit; failure opens it again with a longer backoff. Other
+  sessions keep failing fast while the probe runs.
+
+Pings always connect, so an operator can probe a host at any time. The
+state is kept per process, like admission control.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '3'))
+CIRCUIT_BACKOFF_SECONDS = float(os.environ.get('CIRCUIT_BACKOFF_SECONDS', '30'))
+CIRCUIT_MAX_BACKOFF_SECONDS = float(os.environ.get('CIRCUIT_MAX_BACKOFF_SECONDS', '1800'))
+
+
+class CircuitOpen(Exception):
+    """Raised for a session to a host whose circuit is open"""
+
+    def __init__(self, host, retry_at):
+        super().__init__(
+            f'Circuit open for {host[0]}: skipped after repeated connection failures, '
+            f'next attempt after {datetime.utcfromtimestamp(retry_at).isoformat()}'
+        )
+        self.host = host
+        self.retry_at = retry_at
+
+
+class _Circuit:
+    __slots__ = ('failures', 'trips', 'retry_at', 'probing', 'last_error')
+
+    def __init__(self):
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = None
+        self.probing = False
+        self.last_error = None
+
+    @property
+    def state(self):
+        if self.retry_at is None:
+            return 'closed'
+        return 'half_open' if self.probing or time.time() >= self.retry_at else 'open'
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=CIRCUIT_FAILURE_THRESHOLD, backoff=CIRCUIT_BACKOFF_SECONDS,
+                 max_backoff=CIRCUIT_MAX_BACKOFF_SECONDS):
+        self.threshold = threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._circuits = {}
+
+    def before(self, host):
+        """Admit a session to ``host`` or raise CircuitOpen.
+
+        Returns True when the session is the half-open probe. Its outcome
+        must be reported with success(), failure() or release().
+        """
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.retry_at is None:
+                return False
+            if circuit.probing or time.time() < circuit.retry_at:
+                raise CircuitOpen(host, circuit.retry_at)
+            circuit.probing = True
+            return True
+
+    def success(self, host):
+        with self._lock:
+            self._circuits.pop(host, None)
+
+    def failure(self, host, error=None):
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                circuit = self._circuits[host] = _Circuit()
+            circuit.failures += 1
+            circuit.last_error = str(error) if error is not None else None
+            if circuit.probing or circuit.failures >= self.threshold:
+                circuit.probing = False
+                circuit.trips += 1
+                delay = min(self.backoff * 2 ** (circuit.trips - 1), self.max_backoff)
+                circuit.retry_at = time.time() + delay
+
+    def release(self, host):
+        """End a probe that never reached the host (e.g. no admission slot)"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is not None:
+                circuit.probing = False
+
+    def stats(self):
+        """Hosts whose circuit is not closed, or is counting failures"""
+        with self._lock:
+            return [
+                {
+                    'hostname': host[0],
+                    'port': host[1],
+                    'state': circuit.state,
+                    'consecutive_failures': circuit.failures,
+                    'retry_at': datetime.utcfromtimestamp(circuit.retry_at).isoformat() if circuit.retry_at else None,
+                    'last_error': circuit.last_error
+                }
+                for host, circuit in self._circuits.items()
+            ]
+
+
+_shared_breaker = None
+_shared_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """Return the process-wide CircuitBreaker, creating it on first use"""
+    global _shared_breaker
+    if _shared_breaker is None:
+        with _shared_breaker_lock:
+            if _shared_breaker is None:
+                _shared_breaker = CircuitBreaker()
+    return _shared_breaker
@@ -0,0 +1,131 @@
+"""Idempotency keys and coalescing of duplicate executions.
+
+Double-clicks and client retries (e.g. after a proxy timeout) would
+otherwise start the same fan-out twice:
+
+- **Idempotency-Key**: the first request with a key creates the
+  execution. Later requests with the same key get that execution back
+  instead of starting another. Reusing a key for a different request is
+  an error.
+- **Coalescing**: a request identical to an execution that is still
+  queued or running, and started less than ``EXECUTION_COALESCE_SECONDS``
+  ago, joins that execution. Identical means the same command or
+  playbook, target set and options. 0 turns coalescing off.
+
+Both are enforced by unique keys, so concurrent duplicates in different
+API processes resolve to one execution: the loser of the insert race
+gets the winner's execution. Idempotency keys are kept in
+``execution_idempotency_keys``, including the keys of requests that
+joined an execution by coalescing, so replaying any of them returns that
+execution. ``execution_logs.inflight_key`` holds the fingerprint of a
+coalescable execution. It is released when an identical request finds
+that execution finished or past the window.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models.server import db, ExecutionIdempotencyKey, ExecutionLog
+
+EXECUTION_COALESCE_SECONDS = float(os.environ.get('EXECUTION_COALESCE_SECONDS', '30'))
+IN_FLIGHT_STATUSES = ('queued', 'running')
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+START_ATTEMPTS = 3
+
+
+class IdempotencyConflict(Exception):
+    """Raised when an Idempotency-Key is reused for a different request"""
+
+
+def fingerprint(execution_type, target_id, server_ids, options):
+    """Hash identifying an execution request; server order and repeats do not matter"""
+    payload = json.dumps([execution_type, target_id, sorted(set(server_ids)), options], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _joinable(execution_log, now):
+    return (
+        execution_log.status in IN_FLIGHT_STATUSES
+        and execution_log.started_at is not None
+        and execution_log.started_at >= now - timedelta(seconds=EXECUTION_COALESCE_SECONDS)
+    )
+
+
+def _keyed_execution(idempotency_key, request_fingerprint):
+    """Execution recorded for ``idempotency_key``, or None"""
+    keyed = db.session.get(ExecutionIdempotencyKey, idempotency_key)
+    if keyed is None:
+        return None
+    if keyed.request_fingerprint != request_fingerprint:
+        raise IdempotencyConflict(
+            f'Idempotency-Key already used by execution {keyed.execution_id} for a different request'
+        )
+    return db.session.get(ExecutionLog, keyed.execution_id)
+
+
+def _record_key(idempotency_key, request_fingerprint, execution_id):
+    db.session.add(ExecutionIdempotencyKey(
+        idempotency_key=idempotency_key, execution_id=execution_id, request_fingerprint=request_fingerprint
+    ))
+
+
+def start_execution(execution_log, request_fingerprint, idempotency_key=None):
+    """Insert ``execution_log`` and commit; return (execution, coalesced).
+
+    For a duplicate request nothing is inserted and the existing
+    execution is returned with ``coalesced`` True.
+    """
+    for _ in range(START_ATTEMPTS):
+        if idempotency_key:
+            existing = _keyed_execution(idempotency_key, request_fingerprint)
+            if existing is not None:
+                return existing, True
+
+        if EXECUTION_COALESCE_SECONDS > 0:
+            execution_log.inflight_key = request_fingerprint
+        db.session.add(execution_log)
+        try:
+            db.session.flush()
+            if idempotency_key:
+                _record_key(idempotency_key, request_fingerprint, execution_log.id)
+            db.session.commit()
+            return execution_log, False
+        except IntegrityError:
+            db.session.rollback()
+            # The rolled-back insert keeps the id it was given
+            execution_log.id = None
+
+        existing = ExecutionLog.query.filter_by(inflight_key=request_fingerprint).first()
+        if existing is None:
+            # Lost the race for the key: the next attempt finds its execution
+            continue
+        if _joinable(existing, datetime.utcnow()):
+            if not idempotency_key:
+                return existing, True
+            # Record the key, so replaying it returns this execution too
+            _record_key(idempotency_key, request_fingerprint, existing.id)
+            try:
+                db.session.commit()
+                return existing, True
+            except IntegrityError:
+                db.session.rollback()
+                continue
+        # Finished or past the window: release its key and insert again
+        ExecutionLog.query.filter_by(id=existing.id, inflight_key=request_fingerprint).update(
+            {'inflight_key': None}, synchronize_session=False
+        )
+        db.session.commit()
+    raise RuntimeError('Could not record the execution: duplicate requests kept colliding')
+
+
+def coalesced_response(execution_log):
+    """Body and status code for a request that joined ``execution_log``"""
+    finished = execution_log.status not in IN_FLIGHT_STATUSES + ('cancelling',)
+    return {
+        'execution_id': execution_log.id,
+        'status': execution_log.status,
+        'coalesced': True
+    }, 200 if finished else 202
@@ -0,0 +1,129 @@
+"""Dashboard summary: counts and recent activity from a few aggregate queries.
+
+The summary is cached per process for ``DASHBOARD_CACHE_SECONDS``. A commit
+in this process that touches servers, commands, playbooks or executions
+drops the cache straight away. Writes made by other processes (other API
+workers, execution workers) show up once the cache expires.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.models.server import db, Server, CustomCommand, CustomPlaybook, ExecutionLog
+
+DASHBOARD_CACHE_SECONDS = float(os.environ.get('DASHBOARD_CACHE_SECONDS', '5'))
+EXECUTION_WINDOWS = {'24h': timedelta(hours=24), '7d': timedelta(days=7)}
+TOP_FAILING_WINDOW = timedelta(days=7)
+TOP_FAILING_LIMIT = 5
+RECENT_LIMIT = 5
+
+WATCHED_MODELS = (Server, CustomCommand, CustomPlaybook, ExecutionLog)
+
+_cache = {'summary': None, 'expires': 0.0}
+_cache_lock = threading.Lock()
+
+
+def invalidate_summary():
+    with _cache_lock:
+        _cache['summary'] = None
+
+
+def get_summary():
+    """Return the cached summary, recomputing it when stale"""
+    with _cache_lock:
+        if _cache['summary'] is not None and time.monotonic() < _cache['expires']:
+            return _cache['summary']
+    summary = compute_summary()
+    with _cache_lock:
+        _cache['summary'] = summary
+        _cache['expires'] = time.monotonic() + DASHBOARD_CACHE_SECONDS
+    return summary
+
+
+def compute_summary(now=None):
+    now = now or datetime.utcnow()
+
+    servers = dict(db.session.query(Server.status, sa.func.count()).group_by(Server.status).all())
+
+    window_counts = [
+        sa.func.sum(sa.case((ExecutionLog.started_at >= now - window, 1), else_=0))
+        for window in EXECUTION_WINDOWS.values()
+    ]
+    executions = {'total': {}, **{name: {} for name in EXECUTION_WINDOWS}}
+    for status, total, *windows in db.session.query(
+        ExecutionLog.status, sa.func.count(), *window_counts
+    ).group_by(ExecutionLog.status):
+        executions['total'][status] = total
+        for name, count in zip(EXECUTION_WINDOWS, windows):
+            if count:
+                executions[name][status] = int(count)
+
+    # Failed host results, not failed executions: a run that completes with
+    # 13 hosts exiting non-zero counts 13. A run that failed outright before
+    # any host result was recorded counts 1
+    failures = sa.func.sum(
+        sa.case((ExecutionLog.failed_hosts > 0, ExecutionLog.failed_hosts), else_=1)
+    ).label('failures')
+    top_failing = db.session.query(
+        CustomCommand.id, CustomCommand.name, failures
+    ).join(ExecutionLog, ExecutionLog.command_id == CustomCommand.id).filter(
+        sa.or_(ExecutionLog.failed_hosts > 0, ExecutionLog.status == 'failed'),
+        ExecutionLog.started_at >= now - TOP_FAILING_WINDOW
+    ).group_by(CustomCommand.id, CustomCommand.name).order_by(failures.desc()).limit(TOP_FAILING_LIMIT)
+
+    recent = db.session.query(
+        ExecutionLog.id, ExecutionLog.execution_type, ExecutionLog.status,
+        ExecutionLog.started_at, ExecutionLog.completed_at
+    ).order_by(ExecutionLog.started_at.desc()).limit(RECENT_LIMIT)
+
+    return {
+        'servers': {'total': sum(servers.values()), 'by_status': servers},
+        'commands': {'total': db.session.query(sa.func.count(CustomCommand.id)).scalar()},
+        'playbooks': {'total': db.session.query(sa.func.count(CustomPlaybook.id)).scalar()},
+        'executions': executions,
+        'top_failing_commands': [
+            {'command_id': command_id, 'name': name, 'failures': count}
+            for command_id, name, count in top_failing
+        ],
+        'recent_executions': [
+            {
+                'id': execution_id,
+                'execution_type': execution_type,
+                'status': status,
+                'started_at': started_at.isoformat() if started_at else None,
+                'completed_at': completed_at.isoformat() if completed_at else None
+            }
+            for execution_id, execution_type, status, started_at, completed_at in recent
+        ],
+        'generated_at': now.isoformat()
+    }
+
+
+@event.listens_for(Session, 'after_flush')
+def _note_flush(session, flush_context):
+    if any(isinstance(obj, WATCHED_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['dashboard_stale'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _note_bulk_write(orm_execute_state):
+    # Query.update()/delete(), as used by the scheduler and workers
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper \
+            and orm_execute_state.bind_mapper.class_ in WATCHED_MODELS:
+        orm_execute_state.session.info['dashboard_stale'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('dashboard_stale', False):
+        invalidate_summary()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_on_rollback(session):
+    session.info.pop('dashboard_stale', None)
@@ -0,0 +1,110 @@
+"""Database engine settings: pools, SQLite tuning and read-replica routing.
+
+Every server engine gets its pool settings from the environment, as the API
+shares the AWX Postgres instance and its ``max_connections``:
+
+- ``DATABASE_POOL_SIZE`` / ``DATABASE_MAX_OVERFLOW``: persistent and burst
+  connections per process and engine
+- ``DATABASE_POOL_TIMEOUT``: seconds to wait for a free connection
+- ``DATABASE_POOL_RECYCLE``: seconds before a connection is replaced
+- ``DATABASE_POOL_PRE_PING``: test connections on checkout, so a restarted
+  or failed-over server costs a reconnect instead of a failed request
+
+With ``DATABASE_REPLICA_URL`` set, routes marked ``@read_replica`` (lists,
+dashboards, exports) read from the replica. Everything else stays on the
+primary: writes, the reads of write routes, and reads that must see the
+latest state, such as execution status polled after a run. Within a
+replica route, a write or a ``SELECT ... FOR UPDATE`` goes to the primary,
+and so does every statement after it. A request can opt out with the
+``X-Read-Consistency: primary`` header, e.g. a client listing what it has
+just created.
+
+SQLite (the embedded single-node mode) has no pool to tune. Its
+connections are set up for concurrent requests instead: WAL journaling,
+so readers never block the writer or each other; ``synchronous=NORMAL``,
+which in WAL mode syncs at checkpoints rather than every commit; a busy
+timeout (``SQLITE_BUSY_TIMEOUT_MS``) so a writer waits for the lock
+instead of failing; and foreign keys enforced, as on PostgreSQL.
+"""
+import os
+import sqlite3
+from functools import wraps
+
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+REPLICA_BIND = 'replica'
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+    'PRAGMA foreign_keys=ON'
+)
+
+
+def engine_options(url):
+    """Pool settings for an engine on ``url``"""
+    if url.startswith('sqlite'):
+        if url in ('sqlite://', 'sqlite:///:memory:'):
+            return {}
+        # Connections to a file are cheap and only contend for its write
+        # lock, so never make a request or the batched writer wait for one
+        return {'pool_size': int(os.environ.get('DATABASE_POOL_SIZE', '5')), 'max_overflow': -1}
+    return {
+        'pool_size': int(os.environ.get('DATABASE_POOL_SIZE', '5')),
+        'max_overflow': int(os.environ.get('DATABASE_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.environ.get('DATABASE_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.environ.get('DATABASE_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': os.environ.get('DATABASE_POOL_PRE_PING', '1') == '1'
+    }
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def configure_database(app):
+    """Set engine options and the replica bind, unless the app config sets them"""
+    if not event.contains(Engine, 'connect', _sqlite_pragmas):
+        event.listen(Engine, 'connect', _sqlite_pragmas)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+    binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+    if DATABASE_REPLICA_URL and REPLICA_BIND not in binds:
+        binds[REPLICA_BIND] = {'url': DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL)}
+
+
+def read_replica(view):
+    """Let the view's reads go to the replica, if one is configured"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_replica = request.headers.get('X-Read-Consistency') != 'primary'
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    """Session that sends the reads of ``@read_replica`` views to the replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        if not has_app_context() or not g.get('db_read_replica') or self.info.get('wrote'):
+            return False
+        if self._flushing or getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None:
+            # Stay on the primary for the rest of the request, so it reads its own writes
+            self.info['wrote'] = True
+            return False
+        return True
@@ -0,0 +1,194 @@
+"""Deadlines and cancellation of command executions.
+
+Every command execution runs under an ExecutionControl. It carries the
+execution's wall-clock deadline (``deadline_seconds`` on the execute
+request, ``EXECUTION_DEADLINE_SECONDS`` by default) and is stopped when
+that deadline passes or the execution is cancelled. Stopping it:
+
+- closes the channels of hosts still running, which then report the
+  output they produced so far;
+- drops the execution's hosts still waiting for an SSH slot;
+- makes hosts not started yet return at once without connecting.
+
+``POST /api/executions/<id>/cancel`` marks the execution ``cancelling``
+in the database and stops its control if it runs in the same process.
+Other processes (API instances, workers, schedulers) poll the database
+every ``EXECUTION_CANCEL_POLL_SECONDS`` for the executions they are
+running, so cancellation reaches them within that interval.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_DEADLINE_SECONDS = float(os.environ.get('EXECUTION_DEADLINE_SECONDS', '3600'))
+EXECUTION_CANCEL_POLL_SECONDS = float(os.environ.get('EXECUTION_CANCEL_POLL_SECONDS', '2'))
+
+STOP_MESSAGES = {
+    'cancelled': 'Execution was cancelled',
+    'deadline': 'Execution deadline exceeded'
+}
+
+
+class ExecutionStopped(Exception):
+    """Raised for a host whose execution was stopped before it could run"""
+
+    def __init__(self, reason):
+        super().__init__(STOP_MESSAGES.get(reason, reason))
+        self.reason = reason
+
+
+class ExecutionControl:
+    def __init__(self, execution_id=None, deadline=None):
+        """``deadline`` is a time.time() timestamp, so it holds across processes"""
+        self.execution_id = execution_id
+        self.deadline = deadline
+        self.stop_reason = None
+        self._lock = threading.Lock()
+        self._channels = set()
+        self._on_stop = []
+        self._stopped = threading.Event()
+
+    @classmethod
+    def with_timeout(cls, execution_id=None, seconds=EXECUTION_DEADLINE_SECONDS):
+        return cls(execution_id, time.time() + seconds if seconds and seconds > 0 else None)
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without one"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+    def stopped(self):
+        """The stop reason, stopping the execution first if its deadline has passed"""
+        if self.stop_reason is None and self.deadline is not None and time.time() >= self.deadline:
+            self.stop('deadline')
+        return self.stop_reason
+
+    def check(self):
+        """Raise ExecutionStopped once the execution is stopped"""
+        reason = self.stopped()
+        if reason is not None:
+            raise ExecutionStopped(reason)
+
+    def wait(self, seconds):
+        """Sleep up to ``seconds``, waking early if the execution stops"""
+        remaining = self.remaining()
+        self._stopped.wait(seconds if remaining is None else min(seconds, remaining))
+
+    def on_stop(self, callback):
+        """Call ``callback`` when the execution stops (at once if it already has)"""
+        with self._lock:
+            if self.stop_reason is None:
+                self._on_stop.append(callback)
+                return
+        callback()
+
+    def stop(self, reason='cancelled'):
+        """Stop the execution; the first reason given wins"""
+        with self._lock:
+            if self.stop_reason is not None:
+                return
+            self.stop_reason = reason
+            self._stopped.set()
+            channels = list(self._channels)
+            callbacks = self._on_stop
+            self._on_stop = []
+        logger.info(f"Stopping execution {self.execution_id}: {STOP_MESSAGES.get(reason, reason)}")
+        for channel in channels:
+            self._close(channel)
+        for callback in callbacks:
+            callback()
+
+    def _close(self, channel):
+        try:
+            channel.close()
+        except Exception as e:
+            # The session may be tearing down its transport concurrently
+            logger.debug(f"Closing channel of execution {self.execution_id} failed: {str(e)}")
+
+    @contextmanager
+    def track(self, channel):
+        """Close ``channel`` if the execution stops while the block runs"""
+        with self._lock:
+            stopped = self.stop_reason is not None
+            if not stopped:
+                self._channels.add(channel)
+        if stopped:
+            self._close(channel)
+        try:
+            yield channel
+        finally:
+            with self._lock:
+                self._channels.discard(channel)
+
+
+# execution id -> controls running in this process (a worker can run
+# several batches of one execution at once)
+_active = {}
+_active_lock = threading.Lock()
+_watcher = None
+
+
+def cancel_local(execution_id):
+    """Stop the execution's controls running in this process; return how many"""
+    with _active_lock:
+        controls = list(_active.get(execution_id, ()))
+    for control in controls:
+        control.stop('cancelled')
+    return len(controls)
+
+
+@contextmanager
+def watch(control, app):
+    """Make ``control`` reachable by cancellation for the duration of the block"""
+    global _watcher
+    with _active_lock:
+        _active.setdefault(control.execution_id, set()).add(control)
+        if _watcher is None:
+            _watcher = threading.Thread(target=_poll_cancellations, args=(app,),
+                                        name='execution-cancel-watcher', daemon=True)
+            _watcher.start()
+    try:
+        yield control
+    finally:
+        with _active_lock:
+            controls = _active.get(control.execution_id)
+            controls.discard(control)
+            if not controls:
+                del _active[control.execution_id]
+
+
+def _poll_cancellations(app):
+    from src.models.server import db, ExecutionLog
+
+    while True:
+        time.sleep(EXECUTION_CANCEL_POLL_SECONDS)
+        with _active_lock:
+            execution_ids = list(_active)
+        if not execution_ids:
+            continue
+        try:
+            with app.app_context():
+                cancelled = [
+                    execution_id for execution_id, in db.session.query(ExecutionLog.id).filter(
+                        ExecutionLog.id.in_(execution_ids), ExecutionLog.status == 'cancelling'
+                    )
+                ]
+        except Exception as e:
+            logger.error(f"Failed to poll for cancelled executions: {str(e)}")
+            continue
+        for execution_id in cancelled:
+            cancel_local(execution_id)
+
+
+def final_status(control, cancelling=False):
+    """Status an execution ends in once its hosts have returned"""
+    if cancelling or control.stop_reason == 'cancelled':
+        return 'cancelled'
+    if control.stop_reason == 'deadline':
+        return 'timed_out'
+    return 'completed'
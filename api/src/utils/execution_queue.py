@@ -0,0 +1,193 @@
+"""Redis-backed queue of command execution tasks.
+
+With ``EXECUTION_BACKEND=queue`` the execute route splits the target hosts
+into batches. Each batch becomes one task on a Redis stream, and the
+worker processes (``python -m src.worker``) consume it through a consumer
+group:
+
+- A task stays pending until a worker acknowledges it. That happens after
+  the batch's results are stored, and after the execution is finalized
+  when this was the last batch.
+- Workers heartbeat their in-flight tasks. A task whose worker stops
+  heartbeating for ``EXECUTION_VISIBILITY_TIMEOUT`` seconds is claimed by
+  another worker. After ``EXECUTION_MAX_DELIVERIES`` attempts its hosts
+  are recorded as errors instead.
+- Batches of a cancelled execution, or one past its deadline, are not
+  run: their hosts are recorded as cancelled or timed out.
+- Batch results are kept compacted (see execution_stats) in a Redis
+  hash, first write wins. Whichever worker stores the last batch merges
+  them into ExecutionLog.
+"""
+import json
+import os
+import threading
+
+from src.utils.execution_stats import compact_results, merge_compact
+from src.utils.redis_client import get_redis
+
+EXECUTION_BACKEND = os.environ.get('EXECUTION_BACKEND', 'inline')
+EXECUTION_STREAM = os.environ.get('EXECUTION_STREAM', 'executions:tasks')
+EXECUTION_GROUP = os.environ.get('EXECUTION_GROUP', 'execution-workers')
+EXECUTION_BATCH_SIZE = int(os.environ.get('EXECUTION_BATCH_SIZE', '10'))
+EXECUTION_VISIBILITY_TIMEOUT = int(os.environ.get('EXECUTION_VISIBILITY_TIMEOUT', '60'))
+EXECUTION_MAX_DELIVERIES = int(os.environ.get('EXECUTION_MAX_DELIVERIES', '3'))
+# Safety net for result hashes of executions that are never finalized
+EXECUTION_RESULT_TTL = int(os.environ.get('EXECUTION_RESULT_TTL', '86400'))
+
+
+class ExecutionTask:
+    """One batch of hosts of one execution, as read from the stream"""
+
+    def __init__(self, message_id, fields, deliveries=1):
+        self.message_id = message_id
+        self.execution_id = int(fields['execution_id'])
+        self.batch = int(fields['batch'])
+        self.total = int(fields['total'])
+        payload = json.loads(fields['payload'])
+        self.command = payload['command']
+        self.timeout = payload['timeout']
+        self.script = payload.get('script', False)
+        # time.time() timestamp by which the whole execution must finish
+        self.deadline = payload.get('deadline')
+        self.skip_open_circuits = payload.get('skip_open_circuits', False)
+        self.targets = payload['targets']
+        self.deliveries = deliveries
+
+
+class ExecutionQueue:
+    def __init__(self, redis_client=None, stream=EXECUTION_STREAM, group=EXECUTION_GROUP,
+                 visibility_timeout=EXECUTION_VISIBILITY_TIMEOUT):
+        self.redis = redis_client or get_redis()
+        self.stream = stream
+        self.group = group
+        self.visibility_timeout = visibility_timeout
+        self._group_ready = False
+
+    def _results_key(self, execution_id):
+        return f'executions:{execution_id}:results'
+
+    def ensure_group(self):
+        """Create the stream and consumer group if they do not exist yet"""
+        if self._group_ready:
+            return
+        import redis
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._group_ready = True
+
+    def enqueue(self, execution_id, targets, command, timeout, script=False, deadline=None,
+                skip_open_circuits=False, batch_size=EXECUTION_BATCH_SIZE):
+        """Queue an execution as batches of ``batch_size`` hosts; return the task count"""
+        self.ensure_group()
+        batches = [targets[i:i + batch_size] for i in range(0, len(targets), batch_size)]
+        pipe = self.redis.pipeline(transaction=True)
+        for index, batch in enumerate(batches):
+            pipe.xadd(self.stream, {
+                'execution_id': execution_id,
+                'batch': index,
+                'total': len(batches),
+                'payload': json.dumps({
+                    'command': command, 'timeout': timeout, 'script': script, 'deadline': deadline,
+                    'skip_open_circuits': skip_open_circuits, 'targets': batch
+                })
+            })
+        pipe.execute()
+        return len(batches)
+
+    def claim(self, consumer, count=1, block_ms=5000):
+        """Return up to ``count`` tasks for ``consumer``.
+
+        Tasks abandoned by a dead worker (idle past the visibility timeout)
+        are reclaimed first. Otherwise new tasks are read, blocking for up to
+        ``block_ms``.
+        """
+        self.ensure_group()
+        _, messages, _ = self.redis.xautoclaim(
+            self.stream, self.group, consumer,
+            min_idle_time=self.visibility_timeout * 1000, start_id='0-0', count=count
+        )
+        if messages:
+            return [
+                ExecutionTask(message_id, fields, self._deliveries(message_id))
+                for message_id, fields in messages if fields
+            ]
+
+        response = self.redis.xreadgroup(
+            self.group, consumer, {self.stream: '>'}, count=count, block=block_ms
+        )
+        return [
+            ExecutionTask(message_id, fields)
+            for _, messages in response or [] for message_id, fields in messages
+        ]
+
+    def _deliveries(self, message_id):
+        pending = self.redis.xpending_range(self.stream, self.group, message_id, message_id, 1)
+        return pending[0]['times_delivered'] if pending else 1
+
+    def heartbeat(self, consumer, message_ids):
+        """Reset the idle time of in-flight tasks so they are not reclaimed"""
+        if message_ids:
+            self.redis.xclaim(self.stream, self.group, consumer, 0, list(message_ids), justid=True)
+
+    def store_result(self, task, results):
+        """Store a batch's host results.
+
+        Returns the compacted results of the whole execution, in target
+        order, once all batches are in; otherwise None. A redelivered batch
+        keeps the first stored result.
+        """
+        key = self._results_key(task.execution_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hsetnx(key, task.batch, json.dumps(compact_results(results)))
+        pipe.hlen(key)
+        pipe.expire(key, EXECUTION_RESULT_TTL)
+        _, stored, _ = pipe.execute()
+        if stored < task.total:
+            return None
+
+        batches = self.redis.hgetall(key)
+        return merge_compact(json.loads(batches[batch]) for batch in sorted(batches, key=int))
+
+    def ack(self, task):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.xack(self.stream, self.group, task.message_id)
+        pipe.xdel(self.stream, task.message_id)
+        pipe.execute()
+
+    def discard_results(self, execution_id):
+        self.redis.delete(self._results_key(execution_id))
+
+    def prune_consumers(self, idle_ms=3600 * 1000):
+        """Forget consumers of exited workers that hold no pending tasks"""
+        self.ensure_group()
+        for info in self.redis.xinfo_consumers(self.stream, self.group):
+            if info['pending'] == 0 and info['idle'] > idle_ms:
+                self.redis.xgroup_delconsumer(self.stream, self.group, info['name'])
+
+    def stats(self):
+        self.ensure_group()
+        groups = {group['name']: group for group in self.redis.xinfo_groups(self.stream)}
+        group = groups.get(self.group, {})
+        return {
+            'stream_length': self.redis.xlen(self.stream),
+            'pending': group.get('pending', 0),
+            'consumers': group.get('consumers', 0),
+            'lag': group.get('lag')
+        }
+
+
+_shared_queue = None
+_shared_queue_lock = threading.Lock()
+
+
+def get_execution_queue():
+    """Return the process-wide ExecutionQueue, creating it on first use"""
+    global _shared_queue
+    if _shared_queue is None:
+        with _shared_queue_lock:
+            if _shared_queue is None:
+                _shared_queue = ExecutionQueue()
+    return _shared_queue
@@ -0,0 +1,205 @@
+"""Shape and aggregate the per-host results of an execution.
+
+Host results are stored compacted: each distinct (output, error) pair is
+kept once under its content hash in ``outputs``, and every host entry in
+``results`` refers to it by ``output_id``. On a homogeneous fleet a
+1000-host run stores a handful of outputs instead of 1000 copies.
+Executions stored before compaction (a plain list of host results) are
+compacted when read.
+"""
+import hashlib
+import json
+
+TIMING_PHASES = ['queue', 'bastion', 'resolve', 'connect', 'kex', 'auth', 'script', 'exec', 'first_byte', 'drain', 'total']
+
+# Host status for each reason a host can be stopped (see execution_control)
+STOPPED_STATUSES = {'cancelled': 'cancelled', 'deadline': 'timed_out', 'timeout': 'timed_out'}
+
+
+def host_result(target, result):
+    """Build the stored result entry of one host from an SSHManager result.
+
+    A result without output means the connection itself failed, or the
+    host never ran. When output was cut to its head and tail, ``truncated``
+    says which stream; ``bytes`` always counts everything the host sent.
+    A host stopped by a deadline or cancellation is ``timed_out`` or
+    ``cancelled``, with ``stopped`` giving the reason. A host left out
+    because its circuit is open is ``skipped``.
+    """
+    stopped = result.get('stopped')
+    if 'output' in result:
+        entry = {
+            'server_id': target['server_id'],
+            'server_name': target['server_name'],
+            'status': STOPPED_STATUSES.get(stopped, 'success'),
+            'output': result['output'],
+            'error': result['error'],
+            'exit_code': result['exit_code'],
+            'timings_ms': result['timings_ms'],
+            'bytes': result['bytes'],
+            'truncated': result.get('truncated', {'stdout': False, 'stderr': False})
+        }
+        if stopped:
+            entry['stopped'] = stopped
+        return entry
+    entry = {
+        'server_id': target['server_id'],
+        'server_name': target['server_name'],
+        'status': 'skipped' if result.get('skipped') else STOPPED_STATUSES.get(stopped, 'error'),
+        'error': result['error'],
+        'timings_ms': result['timings_ms'],
+        'bytes': result['bytes']
+    }
+    if stopped:
+        entry['stopped'] = stopped
+    if result.get('skipped'):
+        entry['skipped'] = result['skipped']
+    return entry
+
+
+def output_id(output, error):
+    """Content hash identifying an (output, error) pair"""
+    return hashlib.sha256(f'{output}\0{error}'.encode()).hexdigest()[:16]
+
+
+def compact_results(results):
+    """Replace each host's output and error with a reference into ``outputs``.
+
+    A host that returned no output at all (its connection failed, or it
+    never ran) is marked ``no_output``, so expanding the entry leaves the
+    field out again.
+    """
+    outputs = {}
+    compact = []
+    for result in results:
+        output = result.get('output', '')
+        error = result.get('error') or ''
+        key = output_id(output, error)
+        if key not in outputs:
+            outputs[key] = {'output': output, 'error': error}
+        entry = {field: value for field, value in result.items() if field not in ('output', 'error')}
+        entry['output_id'] = key
+        if 'output' not in result:
+            entry['no_output'] = True
+        compact.append(entry)
+    return {'outputs': outputs, 'results': compact}
+
+
+def merge_compact(parts):
+    """Combine compacted results of several batches, keeping their order"""
+    outputs = {}
+    results = []
+    for part in parts:
+        outputs.update(part['outputs'])
+        results.extend(part['results'])
+    return {'outputs': outputs, 'results': results}
+
+
+def expand_results(stored):
+    """Rebuild the full per-host entries from compacted results"""
+    expanded = []
+    for entry in stored['results']:
+        content = stored['outputs'][entry['output_id']]
+        result = {field: value for field, value in entry.items() if field not in ('output_id', 'no_output')}
+        if not entry.get('no_output'):
+            result['output'] = content['output']
+        result['error'] = content['error']
+        expanded.append(result)
+    return expanded
+
+
+def group_results(stored):
+    """Group hosts that returned identical output, status and exit code.
+
+    Largest groups come first, e.g. 987 hosts returned X, 13 returned Y.
+    """
+    groups = {}
+    for entry in stored['results']:
+        key = (entry['output_id'], entry.get('status'), entry.get('exit_code'))
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                'output_id': entry['output_id'],
+                'status': entry.get('status'),
+                'exit_code': entry.get('exit_code'),
+                'hosts': 0,
+                'server_ids': []
+            }
+        group['hosts'] += 1
+        group['server_ids'].append(entry.get('server_id'))
+    return sorted(groups.values(), key=lambda group: -group['hosts'])
+
+
+def load_results(stored_output):
+    """Parse ExecutionLog.output into compacted results.
+
+    Returns None when the execution stored something other than host
+    results (e.g. a playbook summary).
+    """
+    try:
+        stored = json.loads(stored_output) if stored_output else []
+    except ValueError:
+        return None
+    if isinstance(stored, list):
+        return compact_results(stored)
+    if isinstance(stored, dict) and 'outputs' in stored and 'results' in stored:
+        return stored
+    return None
+
+
+def skipped_hosts(stored):
+    """Server ids of the hosts that were skipped rather than run"""
+    return [entry['server_id'] for entry in stored['results'] if entry.get('status') == 'skipped']
+
+
+def failed_hosts(results):
+    """Number of host results that failed: a connection error or a non-zero exit code"""
+    return sum(
+        1 for entry in results
+        if entry.get('status') == 'error' or entry.get('exit_code') not in (0, None)
+    )
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list (None when it is empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize_timings(results):
+    """Build p50/p95/max per phase and byte totals from host results.
+
+    Hosts that never reached a phase (e.g. no first byte because the
+    connection failed) are left out of that phase's statistics.
+    """
+    phases = {}
+    for phase in TIMING_PHASES:
+        values = [
+            result['timings_ms'][phase]
+            for result in results
+            if phase in (result.get('timings_ms') or {})
+        ]
+        if values:
+            phases[phase] = {
+                'count': len(values),
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'max': max(values)
+            }
+
+    stdout_bytes = [(result.get('bytes') or {}).get('stdout', 0) for result in results]
+    stderr_bytes = [(result.get('bytes') or {}).get('stderr', 0) for result in results]
+
+    return {
+        'hosts': len(results),
+        'phases_ms': phases,
+        'bytes': {
+            'stdout_total': sum(stdout_bytes),
+            'stderr_total': sum(stderr_bytes),
+            'stdout_max': max(stdout_bytes, default=0),
+            'stderr_max': max(stderr_bytes, default=0)
+        }
+    }
@@ -0,0 +1,94 @@
+"""Streaming NDJSON/CSV exports.
+
+Rows are produced by a generator and written out in chunks as they come,
+so an export holds one chunk in memory whether it covers a hundred rows or
+millions. Database rows should come from a ``yield_per`` query, which uses a
+server-side cursor on PostgreSQL.
+"""
+import csv
+import io
+import json
+
+from flask import Response, stream_with_context
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+EXPORT_CHUNK_ROWS = 500
+
+EXECUTION_FIELDS = [
+    'id', 'execution_type', 'target_servers', 'command_id', 'playbook_id', 'status',
+    'error_message', 'started_at', 'completed_at', 'executed_by'
+]
+HOST_RESULT_FIELDS = [
+    'server_id', 'server_name', 'status', 'exit_code', 'output', 'error',
+    'total_ms', 'stdout_bytes', 'stderr_bytes'
+]
+
+
+def execution_row(row):
+    """Plain dict of an execution row selected by EXECUTION_FIELDS (plus output)"""
+    data = row._asdict()
+    data['target_servers'] = data['target_servers'] or []
+    for field in ('started_at', 'completed_at'):
+        data[field] = data[field].isoformat() if data[field] else None
+    return data
+
+
+def host_result_row(result):
+    """Flatten a host result into the HOST_RESULT_FIELDS columns"""
+    return {
+        'server_id': result.get('server_id'),
+        'server_name': result.get('server_name'),
+        'status': result.get('status'),
+        'exit_code': result.get('exit_code'),
+        'output': result.get('output', ''),
+        'error': result.get('error', ''),
+        'total_ms': (result.get('timings_ms') or {}).get('total'),
+        'stdout_bytes': (result.get('bytes') or {}).get('stdout'),
+        'stderr_bytes': (result.get('bytes') or {}).get('stderr')
+    }
+
+
+def _ndjson_chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(row, separators=(',', ':')))
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
+def _csv_chunks(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        # Lists (e.g. target_servers) are written space-separated
+        writer.writerow({
+            field: ' '.join(map(str, value)) if isinstance(value, list) else value
+            for field, value in row.items()
+        })
+        count += 1
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_export(rows, export_format, fields, filename):
+    """Response streaming ``rows`` (dicts) as NDJSON or CSV"""
+    if export_format == 'csv':
+        chunks = _csv_chunks(rows, fields)
+    else:
+        chunks = _ndjson_chunks(rows)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}.{export_format}"'}
+    )
@@ -0,0 +1,282 @@
+"""Reachability and SSH latency history of servers.
+
+Every probe of a server adds one row to ``server_health_samples``:
+server id, time, whether the SSH session came up and, if it did, its
+setup latency (``rtt_ms``: TCP connect, key exchange and authentication).
+Probes are pings and the connection of each host of every command
+execution.
+
+A background loop (started with the scheduler) rolls closed buckets up
+into ``server_health_rollups`` at 1m, 1h and 1d resolution. 1m buckets
+are built from the raw samples, 1h from 1m and 1d from 1h. Each bucket
+keeps counts and min/max/sum of latency, so coarser buckets merge
+exactly. Data past its retention is then pruned. The history endpoint
+reads whichever table covers the requested range at a sensible number of
+points.
+
+Rollups track a watermark (the newest rolled-up bucket), so each tick
+only reads new data. Concurrent instances may race on the same buckets:
+the loser hits the primary key and rolls back.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+
+from src.models.server import db, Server, ServerHealthSample, ServerHealthRollup
+
+logger = logging.getLogger(__name__)
+
+HEALTH_ROLLUP_ENABLED = os.environ.get('HEALTH_ROLLUP_ENABLED', os.environ.get('SCHEDULER_ENABLED', '0')) == '1'
+HEALTH_ROLLUP_SECONDS = float(os.environ.get('HEALTH_ROLLUP_SECONDS', '60'))
+
+# resolution -> (bucket size, source table resolution, retention)
+RESOLUTIONS = {
+    'raw': (None, None, timedelta(days=int(os.environ.get('HEALTH_RAW_RETENTION_DAYS', '2')))),
+    '1m': (timedelta(minutes=1), 'raw', timedelta(days=int(os.environ.get('HEALTH_1M_RETENTION_DAYS', '14')))),
+    '1h': (timedelta(hours=1), '1m', timedelta(days=int(os.environ.get('HEALTH_1H_RETENTION_DAYS', '180')))),
+    '1d': (timedelta(days=1), '1h', timedelta(days=int(os.environ.get('HEALTH_1D_RETENTION_DAYS', '1825'))))
+}
+# Longest range served at each resolution, keeping responses to ~1500 points
+MAX_SPAN = {'raw': timedelta(hours=2), '1m': timedelta(days=1), '1h': timedelta(days=60), '1d': None}
+ROLLUP_LAG = timedelta(seconds=30)
+LATENCY_PHASES = ('connect', 'kex', 'auth')
+ATTEMPT_PHASES = ('bastion', 'resolve', 'connect')
+SESSION_PHASES = ('script', 'exec')
+
+
+def _probe(server_id, ok, timings, ts):
+    """Sample row for a session outcome, or None if no connection was attempted"""
+    if ok:
+        return {'server_id': server_id, 'ts': ts, 'ok': True,
+                'rtt_ms': round(sum(timings.get(phase, 0) for phase in LATENCY_PHASES), 2)}
+    # Failures before the host was contacted (admission, open circuit) say nothing about it
+    if any(phase in timings for phase in ATTEMPT_PHASES):
+        return {'server_id': server_id, 'ts': ts, 'ok': False, 'rtt_ms': None}
+    return None
+
+
+def record_probe(server_id, ok, timings):
+    """Add a sample for one session, e.g. a ping (committed by the caller)"""
+    row = _probe(server_id, ok, timings or {}, datetime.utcnow())
+    if row is not None:
+        db.session.add(ServerHealthSample(**row))
+
+
+def record_results(results):
+    """Add a sample for each host of an execution that tried to connect (committed by the caller)
+
+    Hosts whose server was deleted during the run are left out, so the
+    samples never make the caller's commit of the results fail.
+    """
+    ts = datetime.utcnow()
+    rows = []
+    for entry in results:
+        timings = entry.get('timings_ms') or {}
+        # A host that got to run its command (even one cut short) had a working session
+        ok = 'exit_code' in entry or any(phase in timings for phase in SESSION_PHASES)
+        if ok or entry.get('status') == 'error':
+            row = _probe(entry.get('server_id'), ok, timings, ts)
+            if row is not None and row['server_id'] is not None:
+                rows.append(row)
+    if rows:
+        existing = {server_id for server_id, in db.session.query(Server.id).filter(
+            Server.id.in_({row['server_id'] for row in rows})
+        )}
+        rows = [row for row in rows if row['server_id'] in existing]
+    if rows:
+        db.session.execute(sa.insert(ServerHealthSample), rows)
+
+
+def floor_time(ts, step):
+    """Start of the bucket of size ``step`` holding ``ts``"""
+    return datetime.min + ((ts - datetime.min) // step) * step
+
+
+class _Bucket:
+    __slots__ = ('samples', 'ok', 'rtt_min', 'rtt_max', 'rtt_sum')
+
+    def __init__(self):
+        self.samples = 0
+        self.ok = 0
+        self.rtt_min = None
+        self.rtt_max = None
+        self.rtt_sum = 0.0
+
+    def add(self, samples, ok, rtt_min, rtt_max, rtt_sum):
+        self.samples += samples
+        self.ok += ok
+        if rtt_min is not None:
+            self.rtt_min = rtt_min if self.rtt_min is None else min(self.rtt_min, rtt_min)
+            self.rtt_max = rtt_max if self.rtt_max is None else max(self.rtt_max, rtt_max)
+            self.rtt_sum += rtt_sum
+
+
+def _source_rows(source, start, end):
+    """(server_id, ts, samples, ok, rtt_min, rtt_max, rtt_sum) rows of ``source`` in [start, end)"""
+    if source == 'raw':
+        query = db.session.query(
+            ServerHealthSample.server_id, ServerHealthSample.ts, sa.literal(1), ServerHealthSample.ok,
+            ServerHealthSample.rtt_ms, ServerHealthSample.rtt_ms, ServerHealthSample.rtt_ms
+        ).filter(ServerHealthSample.ts < end)
+        if start is not None:
+            query = query.filter(ServerHealthSample.ts >= start)
+    else:
+        query = db.session.query(
+            ServerHealthRollup.server_id, ServerHealthRollup.bucket, ServerHealthRollup.samples,
+            ServerHealthRollup.ok, ServerHealthRollup.rtt_min, ServerHealthRollup.rtt_max, ServerHealthRollup.rtt_sum
+        ).filter(ServerHealthRollup.resolution == source, ServerHealthRollup.bucket < end)
+        if start is not None:
+            query = query.filter(ServerHealthRollup.bucket >= start)
+    return query.yield_per(5000)
+
+
+def _watermark(resolution):
+    """Start of the newest bucket rolled up at ``resolution``"""
+    return db.session.query(sa.func.max(ServerHealthRollup.bucket)).filter(
+        ServerHealthRollup.resolution == resolution
+    ).scalar()
+
+
+def rollup(resolution, now=None):
+    """Roll closed buckets of ``resolution`` up from its source; return the buckets written"""
+    step, source, _ = RESOLUTIONS[resolution]
+    # Samples are committed a moment after they are taken
+    now = (now or datetime.utcnow()) - ROLLUP_LAG
+    watermark = _watermark(resolution)
+    start = watermark + step if watermark is not None else None
+    end = floor_time(now, step)
+    if source != 'raw':
+        # Only buckets whose source buckets have all been rolled up
+        source_mark = _watermark(source)
+        if source_mark is None:
+            return 0
+        end = min(end, floor_time(source_mark + RESOLUTIONS[source][0], step))
+    if start is not None and start >= end:
+        return 0
+
+    buckets = {}
+    for server_id, ts, samples, ok, rtt_min, rtt_max, rtt_sum in _source_rows(source, start, end):
+        bucket = buckets.get((server_id, floor_time(ts, step)))
+        if bucket is None:
+            bucket = buckets[(server_id, floor_time(ts, step))] = _Bucket()
+        bucket.add(samples, int(ok), rtt_min, rtt_max, rtt_sum or 0.0)
+
+    if not buckets:
+        return 0
+    try:
+        db.session.execute(sa.insert(ServerHealthRollup), [
+            {
+                'server_id': server_id, 'resolution': resolution, 'bucket': ts,
+                'samples': bucket.samples, 'ok': bucket.ok,
+                'rtt_min': bucket.rtt_min, 'rtt_max': bucket.rtt_max, 'rtt_sum': bucket.rtt_sum
+            }
+            for (server_id, ts), bucket in buckets.items()
+        ])
+        db.session.commit()
+    except IntegrityError:
+        # Another instance rolled these buckets up first
+        db.session.rollback()
+        return 0
+    return len(buckets)
+
+
+def prune(now=None):
+    """Delete samples and rollups past their retention"""
+    now = now or datetime.utcnow()
+    deleted = ServerHealthSample.query.filter(
+        ServerHealthSample.ts < now - RESOLUTIONS['raw'][2]
+    ).delete(synchronize_session=False)
+    for resolution in ('1m', '1h', '1d'):
+        deleted += ServerHealthRollup.query.filter(
+            ServerHealthRollup.resolution == resolution,
+            ServerHealthRollup.bucket < now - RESOLUTIONS[resolution][2]
+        ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def choose_resolution(since, until, now=None):
+    """Finest resolution that covers [since, until] within its span and retention"""
+    now = now or datetime.utcnow()
+    for resolution, span in MAX_SPAN.items():
+        if span is not None and until - since > span:
+            continue
+        if since < now - RESOLUTIONS[resolution][2]:
+            continue
+        return resolution
+    return '1d'
+
+
+def history(server_id, since, until, resolution=None):
+    """Points of a server's health between ``since`` and ``until``"""
+    resolution = resolution or choose_resolution(since, until)
+    if resolution == 'raw':
+        rows = db.session.query(ServerHealthSample.ts, ServerHealthSample.ok, ServerHealthSample.rtt_ms).filter(
+            ServerHealthSample.server_id == server_id,
+            ServerHealthSample.ts >= since, ServerHealthSample.ts <= until
+        ).order_by(ServerHealthSample.ts)
+        points = [
+            {'ts': ts.isoformat(), 'samples': 1, 'ok': int(ok), 'uptime': 1.0 if ok else 0.0,
+             'rtt_min': rtt_ms, 'rtt_avg': rtt_ms, 'rtt_max': rtt_ms}
+            for ts, ok, rtt_ms in rows
+        ]
+    else:
+        rows = db.session.query(
+            ServerHealthRollup.bucket, ServerHealthRollup.samples, ServerHealthRollup.ok,
+            ServerHealthRollup.rtt_min, ServerHealthRollup.rtt_max, ServerHealthRollup.rtt_sum
+        ).filter(
+            ServerHealthRollup.server_id == server_id, ServerHealthRollup.resolution == resolution,
+            ServerHealthRollup.bucket >= floor_time(since, RESOLUTIONS[resolution][0]),
+            ServerHealthRollup.bucket <= until
+        ).order_by(ServerHealthRollup.bucket)
+        points = [
+            {'ts': bucket.isoformat(), 'samples': samples, 'ok': ok, 'uptime': round(ok / samples, 4),
+             'rtt_min': rtt_min, 'rtt_avg': round(rtt_sum / ok, 2) if ok else None, 'rtt_max': rtt_max}
+            for bucket, samples, ok, rtt_min, rtt_max, rtt_sum in rows
+        ]
+    return {'resolution': resolution, 'points': points}
+
+
+class HealthRollups:
+    def __init__(self, app, interval=HEALTH_ROLLUP_SECONDS):
+        self.app = app
+        self.interval = interval
+        self.stopping = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._loop, name='health-rollups', daemon=True).start()
+        logger.info(f"Health rollups every {self.interval}s")
+
+    def stop(self):
+        self.stopping.set()
+
+    def _loop(self):
+        while not self.stopping.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    self.tick()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Health rollup failed: {str(e)}")
+
+    def tick(self, now=None):
+        now = now or datetime.utcnow()
+        written = {resolution: rollup(resolution, now) for resolution in ('1m', '1h', '1d')}
+        pruned = prune(now)
+        return written, pruned
+
+
+_rollups = None
+
+
+def start_health_rollups(app):
+    """Start this process's rollup thread once (no-op unless HEALTH_ROLLUP_ENABLED)"""
+    global _rollups
+    if HEALTH_ROLLUP_ENABLED and _rollups is None:
+        _rollups = HealthRollups(app)
+        _rollups.start()
+    return _rollups
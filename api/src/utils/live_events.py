@@ -0,0 +1,223 @@
+"""Live server and execution events for browser clients.
+
+State changes (a server's status, an execution starting, changing status
+or finishing) are published to one Redis pub/sub channel, so an event
+raised by any API worker, execution worker or scheduler reaches clients
+connected to any API worker. Each API process holds a single
+subscription and fans events out to its WebSocket clients
+(``/api/events``), each filtered to the topics the client asked for.
+
+Publishing never blocks or fails the caller: events are handed to a
+publisher thread and dropped, with a warning, if Redis is unreachable.
+A client that may have missed events (its connection or this process's
+subscription was interrupted, or it fell too far behind) is sent a
+``resync`` event and re-reads the lists over REST.
+
+``LIVE_EVENTS_BACKEND``: ``redis`` (the default when ``REDIS_URL`` is
+set), ``local`` to deliver only within the process (single-process
+embedded mode; the default otherwise), or ``off``.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from src.models.server import db, ExecutionLog
+from src.utils.redis_client import get_redis
+from src.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+LIVE_EVENTS_BACKEND = os.environ.get('LIVE_EVENTS_BACKEND', 'redis' if os.environ.get('REDIS_URL') else 'local')
+LIVE_EVENTS_CHANNEL = os.environ.get('LIVE_EVENTS_CHANNEL', 'events:live')
+LIVE_EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('LIVE_EVENTS_HEARTBEAT_SECONDS', '25'))
+LIVE_EVENTS_CLIENT_BUFFER = int(os.environ.get('LIVE_EVENTS_CLIENT_BUFFER', '256'))
+# Under gthread every connected client holds one of the worker's threads
+LIVE_EVENTS_MAX_CLIENTS = int(os.environ.get(
+    'LIVE_EVENTS_MAX_CLIENTS',
+    '1000' if os.environ.get('API_WORKER_CLASS') == 'gevent' else max(1, int(os.environ.get('API_THREADS', '16')) // 2)
+))
+PUBLISH_BUFFER = 10000
+RECONNECT_SECONDS = (1, 2, 5, 10, 30)
+
+TOPICS = ('servers', 'executions')
+RESYNC = dumps({'type': 'resync'}).decode()
+HEARTBEAT = dumps({'type': 'heartbeat'}).decode()
+
+# Columns of an execution event; the same as a row of GET /executions
+EXECUTION_COLUMNS = (
+    ExecutionLog.id, ExecutionLog.execution_type, ExecutionLog.target_servers, ExecutionLog.command_id,
+    ExecutionLog.playbook_id, ExecutionLog.status, ExecutionLog.error_message, ExecutionLog.started_at,
+    ExecutionLog.completed_at, ExecutionLog.executed_by
+)
+
+
+class LiveClient:
+    """Events waiting to be sent to one WebSocket client"""
+
+    def __init__(self, topics):
+        self.topics = frozenset(topics)
+        self._queue = queue.Queue(maxsize=LIVE_EVENTS_CLIENT_BUFFER)
+        self._lock = threading.Lock()
+
+    def put(self, message):
+        with self._lock:
+            try:
+                self._queue.put_nowait(message)
+            except queue.Full:
+                # Too slow to keep up: drop the backlog and have it re-read the lists
+                while not self._queue.empty():
+                    self._queue.get_nowait()
+                self._queue.put_nowait(RESYNC)
+
+    def get(self, timeout):
+        """Next event to send, or None after ``timeout`` seconds without one"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventHub:
+    def __init__(self, backend=LIVE_EVENTS_BACKEND, channel=LIVE_EVENTS_CHANNEL, max_clients=LIVE_EVENTS_MAX_CLIENTS):
+        self.backend = backend
+        self.channel = channel
+        self.max_clients = max_clients
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._outbox = queue.Queue(maxsize=PUBLISH_BUFFER)
+        self._publisher = None
+        self._subscriber = None
+
+    def publish(self, topic, event_type, data):
+        """Send an event to every subscriber of ``topic``, in any process"""
+        if self.backend == 'off':
+            return
+        message = dumps({'topic': topic, 'type': event_type, 'data': data}).decode()
+        if self.backend == 'local':
+            self._dispatch(topic, message)
+            return
+        self._start('_publisher', self._publish_loop, 'live-events-publisher')
+        try:
+            self._outbox.put_nowait(message)
+        except queue.Full:
+            logger.warning(f"Live event dropped, publish buffer full: {event_type}")
+
+    def connect(self, topics):
+        """Register a client for ``topics``; None if this process has no room for it"""
+        if self.backend == 'off':
+            return None
+        with self._lock:
+            if len(self._clients) >= self.max_clients:
+                return None
+            client = LiveClient(topics)
+            self._clients.add(client)
+        if self.backend == 'redis':
+            self._start('_subscriber', self._subscribe_loop, 'live-events-subscriber')
+        return client
+
+    def disconnect(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def _start(self, attribute, loop, name):
+        if getattr(self, attribute) is None:
+            with self._lock:
+                if getattr(self, attribute) is None:
+                    thread = threading.Thread(target=loop, name=name, daemon=True)
+                    setattr(self, attribute, thread)
+                    thread.start()
+
+    def _dispatch(self, topic, message):
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            if topic is None or topic in client.topics:
+                client.put(message)
+
+    def _publish_loop(self):
+        failing = False
+        while True:
+            batch = [self._outbox.get()]
+            while True:
+                try:
+                    batch.append(self._outbox.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                pipeline = get_redis().pipeline(transaction=False)
+                for message in batch:
+                    pipeline.publish(self.channel, message)
+                pipeline.execute()
+                if failing:
+                    logger.info("Publishing live events again")
+                    failing = False
+            except Exception as e:
+                if not failing:
+                    logger.warning(f"Could not publish live events, dropping them until Redis is back: {str(e)}")
+                    failing = True
+                time.sleep(RECONNECT_SECONDS[0])
+
+    def _subscribe_loop(self):
+        attempt = 0
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                if attempt:
+                    logger.info("Live events subscription restored")
+                    # Events published while we were away are gone
+                    self._dispatch(None, RESYNC)
+                attempt = 0
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self._dispatch(json.loads(message['data']).get('topic'), message['data'])
+            except Exception as e:
+                logger.warning(f"Live events subscription lost: {str(e)}")
+                if pubsub is not None:
+                    pubsub.reset()
+            delay = RECONNECT_SECONDS[min(attempt, len(RECONNECT_SECONDS) - 1)]
+            attempt += 1
+            time.sleep(delay)
+
+
+_shared_hub = None
+_shared_hub_lock = threading.Lock()
+
+
+def get_event_hub():
+    """Return the process-wide EventHub"""
+    global _shared_hub
+    if _shared_hub is None:
+        with _shared_hub_lock:
+            if _shared_hub is None:
+                _shared_hub = EventHub()
+    return _shared_hub
+
+
+def publish_server(data):
+    """Publish a server's new state: its full dict, or just the changed fields with its id"""
+    get_event_hub().publish('servers', 'server.updated', data)
+
+
+def publish_server_deleted(server_id):
+    get_event_hub().publish('servers', 'server.deleted', {'id': server_id})
+
+
+def publish_execution(execution_id):
+    """Publish an execution's list row; call after committing the change"""
+    if get_event_hub().backend == 'off':
+        return
+    try:
+        row = db.session.query(*EXECUTION_COLUMNS).filter(ExecutionLog.id == execution_id).first()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Could not publish execution {execution_id}: {str(e)}")
+        return
+    if row is not None:
+        data = dict(zip([column.key for column in EXECUTION_COLUMNS], row))
+        data['target_servers'] = data['target_servers'] or []
+        get_event_hub().publish('executions', 'execution.updated', data)
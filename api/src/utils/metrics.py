@@ -0,0 +1,142 @@
+"""Prometheus metrics for the Server Management API.
+
+All collectors are module-level and cheap to update (a lock and a float add),
+so recording on hot paths (every request, every SQL statement, every SSH
+phase) costs microseconds. When PROMETHEUS_MULTIPROC_DIR is set, as it is
+under gunicorn, values are written to per-process mmap files and /metrics
+aggregates every worker.
+"""
+import os
+import re
+import time
+
+from flask import g, has_request_context, request
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import REGISTRY as DEFAULT_REGISTRY
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+# Buckets span sub-millisecond DB calls up to multi-minute commands
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'api_http_request_duration_seconds', 'HTTP request latency by route',
+    ['method', 'route', 'status'], buckets=LATENCY_BUCKETS
+)
+SSH_PHASE_SECONDS = Histogram(
+    'api_ssh_phase_duration_seconds', 'SSH phase (resolve/connect/kex/auth/exec) duration by outcome',
+    ['phase', 'outcome'], buckets=LATENCY_BUCKETS
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    'api_db_queries_per_request', 'SQL statements executed per HTTP request',
+    buckets=QUERY_COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST_SECONDS = Histogram(
+    'api_db_time_per_request_seconds', 'Time spent in SQL statements per HTTP request',
+    buckets=LATENCY_BUCKETS
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    'api_db_pool_connections_checked_out', 'Database connections currently checked out of the pool',
+    multiprocess_mode='livesum'
+)
+DB_POOL_CHECKOUTS = Counter(
+    'api_db_pool_checkouts', 'Database connection checkouts from the pool'
+)
+AWX_REQUEST_SECONDS = Histogram(
+    'api_awx_request_duration_seconds', 'AWX API request latency',
+    ['method', 'endpoint', 'outcome'], buckets=LATENCY_BUCKETS
+)
+EXECUTIONS_IN_FLIGHT = Gauge(
+    'api_executions_in_flight', 'Command executions currently running',
+    multiprocess_mode='livesum'
+)
+SSH_SESSIONS_IN_FLIGHT = Gauge(
+    'api_ssh_sessions_in_flight', 'SSH sessions currently admitted',
+    multiprocess_mode='livesum'
+)
+SSH_QUEUE_DEPTH = Gauge(
+    'api_ssh_queue_depth', 'SSH sessions waiting for admission',
+    multiprocess_mode='livesum'
+)
+SSH_ADMISSION_WAIT_SECONDS = Histogram(
+    'api_ssh_admission_wait_seconds', 'Time SSH sessions spent queued for admission',
+    ['outcome'], buckets=LATENCY_BUCKETS
+)
+LIVE_EVENT_CLIENTS = Gauge(
+    'api_live_event_clients', 'WebSocket clients connected for live events',
+    multiprocess_mode='livesum'
+)
+
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def awx_endpoint_label(endpoint):
+    """Collapse numeric path segments so per-object URLs share one series"""
+    return _ID_SEGMENT.sub('/:id', '/' + endpoint.strip('/') + '/')
+
+
+def observe_ssh_phase_seconds(phase, outcome, seconds):
+    SSH_PHASE_SECONDS.labels(phase, outcome).observe(seconds)
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.db_query_count = 0
+    g.db_query_seconds = 0.0
+
+
+def _after_request(response):
+    start = g.pop('metrics_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_SECONDS.labels(request.method, route, response.status_code).observe(
+            time.perf_counter() - start
+        )
+        DB_QUERIES_PER_REQUEST.observe(g.get('db_query_count', 0))
+        DB_TIME_PER_REQUEST_SECONDS.observe(g.get('db_query_seconds', 0.0))
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_metrics_start', None)
+    if start is not None and has_request_context():
+        g.db_query_count = g.get('db_query_count', 0) + 1
+        g.db_query_seconds = g.get('db_query_seconds', 0.0) + time.perf_counter() - start
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKED_OUT.inc()
+    DB_POOL_CHECKOUTS.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.dec()
+
+
+def init_metrics(app):
+    """Register request hooks and SQLAlchemy listeners for metrics collection"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Pool, 'checkout', _on_checkout)
+        event.listen(Pool, 'checkin', _on_checkin)
+
+
+def get_registry():
+    """Registry to expose: aggregated across gunicorn workers when multiprocess"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return DEFAULT_REGISTRY
@@ -0,0 +1,100 @@
+"""Bounded capture of command output streams.
+
+A stream keeps its first ``OUTPUT_HEAD_BYTES`` and its last
+``OUTPUT_TAIL_BYTES``; anything in between is counted but dropped, so a
+host printing gigabytes costs the same memory as one printing a page.
+With ``OUTPUT_SPILL_DIR`` set, every byte is also appended to a file there
+while the command runs, so a long-running host's full output can be
+followed on disk. Use the capture as a context manager: the file is
+deleted when it exits.
+
+The head is decoded as chunks arrive with an incremental UTF-8 decoder, so
+a character split across two reads is decoded whole. The tail is decoded
+once at the end, starting at the first complete character.
+"""
+import codecs
+import os
+import uuid
+from datetime import datetime
+
+OUTPUT_HEAD_BYTES = int(os.environ.get('OUTPUT_HEAD_BYTES', str(64 * 1024)))
+OUTPUT_TAIL_BYTES = int(os.environ.get('OUTPUT_TAIL_BYTES', str(64 * 1024)))
+OUTPUT_SPILL_DIR = os.environ.get('OUTPUT_SPILL_DIR')
+
+
+def _is_continuation(byte):
+    return byte & 0xC0 == 0x80
+
+
+class StreamCapture:
+    def __init__(self, name, head_bytes=OUTPUT_HEAD_BYTES, tail_bytes=OUTPUT_TAIL_BYTES, spill_dir=None):
+        self.name = name
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.total = 0
+        self._head_len = 0
+        self._head_text = []
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._tail = bytearray()
+        self.spill_path = None
+        self._spill = None
+        spill_dir = spill_dir or OUTPUT_SPILL_DIR
+        if spill_dir:
+            directory = os.path.join(spill_dir, datetime.utcnow().strftime('%Y-%m-%d'))
+            os.makedirs(directory, exist_ok=True)
+            self.spill_path = os.path.join(directory, f'{uuid.uuid4().hex}.{name}')
+            self._spill = open(self.spill_path, 'wb')
+
+    def write(self, chunk):
+        self.total += len(chunk)
+        if self._spill is not None:
+            self._spill.write(chunk)
+
+        room = self.head_bytes - self._head_len
+        if room > 0:
+            self._head_text.append(self._decoder.decode(chunk[:room]))
+            self._head_len += min(room, len(chunk))
+            chunk = chunk[room:]
+        if chunk:
+            self._tail += chunk
+            # Trim in bulk rather than on every chunk
+            if len(self._tail) > 2 * self.tail_bytes:
+                del self._tail[:len(self._tail) - self.tail_bytes]
+
+    @property
+    def truncated(self):
+        return self.total > self.head_bytes + self.tail_bytes
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        if self.spill_path is not None:
+            try:
+                os.remove(self.spill_path)
+                # The day's directory, once its last file is gone
+                os.rmdir(os.path.dirname(self.spill_path))
+            except OSError:
+                pass
+            self.spill_path = None
+
+    def text(self):
+        """Captured output, with a marker where bytes were dropped"""
+        if not self.truncated:
+            # Head and tail are contiguous: keep decoding across the boundary
+            return ''.join(self._head_text) + self._decoder.decode(bytes(self._tail), final=True)
+
+        tail = self._tail[-self.tail_bytes:] if self.tail_bytes else b''
+        start = 0
+        while start < len(tail) and start < 4 and _is_continuation(tail[start]):
+            start += 1
+        dropped = self.total - self.head_bytes - len(tail)
+        # A character cut at the end of the head is dropped with the gap
+        return (''.join(self._head_text) + f'\n[... {dropped} bytes truncated ...]\n'
+                + bytes(tail[start:]).decode('utf-8', errors='replace'))
@@ -0,0 +1,133 @@
+"""Indexed search over stored execution output.
+
+Each distinct output of a command execution (stdout and stderr, see
+execution_stats) is written to ``execution_outputs`` together with the
+hosts that returned it. On PostgreSQL two GIN indexes serve the queries:
+
+- ``substring`` mode (the default) matches the query as a literal,
+  case-insensitive substring, using the trigram index.
+- ``text`` mode matches words with ``websearch_to_tsquery`` (quoted
+  phrases, ``-exclusions``, ``or``) against the generated tsvector.
+
+Other databases fall back to unindexed LIKE scans, with ``text`` mode
+requiring every word to appear.
+
+Snippets are HTML: the output text is escaped and only the highlights
+are ``<mark>`` tags.
+"""
+import html
+import re
+import time
+
+import sqlalchemy as sa
+
+from src.models.server import db, ExecutionLog, ExecutionOutput
+
+SEARCH_MODES = ('substring', 'text')
+SNIPPET_CONTEXT = 60
+HIGHLIGHT_START, HIGHLIGHT_STOP = '<mark>', '</mark>'
+# ts_headline marks matches with these (private-use characters) and the
+# headline is escaped before they are turned into tags
+HEADLINE_START, HEADLINE_STOP = '\ue000', '\ue001'
+HEADLINE_OPTIONS = (f'StartSel="{HEADLINE_START}", StopSel="{HEADLINE_STOP}", '
+                    'MaxFragments=2, MaxWords=20, MinWords=5, FragmentDelimiter=" ... "')
+
+
+def index_rows(execution_id, stored):
+    """execution_outputs rows for an execution's compacted results"""
+    server_ids = {}
+    for entry in stored['results']:
+        server_ids.setdefault(entry['output_id'], []).append(entry.get('server_id'))
+    rows = []
+    for output_id, hosts in server_ids.items():
+        content = stored['outputs'][output_id]
+        rows.append({
+            'execution_id': execution_id,
+            'output_id': output_id,
+            'server_ids': hosts,
+            'content': '\n'.join(part for part in (content['output'], content['error']) if part)
+        })
+    return rows
+
+
+def index_outputs(execution_id, stored):
+    """Add an execution's outputs to the search index (committed by the caller)"""
+    rows = index_rows(execution_id, stored)
+    if rows:
+        db.session.execute(sa.insert(ExecutionOutput), rows)
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def snippet(content, terms, context=SNIPPET_CONTEXT):
+    """Escaped excerpt around the first matching term, with every term highlighted"""
+    pattern = re.compile('|'.join(re.escape(term) for term in terms if term), re.IGNORECASE)
+    match = pattern.search(content)
+    if match is None:
+        return html.escape(content[:2 * context])
+    start = max(0, match.start() - context)
+    end = min(len(content), match.end() + context)
+    parts, position = [], start
+    for found in pattern.finditer(content, start, end):
+        parts.append(html.escape(content[position:found.start()]))
+        parts.append(f'{HIGHLIGHT_START}{html.escape(found.group(0))}{HIGHLIGHT_STOP}')
+        position = found.end()
+    parts.append(html.escape(content[position:end]))
+    return f"{'...' if start else ''}{''.join(parts)}{'...' if end < len(content) else ''}"
+
+
+def headline_snippet(headline):
+    """Escape a ts_headline excerpt, keeping its highlights"""
+    escaped = html.escape(headline)
+    return escaped.replace(HEADLINE_START, HIGHLIGHT_START).replace(HEADLINE_STOP, HIGHLIGHT_STOP)
+
+
+def search_outputs(query, mode='substring', since=None, until=None, limit=50):
+    """Executions and hosts whose output matches ``query``, newest first"""
+    started = time.perf_counter()
+    postgres = db.engine.dialect.name == 'postgresql'
+    terms = [query] if mode == 'substring' else query.split()
+
+    columns = [
+        ExecutionOutput.execution_id, ExecutionOutput.output_id, ExecutionOutput.server_ids,
+        ExecutionLog.started_at, ExecutionLog.status, ExecutionLog.command_id
+    ]
+    if mode == 'text' and postgres:
+        tsquery = sa.func.websearch_to_tsquery('simple', query)
+        condition = sa.literal_column('execution_outputs.search').op('@@')(tsquery)
+        columns.append(sa.func.ts_headline('simple', ExecutionOutput.content, tsquery, HEADLINE_OPTIONS))
+    else:
+        condition = sa.and_(*(
+            ExecutionOutput.content.ilike(f'%{_escape_like(term)}%', escape='\\') for term in terms
+        ))
+        columns.append(ExecutionOutput.content)
+
+    rows = db.session.query(*columns).join(
+        ExecutionLog, ExecutionLog.id == ExecutionOutput.execution_id
+    ).filter(condition)
+    if since:
+        rows = rows.filter(ExecutionLog.started_at >= since)
+    if until:
+        rows = rows.filter(ExecutionLog.started_at < until)
+    rows = rows.order_by(ExecutionLog.started_at.desc(), ExecutionOutput.id).limit(limit).all()
+
+    matches = []
+    for execution_id, output_id, server_ids, started_at, status, command_id, text in rows:
+        matches.append({
+            'execution_id': execution_id,
+            'started_at': started_at.isoformat() if started_at else None,
+            'status': status,
+            'command_id': command_id,
+            'output_id': output_id,
+            'hosts': len(server_ids),
+            'server_ids': server_ids,
+            'snippet': headline_snippet(text) if mode == 'text' and postgres else snippet(text, terms)
+        })
+    return {
+        'query': query,
+        'mode': mode,
+        'matches': matches,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
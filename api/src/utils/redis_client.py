@@ -0,0 +1,29 @@
+import os
+import threading
+
+# redis is imported on first use: only processes that queue or run
+# executions need it.
+
+REDIS_URL = os.environ.get(
+    'REDIS_URL',
+    f"redis://{os.environ.get('REDIS_HOST', 'localhost')}:{os.environ.get('REDIS_PORT', '6379')}/"
+    f"{os.environ.get('REDIS_DB', '1')}"
+)
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+def get_redis():
+    """Return the process-wide Redis client, creating it on first use.
+
+    The client holds a thread-safe connection pool. Responses are decoded
+    to str. Database 1 is used by default because AWX uses database 0 of
+    the same server.
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                import redis
+                _shared_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    return _shared_client
@@ -0,0 +1,269 @@
+"""In-process scheduler for recurring command and playbook runs.
+
+Every API process (and worker) with ``SCHEDULER_ENABLED=1`` polls the
+schedules table. A due schedule is claimed by a compare-and-set update of
+``next_run_at``, so with any number of instances each run fires exactly
+once. Missed runs (e.g. while every instance was down) are not replayed:
+the next run is computed from the current time.
+
+A fired command run is spread over the schedule's jitter window, with each
+host at a stable offset derived from its id. At most ``max_concurrency``
+hosts run at once. Sessions still go through SSH admission control, and
+runs have the same deadline and cancellation as other executions. A run
+is skipped when the schedule's previous execution has not finished.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from src.models.server import db, Schedule, Server, ServerGroupMember, CustomCommand, CustomPlaybook, ExecutionLog
+from src.models.types import pg_array
+from src.utils.bastion import bastion_params
+from src.utils.execution_control import ExecutionControl, final_status, watch
+from src.utils.execution_stats import compact_results, failed_hosts, host_result
+from src.utils.output_search import index_outputs
+from src.utils.health_history import record_results
+from src.utils.live_events import publish_execution
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', '0') == '1'
+SCHEDULER_POLL_SECONDS = float(os.environ.get('SCHEDULER_POLL_SECONDS', '15'))
+
+ACTIVE_STATUSES = ('queued', 'running', 'cancelling')
+
+
+def next_run_after(cron_expression, base):
+    """Next firing time (naive UTC) of a cron expression after ``base``"""
+    from croniter import croniter
+    return croniter(cron_expression, base).get_next(datetime)
+
+
+def validate_cron(cron_expression):
+    from croniter import croniter
+    return isinstance(cron_expression, str) and croniter.is_valid(cron_expression)
+
+
+def resolve_targets(selector):
+    """Servers matched by a target selector, ordered by id.
+
+    A server is targeted if it is listed in ``server_ids``, carries any of
+    ``tags`` or belongs to any of ``group_ids``.
+    """
+    server_ids = set(selector.get('server_ids') or [])
+    tags = set(selector.get('tags') or [])
+    group_ids = selector.get('group_ids') or []
+
+    if group_ids:
+        server_ids.update(
+            member.server_id
+            for member in ServerGroupMember.query.filter(ServerGroupMember.group_id.in_(group_ids))
+        )
+
+    query = Server.query.order_by(Server.id)
+    if not tags:
+        if not server_ids:
+            return []
+        return query.filter(Server.id.in_(server_ids)).all()
+    if db.engine.dialect.name == 'postgresql':
+        # Served by the GIN index on servers.tags
+        return query.filter(sa.or_(
+            Server.id.in_(server_ids), pg_array(Server.tags, sa.String).overlap(sorted(tags))
+        )).all()
+    return [server for server in query.all() if server.id in server_ids or tags & set(server.tags or [])]
+
+
+def jitter_offset(schedule_id, server_id, jitter_seconds):
+    """Stable per-host start offset within the jitter window"""
+    if not jitter_seconds:
+        return 0.0
+    digest = zlib.crc32(f'{schedule_id}:{server_id}'.encode())
+    return (digest % (jitter_seconds * 1000)) / 1000.0
+
+
+class Scheduler:
+    def __init__(self, app, poll_seconds=SCHEDULER_POLL_SECONDS):
+        self.app = app
+        self.poll_seconds = poll_seconds
+        self.stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='scheduler', daemon=True)
+        self._thread.start()
+        logger.info(f"Scheduler polling every {self.poll_seconds}s")
+
+    def stop(self):
+        self.stopping.set()
+
+    def _loop(self):
+        while not self.stopping.wait(self.poll_seconds):
+            try:
+                with self.app.app_context():
+                    self.tick()
+            except Exception as e:
+                logger.error(f"Scheduler tick failed: {str(e)}")
+
+    def tick(self, now=None):
+        """Claim and fire every due schedule; return the ids fired"""
+        now = now or datetime.utcnow()
+        due = Schedule.query.filter(
+            Schedule.enabled.is_(True), Schedule.next_run_at <= now
+        ).with_entities(Schedule.id, Schedule.next_run_at, Schedule.cron_expression).all()
+
+        fired = []
+        for schedule_id, due_at, cron_expression in due:
+            claimed = Schedule.query.filter(
+                Schedule.id == schedule_id, Schedule.next_run_at == due_at
+            ).update({'next_run_at': next_run_after(cron_expression, now)}, synchronize_session=False)
+            db.session.commit()
+            if not claimed:
+                # Another instance fired this run
+                continue
+            try:
+                execution_id = self.fire(schedule_id, now)
+            except Exception as e:
+                # This run is lost (next_run_at has moved on); the others still fire
+                logger.error(f"Schedule {schedule_id} failed to fire: {str(e)}")
+                db.session.rollback()
+                continue
+            if execution_id is not None:
+                fired.append(schedule_id)
+        return fired
+
+    def fire(self, schedule_id, now=None):
+        """Start a run of a schedule in the background; return its execution id"""
+        schedule = Schedule.query.get(schedule_id)
+        if schedule.last_execution_id:
+            previous = ExecutionLog.query.get(schedule.last_execution_id)
+            if previous is not None and previous.status in ACTIVE_STATUSES:
+                logger.warning(f"Skipping run of schedule '{schedule.name}': "
+                               f"execution {previous.id} is still {previous.status}")
+                return None
+
+        servers = resolve_targets(schedule.target_selector or {})
+        bastions = bastion_params(servers)
+        execution_log = ExecutionLog(
+            execution_type='command' if schedule.command_id else 'playbook',
+            target_servers=[server.id for server in servers],
+            command_id=schedule.command_id,
+            playbook_id=schedule.playbook_id,
+            status='running',
+            executed_by=f'schedule:{schedule.name}'
+        )
+        db.session.add(execution_log)
+        db.session.flush()
+        schedule.last_run_at = now or datetime.utcnow()
+        schedule.last_execution_id = execution_log.id
+
+        # Snapshot everything the run needs; it runs outside this session
+        run = {
+            'execution_id': execution_log.id,
+            'schedule_id': schedule.id,
+            'jitter_seconds': schedule.jitter_seconds or 0,
+            'max_concurrency': max(1, schedule.max_concurrency or 1),
+            'targets': [
+                {
+                    'server_id': server.id,
+                    'server_name': server.name,
+                    'hostname': server.hostname,
+                    'port': server.port,
+                    'username': server.username,
+                    'key_path': server.ssh_key_path,
+                    'bastion': bastions[server.id]
+                }
+                for server in servers
+            ]
+        }
+        if schedule.command_id:
+            command = CustomCommand.query.get(schedule.command_id)
+            run.update(command=command.command, timeout=command.timeout, script=command.run_as_script)
+            target = self._run_command
+        else:
+            run.update(playbook_id=schedule.playbook_id)
+            target = self._run_playbook
+        db.session.commit()
+        publish_execution(run['execution_id'])
+
+        logger.info(f"Schedule '{schedule.name}' started execution {run['execution_id']} "
+                    f"on {len(run['targets'])} hosts")
+        threading.Thread(target=self._finish, args=(target, run), name=f'schedule-{schedule_id}', daemon=True).start()
+        return run['execution_id']
+
+    def _finish(self, target, run):
+        with self.app.app_context():
+            control = ExecutionControl.with_timeout(run['execution_id'])
+            try:
+                with watch(control, self.app):
+                    output, error = target(run, control), None
+                status = final_status(control)
+            except Exception as e:
+                logger.error(f"Scheduled execution {run['execution_id']} failed: {str(e)}")
+                output, status, error = None, 'failed', str(e)
+            command_output = target == self._run_command and output is not None
+            ExecutionLog.query.filter(ExecutionLog.id == run['execution_id']).update({
+                # A cancel that arrived after the last host returned still counts
+                'status': sa.case((ExecutionLog.status == 'cancelling', 'cancelled'), else_=status),
+                'output': json.dumps(output) if output is not None else None,
+                'error_message': error,
+                'completed_at': datetime.utcnow(),
+                'failed_hosts': failed_hosts(output['results']) if command_output else None
+            }, synchronize_session=False)
+            if command_output:
+                index_outputs(run['execution_id'], output)
+                record_results(output['results'])
+            db.session.commit()
+            publish_execution(run['execution_id'])
+
+    def _run_command(self, run, control):
+        from src.utils.ssh_manager import get_ssh_manager
+
+        manager = get_ssh_manager()
+        control.on_stop(lambda: manager.admission.drop_group(control))
+        started = time.monotonic()
+
+        def run_host(target):
+            delay = started + jitter_offset(run['schedule_id'], target['server_id'], run['jitter_seconds']) - time.monotonic()
+            if delay > 0:
+                control.wait(delay)
+            result = manager.execute_command(
+                hostname=target['hostname'], port=target['port'], username=target['username'],
+                key_path=target['key_path'], bastion=target['bastion'], command=run['command'], timeout=run['timeout'],
+                script=run['script'], admission_group=control, control=control
+            )
+            return host_result(target, result)
+
+        # Hosts are submitted in start-offset order so the budget is spent on
+        # whichever hosts are due first
+        targets = sorted(
+            run['targets'],
+            key=lambda target: jitter_offset(run['schedule_id'], target['server_id'], run['jitter_seconds'])
+        )
+        with ThreadPoolExecutor(max_workers=run['max_concurrency'], thread_name_prefix='schedule-run') as pool:
+            results = {target['server_id']: result for target, result in zip(targets, pool.map(run_host, targets))}
+        return compact_results([results[target['server_id']] for target in run['targets']])
+
+    def _run_playbook(self, run, control):
+        from src.routes.playbooks import run_playbook
+
+        playbook = CustomPlaybook.query.get(run['playbook_id'])
+        return run_playbook(playbook, [target['server_id'] for target in run['targets']], {})
+
+
+_scheduler = None
+
+
+def start_scheduler(app):
+    """Start this process's scheduler thread once (no-op unless SCHEDULER_ENABLED)"""
+    global _scheduler
+    if SCHEDULER_ENABLED and _scheduler is None:
+        _scheduler = Scheduler(app)
+        _scheduler.start()
+    return _scheduler
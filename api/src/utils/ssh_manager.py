@@ -1,20 +1,82 @@
 import os
-import paramiko
-import subprocess
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.backends import default_backend
+import select
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager, nullcontext
 import logging
+from src.utils.admission import get_admission_controller
+from src.utils.bastion import BastionPool, TunnelFailed
+from src.utils.circuit_breaker import CircuitOpen, get_circuit_breaker
+from src.utils.execution_control import ExecutionStopped
+from src.utils.metrics import EXECUTIONS_IN_FLIGHT, observe_ssh_phase_seconds
+from src.utils.output_capture import StreamCapture
+
+# paramiko and cryptography are imported inside the methods that need them:
+# they dominate import time and most processes (workers serving CRUD and
+# dashboard reads, migrations, tests) never open an SSH connection.
 
 logger = logging.getLogger(__name__)
 
+SSH_KEYS_DIR = os.environ.get('SSH_KEYS_DIR', '/app/data/ssh_keys')
+SSH_MAX_PARALLEL = int(os.environ.get('SSH_MAX_PARALLEL', '20'))
+READ_CHUNK_SIZE = 32768
+# Local read size for uploads; paramiko splits writes into SFTP-sized requests
+SFTP_CHUNK_SIZE = 1024 * 1024
+# Remote directory (relative to the login directory) holding cached command scripts
+SCRIPT_CACHE_DIR = os.environ.get('SCRIPT_CACHE_DIR', '.cache/server-automation/scripts')
+# Keys of the per-host dicts passed to execute_on_hosts and distribute_file
+CONNECTION_KEYS = ('hostname', 'port', 'username', 'key_path', 'bastion')
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+@contextmanager
+def timed_phase(phase, timings):
+    """Record a connection phase in ``timings`` (ms) and the SSH phase metric"""
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'success'
+    finally:
+        elapsed = time.perf_counter() - start
+        timings[phase] = _ms(elapsed)
+        observe_ssh_phase_seconds(phase, outcome, elapsed)
+
+_shared_manager = None
+_shared_manager_lock = threading.Lock()
+
+def get_ssh_manager():
+    """Return the process-wide SSHManager, creating it on first use.
+
+    SSHManager keeps no per-connection state: every call opens its own
+    paramiko client, so one instance is safe to share between threads and
+    greenlets.
+    """
+    global _shared_manager
+    if _shared_manager is None:
+        with _shared_manager_lock:
+            if _shared_manager is None:
+                _shared_manager = SSHManager(SSH_KEYS_DIR)
+    return _shared_manager
+
 class SSHManager:
-    def __init__(self, ssh_keys_dir="/app/data/ssh_keys"):
+    def __init__(self, ssh_keys_dir="/app/data/ssh_keys", max_parallel=SSH_MAX_PARALLEL, admission=None, circuits=None):
         self.ssh_keys_dir = ssh_keys_dir
+        self.max_parallel = max_parallel
+        self.admission = admission or get_admission_controller()
+        self.circuits = circuits or get_circuit_breaker()
+        self.bastions = BastionPool(self._connect)
         os.makedirs(ssh_keys_dir, exist_ok=True)
     
     def generate_ssh_key_pair(self, key_name):
         """Generate a new SSH key pair"""
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from cryptography.hazmat.backends import default_backend
+        
         try:
             # Generate private key
             private_key = rsa.generate_private_key(
@@ -61,113 +123,502 @@ class SSHManager:
             logger.error(f"Failed to generate SSH key pair: {str(e)}")
             raise
     
-    def test_ssh_connection(self, hostname, port, username, key_path=None, password=None, timeout=10):
+    def _connect(self, hostname, port, username, key_path=None, password=None, timeout=10, timings=None, sock=None):
+        """Open an authenticated SSH transport to a host.
+
+        Name resolution, TCP connect, key exchange and authentication are
+        timed separately into ``timings`` (milliseconds) and the SSH phase
+        metrics. ``sock`` is an already connected socket or channel, such
+        as a bastion tunnel; resolve and connect are then skipped. Host keys
+        are accepted without verification, as with paramiko's AutoAddPolicy.
+        The caller must close the transport.
+        """
+        import paramiko
+        
+        timings = {} if timings is None else timings
+        
+        if sock is None:
+            with timed_phase('resolve', timings):
+                addresses = socket.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)
+            
+            with timed_phase('connect', timings):
+                sock = self._open_socket(addresses, timeout)
+        
+        transport = paramiko.Transport(sock)
+        try:
+            transport.banner_timeout = timeout
+            transport.auth_timeout = timeout
+            
+            with timed_phase('kex', timings):
+                transport.start_client(timeout=timeout)
+            
+            with timed_phase('auth', timings):
+                self._authenticate(transport, username, key_path=key_path, password=password)
+        except Exception:
+            transport.close()
+            raise
+        
+        return transport
+    
+    def _open_socket(self, addresses, timeout):
+        """Connect to the first reachable address, like socket.create_connection"""
+        last_error = None
+        for family, socktype, proto, _, address in addresses:
+            sock = socket.socket(family, socktype, proto)
+            try:
+                sock.settimeout(timeout)
+                sock.connect(address)
+                return sock
+            except OSError as e:
+                sock.close()
+                last_error = e
+        raise last_error or OSError('No addresses to connect to')
+    
+    def _authenticate(self, transport, username, key_path=None, password=None):
+        """Authenticate with the server key, a password, or the default keys"""
+        import paramiko
+        
+        if key_path and os.path.exists(key_path):
+            transport.auth_publickey(username, self._load_private_key(key_path))
+            return
+        
+        if password:
+            transport.auth_password(username, password)
+            return
+        
+        # Same fallbacks as SSHClient.connect(): agent keys, then ~/.ssh keys
+        for key in self._default_keys():
+            try:
+                transport.auth_publickey(username, key)
+                return
+            except paramiko.AuthenticationException:
+                continue
+        
+        raise paramiko.AuthenticationException('No authentication methods available')
+    
+    def _load_private_key(self, key_path):
+        """Load a private key, including the PKCS#8 PEM files written by generate_ssh_key_pair"""
+        import paramiko
+        
+        try:
+            return paramiko.PKey.from_path(key_path)
+        except paramiko.SSHException:
+            from cryptography.hazmat.primitives import serialization
+            from cryptography.hazmat.primitives.asymmetric import rsa
+            
+            with open(key_path, 'rb') as f:
+                key = serialization.load_pem_private_key(f.read(), password=None)
+            if not isinstance(key, rsa.RSAPrivateKey):
+                raise
+            return paramiko.RSAKey(key=key)
+    
+    def _default_keys(self):
+        import paramiko
+        
+        try:
+            yield from paramiko.Agent().get_keys()
+        except paramiko.SSHException:
+            pass
+        
+        for name in ('id_rsa', 'id_ecdsa', 'id_ed25519'):
+            path = os.path.expanduser(os.path.join('~', '.ssh', name))
+            if os.path.exists(path):
+                try:
+                    yield paramiko.PKey.from_path(path)
+                except (paramiko.SSHException, ValueError):
+                    continue
+    
+    def _run(self, transport, command, timeout=300, timings=None, byte_counts=None, capture=None, control=None):
+        """Run a command on an open transport and return (output, error, exit_code).
+
+        Both streams are read incrementally as data arrives, so a chatty
+        stderr cannot stall stdout, and are kept within bounded head and tail
+        buffers (see output_capture). ``timeout`` is the command's wall-clock
+        deadline. When it passes, or ``control`` (an ExecutionControl) is
+        stopped, the channel is closed and the output read so far is returned
+        with exit code None; ``capture['stopped']`` gives the reason
+        (timeout, deadline or cancelled). Exec, first-byte and drain times go
+        into ``timings`` (milliseconds) and per-stream sizes into
+        ``byte_counts``. Which streams were truncated goes into ``capture``.
+        """
+        timings = {} if timings is None else timings
+        byte_counts = {} if byte_counts is None else byte_counts
+        capture = {} if capture is None else capture
+        start = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        outcome = 'error'
+        stopped = None
+        try:
+            # Spill files, if any, are removed once the output is read back
+            with StreamCapture('stdout') as stdout, StreamCapture('stderr') as stderr:
+                channel = transport.open_session(timeout=timeout)
+                try:
+                    with control.track(channel) if control is not None else nullcontext():
+                        channel.exec_command(command)
+                        started = time.perf_counter()
+                        timings['exec'] = _ms(started - start)
+                        first_byte = None
+                        
+                        while True:
+                            stopped = self._stop_reason(deadline, control)
+                            if stopped:
+                                break
+                            if channel.recv_ready():
+                                stdout.write(channel.recv(READ_CHUNK_SIZE))
+                            elif channel.recv_stderr_ready():
+                                stderr.write(channel.recv_stderr(READ_CHUNK_SIZE))
+                            elif channel.eof_received or channel.closed:
+                                break
+                            else:
+                                select.select([channel], [], [], self._wait_budget(deadline, control))
+                                continue
+                            
+                            if first_byte is None:
+                                first_byte = time.perf_counter()
+                                timings['first_byte'] = _ms(first_byte - started)
+                        
+                        # A channel closed by cancellation looks like an early exit
+                        stopped = stopped or (control.stop_reason if control is not None else None)
+                        exit_code = None if stopped else channel.recv_exit_status()
+                        timings['drain'] = _ms(time.perf_counter() - (first_byte or started))
+                finally:
+                    channel.close()
+                    for stream in (stdout, stderr):
+                        stream.close()
+                        byte_counts[stream.name] = stream.total
+                    capture['truncated'] = {stream.name: stream.truncated for stream in (stdout, stderr)}
+                    if stopped:
+                        capture['stopped'] = stopped
+                
+                if not stopped:
+                    outcome = 'success' if exit_code == 0 else 'failure'
+                return stdout.text(), stderr.text(), exit_code
+        finally:
+            observe_ssh_phase_seconds('exec', outcome, time.perf_counter() - start)
+    
+    def _stop_reason(self, deadline, control):
+        """Why a running command must stop now, or None"""
+        if control is not None and control.stopped():
+            return control.stop_reason
+        if time.monotonic() >= deadline:
+            return 'timeout'
+        return None
+    
+    def _wait_budget(self, deadline, control):
+        """Seconds to wait for output before the next deadline check"""
+        budget = deadline - time.monotonic()
+        remaining = control.remaining() if control is not None else None
+        if remaining is not None:
+            budget = min(budget, remaining)
+        return max(0.0, budget)
+    
+    @contextmanager
+    def _session(self, hostname, port, username, key_path=None, password=None, timeout=10,
+                 timings=None, admission_group=None, admission_timeout=None, bastion=None, bypass_circuit=False):
+        """Admit, connect and yield a transport; close it before releasing the slot.
+
+        Time spent waiting for admission is recorded as ``timings['queue']``;
+        ``timings['total']`` covers the session itself. With ``bastion`` (a
+        dict of its connection details) the session runs over a tunnel
+        through the bastion's shared transport (see bastion.BastionPool).
+        Connection outcomes feed the host's circuit breaker; while it is
+        open the session fails with CircuitOpen before queueing, unless
+        ``bypass_circuit`` is set.
+        """
+        timings = {} if timings is None else timings
+        host = (hostname, port)
+        probe = False if bypass_circuit else self.circuits.before(host)
+        reached = False
+        try:
+            with self.admission.slot(host, group=admission_group, timings=timings, timeout=admission_timeout):
+                start = time.perf_counter()
+                try:
+                    with ExitStack() as stack:
+                        sock = None
+                        if bastion:
+                            try:
+                                sock = stack.enter_context(self.bastions.tunnel(
+                                    bastion, host, timeout=timeout,
+                                    wait_timeout=admission_timeout or self.admission.timeout, timings=timings
+                                ))
+                            except TunnelFailed as e:
+                                # The target's failure; the bastion's own are
+                                # left to its breaker
+                                reached = True
+                                self.circuits.failure(host, e)
+                                raise
+                        try:
+                            transport = self._connect(hostname, port, username, key_path=key_path, password=password,
+                                                      timeout=timeout, timings=timings, sock=sock)
+                        except Exception as e:
+                            reached = True
+                            self.circuits.failure(host, e)
+                            raise
+                        reached = True
+                        self.circuits.success(host)
+                        try:
+                            yield transport
+                        finally:
+                            transport.close()
+                finally:
+                    timings['total'] = _ms(time.perf_counter() - start)
+        finally:
+            if probe and not reached:
+                self.circuits.release(host)
+    
+    def test_ssh_connection(self, hostname, port, username, key_path=None, password=None, timeout=10, bastion=None):
         """Test SSH connection to a server"""
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        timings = {}
         
         try:
-            if key_path and os.path.exists(key_path):
-                ssh.connect(
-                    hostname=hostname,
-                    port=port,
-                    username=username,
-                    key_filename=key_path,
-                    timeout=timeout
-                )
-            elif password:
-                ssh.connect(
-                    hostname=hostname,
-                    port=port,
-                    username=username,
-                    password=password,
-                    timeout=timeout
-                )
-            else:
-                # Try without authentication (for testing)
-                ssh.connect(
-                    hostname=hostname,
-                    port=port,
-                    username=username,
-                    timeout=timeout
-                )
-            
-            # Test with a simple command
-            stdin, stdout, stderr = ssh.exec_command('echo "SSH connection successful"')
-            output = stdout.read().decode().strip()
-            error = stderr.read().decode().strip()
-            
-            ssh.close()
+            # Pings always connect, so they also probe hosts whose circuit is open
+            with self._session(hostname, port, username, key_path=key_path, password=password, timeout=timeout,
+                               timings=timings, bastion=bastion, bypass_circuit=True) as transport:
+                # Test with a simple command
+                output, error, exit_code = self._run(transport, 'echo "SSH connection successful"', timeout=timeout, timings=timings)
             
             return {
                 'success': True,
-                'output': output,
-                'error': error
+                'output': output.strip(),
+                'error': error.strip(),
+                'timings_ms': timings
             }
             
         except Exception as e:
-            ssh.close()
             return {
                 'success': False,
-                'error': str(e)
+                'error': str(e),
+                'timings_ms': timings
             }
     
-    def execute_command(self, hostname, port, username, command, key_path=None, password=None, timeout=300):
-        """Execute a command on a remote server via SSH"""
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    def execute_command(self, hostname, port, username, command, key_path=None, password=None, timeout=300,
+                        admission_group=None, script=False, control=None, bastion=None, skip_open_circuits=False):
+        """Execute a command on a remote server via SSH.
+
+        Besides the output, the result carries ``timings_ms`` for each phase
+        reached (queue, resolve, connect, kex, auth, script, exec, first_byte,
+        drain, total) and ``bytes`` read per stream, including when the
+        command fails. ``admission_group`` ties the session to an execution
+        for fair queueing. With ``script`` the command is run from the remote
+        script cache (see _cached_script) rather than sent in full.
+
+        ``timeout`` is the host's wall-clock deadline and ``control`` the
+        execution's (see execution_control). A host stopped by either reports
+        ``stopped`` with the reason; one stopped before it ran has no output.
+        A host whose circuit is open fails at once; with
+        ``skip_open_circuits`` it is reported as ``skipped`` instead.
+        """
+        timings = {}
+        byte_counts = {'stdout': 0, 'stderr': 0}
+        capture = {}
         
         try:
-            if key_path and os.path.exists(key_path):
-                ssh.connect(
-                    hostname=hostname,
-                    port=port,
-                    username=username,
-                    key_filename=key_path,
-                    timeout=10
-                )
-            elif password:
-                ssh.connect(
-                    hostname=hostname,
-                    port=port,
-                    username=username,
-                    password=password,
-                    timeout=10
-                )
-            else:
-                ssh.connect(
-                    hostname=hostname,
-                    port=port,
-                    username=username,
-                    timeout=10
-                )
-            
-            # Execute command
-            stdin, stdout, stderr = ssh.exec_command(command, timeout=timeout)
-            
-            # Read output
-            output = stdout.read().decode()
-            error = stderr.read().decode()
-            exit_code = stdout.channel.recv_exit_status()
-            
-            ssh.close()
+            admission_timeout = None
+            connect_timeout = 10
+            if control is not None:
+                control.check()
+                remaining = control.remaining()
+                if remaining is not None:
+                    admission_timeout = max(0.001, min(remaining, self.admission.timeout or remaining))
+                    # A host hanging in its handshake must not outlast the deadline
+                    connect_timeout = max(0.001, min(connect_timeout, remaining))
+            with self._session(hostname, port, username, key_path=key_path, password=password, timeout=connect_timeout,
+                               timings=timings, admission_group=admission_group,
+                               admission_timeout=admission_timeout, bastion=bastion) as transport:
+                if script:
+                    with timed_phase('script', timings):
+                        command = self._cached_script(transport, command, timeout)
+                if control is not None:
+                    control.check()
+                output, error, exit_code = self._run(transport, command, timeout=timeout, timings=timings,
+                                                     byte_counts=byte_counts, capture=capture, control=control)
             
             return {
                 'success': exit_code == 0,
                 'exit_code': exit_code,
                 'output': output,
-                'error': error
+                'error': error,
+                'timings_ms': timings,
+                'bytes': byte_counts,
+                **capture
             }
             
         except Exception as e:
-            ssh.close()
-            return {
+            result = {
                 'success': False,
                 'error': str(e),
-                'exit_code': -1
+                'exit_code': -1,
+                'timings_ms': timings,
+                'bytes': byte_counts
             }
+            # Queued or connecting when the execution stopped
+            stopped = control.stopped() if control is not None else None
+            if stopped:
+                result['stopped'] = stopped
+                result['error'] = str(ExecutionStopped(stopped))
+            elif isinstance(e, CircuitOpen) and skip_open_circuits:
+                result['skipped'] = 'circuit_open'
+            return result
+    
+    def _cached_script(self, transport, body, timeout):
+        """Make sure a script is in the host's script cache; return the command running it.
+
+        Scripts are named by the SHA-256 of their body, so an existence test
+        tells whether this host already has this exact version. Only a
+        missing script is uploaded (over SFTP, which has no argument-length or
+        quoting limits). Scripts without a shebang run under the login shell,
+        as the command itself would.
+        """
+        import hashlib
+        import io
+        import shlex
+        import paramiko
+        
+        path = f'{SCRIPT_CACHE_DIR}/{hashlib.sha256(body.encode()).hexdigest()}'
+        _, error, exit_code = self._run(transport, f'test -x {shlex.quote(path)}', timeout=timeout)
+        if exit_code is None:
+            # Stopped or timed out: we cannot tell whether the script is there
+            raise paramiko.SSHException(f"Script cache check did not finish: {error or 'no exit status'}")
+        if exit_code != 0:
+            _, error, exit_code = self._run(transport, f'mkdir -p {shlex.quote(SCRIPT_CACHE_DIR)}', timeout=timeout)
+            if exit_code != 0:
+                raise paramiko.SSHException(f"Could not create script cache {SCRIPT_CACHE_DIR}: {error.strip()}")
+            sftp = paramiko.SFTPClient.from_transport(transport)
+            try:
+                partial_path = f'{path}.part-{os.getpid()}-{threading.get_ident()}'
+                sftp.putfo(io.BytesIO(body.encode()), partial_path)
+                sftp.chmod(partial_path, 0o700)
+                sftp.posix_rename(partial_path, path)
+            finally:
+                sftp.close()
+        
+        if body.startswith('#!'):
+            return shlex.quote(path if path.startswith('/') else f'./{path}')
+        return f'"${{SHELL:-/bin/sh}}" {shlex.quote(path)}'
+    
+    def execute_on_hosts(self, hosts, command, timeout=300, max_workers=None, script=False, control=None,
+                         skip_open_circuits=False):
+        """Execute a command on many hosts in parallel.
+
+        ``hosts`` is a list of dicts with the connection keyword arguments of
+        execute_command (hostname, port, username, key_path, password,
+        bastion).
+        Results are returned in the same order as ``hosts``. Callers must pass
+        plain values rather than ORM objects: the worker threads never touch
+        the database session. All sessions of the call share one admission
+        group, so concurrent executions are served round-robin. Stopping
+        ``control`` drops the hosts still queued for admission.
+        """
+        if not hosts:
+            return []
+        
+        max_workers = min(max_workers or self.max_parallel, len(hosts))
+        admission_group = control if control is not None else object()
+        if control is not None:
+            control.on_stop(lambda: self.admission.drop_group(admission_group))
+        
+        def run(host):
+            return self.execute_command(command=command, timeout=timeout, admission_group=admission_group,
+                                        script=script, control=control, skip_open_circuits=skip_open_circuits,
+                                        **host)
+        
+        EXECUTIONS_IN_FLIGHT.inc()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ssh-fanout') as pool:
+                return list(pool.map(run, hosts))
+        finally:
+            EXECUTIONS_IN_FLIGHT.dec()
     
-    def copy_public_key_to_server(self, hostname, port, username, public_key_content, password=None):
+    def upload_file(self, hostname, port, username, local_path, remote_path, checksum, key_path=None,
+                    password=None, mode=None, timeout=300, admission_group=None, bastion=None):
+        """Upload a file over SFTP unless the remote copy already has ``checksum``.
+
+        The remote file is compared by size first and only then by SHA-256,
+        so hosts missing the file cost no hashing. Data goes to a temporary
+        name with pipelined writes (no round trip per chunk) and is renamed
+        into place. The result reports ``status`` (uploaded, skipped or
+        error), ``bytes`` sent, ``throughput_mb_s`` and ``timings_ms``.
+        """
+        import paramiko
+        
+        timings = {}
+        size = os.path.getsize(local_path)
+        
+        try:
+            with self._session(hostname, port, username, key_path=key_path, password=password, timeout=10,
+                               timings=timings, admission_group=admission_group, bastion=bastion) as transport:
+                sftp = paramiko.SFTPClient.from_transport(transport)
+                sftp.get_channel().settimeout(timeout)
+                try:
+                    with timed_phase('checksum', timings):
+                        remote_checksum = self._remote_checksum(transport, sftp, remote_path, size, timeout)
+                    if remote_checksum == checksum:
+                        return {'status': 'skipped', 'bytes': 0, 'timings_ms': timings}
+                    
+                    partial_path = f'{remote_path}.part-{checksum[:12]}'
+                    with timed_phase('transfer', timings):
+                        with open(local_path, 'rb') as source, sftp.open(partial_path, 'wb') as target:
+                            target.set_pipelined(True)
+                            while True:
+                                chunk = source.read(SFTP_CHUNK_SIZE)
+                                if not chunk:
+                                    break
+                                target.write(chunk)
+                        if mode is not None:
+                            sftp.chmod(partial_path, mode)
+                        sftp.posix_rename(partial_path, remote_path)
+                finally:
+                    sftp.close()
+            
+            transfer_seconds = timings['transfer'] / 1000
+            return {
+                'status': 'uploaded',
+                'bytes': size,
+                'throughput_mb_s': round(size / transfer_seconds / 1e6, 2) if transfer_seconds else None,
+                'timings_ms': timings
+            }
+            
+        except Exception as e:
+            return {
+                'status': 'error',
+                'error': str(e),
+                'bytes': 0,
+                'timings_ms': timings
+            }
+    
+    def _remote_checksum(self, transport, sftp, remote_path, size, timeout):
+        """SHA-256 of the remote file, or None if it is missing or differs in size"""
+        import shlex
+        
+        try:
+            if sftp.stat(remote_path).st_size != size:
+                return None
+        except IOError:
+            return None
+        output, _, exit_code = self._run(transport, f'sha256sum {shlex.quote(remote_path)}', timeout=timeout)
+        return output.split()[0] if exit_code == 0 and output else None
+    
+    def distribute_file(self, hosts, local_path, remote_path, checksum, mode=None, timeout=300, max_workers=None):
+        """Upload a file to many hosts in parallel.
+
+        ``hosts`` is a list of dicts with the connection keyword arguments
+        of upload_file; results are returned in the same order. As with
+        execute_on_hosts, all sessions share one admission group.
+        """
+        if not hosts:
+            return []
+        
+        max_workers = min(max_workers or self.max_parallel, len(hosts))
+        admission_group = object()
+        
+        def upload(host):
+            return self.upload_file(local_path=local_path, remote_path=remote_path, checksum=checksum, mode=mode,
+                                    timeout=timeout, admission_group=admission_group, **host)
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sftp-fanout') as pool:
+            return list(pool.map(upload, hosts))
+    
+    def copy_public_key_to_server(self, hostname, port, username, public_key_content, password=None, bastion=None):
         """Copy public key to server's authorized_keys"""
         try:
             # Use ssh-copy-id equivalent
@@ -178,7 +629,8 @@ class SSHManager:
                 port=port,
                 username=username,
                 command=command,
-                password=password
+                password=password,
+                bastion=bastion
             )
             
             return result
@@ -189,7 +641,7 @@ class SSHManager:
                 'error': str(e)
             }
     
-    def get_server_info(self, hostname, port, username, key_path=None, password=None):
+    def get_server_info(self, hostname, port, username, key_path=None, password=None, bastion=None):
         """Get basic server information"""
         commands = {
             'hostname': 'hostname',
@@ -202,21 +654,20 @@ class SSHManager:
         
         results = {}
         
-        for info_type, command in commands.items():
-            result = self.execute_command(
-                hostname=hostname,
-                port=port,
-                username=username,
-                command=command,
-                key_path=key_path,
-                password=password,
-                timeout=30
-            )
-            
-            if result['success']:
-                results[info_type] = result['output'].strip()
-            else:
-                results[info_type] = f"Error: {result['error']}"
+        # One handshake for all probes: each command runs on its own channel
+        try:
+            with self._session(hostname, port, username, key_path=key_path, password=password, timeout=10,
+                               bastion=bastion) as transport:
+                for info_type, command in commands.items():
+                    try:
+                        output, error, exit_code = self._run(transport, command, timeout=30)
+                        if exit_code == 0:
+                            results[info_type] = output.strip()
+                        else:
+                            results[info_type] = f"Error: {error}"
+                    except Exception as e:
+                        results[info_type] = f"Error: {str(e)}"
+        except Exception as e:
+            return {info_type: f"Error: {str(e)}" for info_type in commands}
         
         return results
-
@@ -0,0 +1,118 @@
+"""Group commit for small, independent writes.
+
+SQLite admits one writer at a time, so concurrent requests that each
+commit a small write (a fan-out of pings, say) queue on the write lock
+and pay a commit each. With batching on, such writes are handed to one
+writer thread per process. It runs every write queued at that moment in
+a single transaction and commits once. Callers block until their write
+is committed, so they still read their own writes afterwards.
+
+If a batch fails, each of its writes is retried in its own transaction,
+so one bad write does not lose the others; its error is raised to its
+caller.
+
+Batching defaults to on for SQLite (``DB_WRITE_BATCHING``). On PostgreSQL
+writes are committed inline by the caller, as everywhere else.
+"""
+import logging
+import os
+import queue
+import threading
+
+from flask import current_app
+
+from src.models.server import db
+
+logger = logging.getLogger(__name__)
+
+DB_WRITE_BATCH_SIZE = int(os.environ.get('DB_WRITE_BATCH_SIZE', '200'))
+
+
+class _Write:
+    __slots__ = ('fn', 'done', 'error')
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.done = threading.Event()
+        self.error = None
+
+
+class WriteBatcher:
+    def __init__(self, app, max_batch=DB_WRITE_BATCH_SIZE):
+        self.app = app
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        threading.Thread(target=self._loop, name='db-writer', daemon=True).start()
+
+    def submit(self, fn):
+        """Run ``fn`` on the writer thread and wait until it is committed"""
+        write = _Write(fn)
+        self._queue.put(write)
+        write.done.wait()
+        if write.error is not None:
+            raise write.error
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # Take whatever queued up while the previous batch committed
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self.app.app_context():
+                self._apply(batch)
+
+    def _apply(self, batch):
+        try:
+            for write in batch:
+                write.fn()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) > 1:
+                logger.warning(f"Batch of {len(batch)} writes failed, retrying one by one: {str(e)}")
+                for write in batch:
+                    self._apply([write])
+                return
+            batch[0].error = e
+        for write in batch:
+            write.done.set()
+
+
+_shared_batcher = None
+_shared_batcher_lock = threading.Lock()
+
+
+def _batching_enabled():
+    setting = os.environ.get('DB_WRITE_BATCHING')
+    if setting is not None:
+        return setting == '1'
+    return db.engine.dialect.name == 'sqlite'
+
+
+def get_write_batcher():
+    """Return the process-wide WriteBatcher, or None when batching is off"""
+    global _shared_batcher
+    if _shared_batcher is None and _batching_enabled():
+        with _shared_batcher_lock:
+            if _shared_batcher is None:
+                _shared_batcher = WriteBatcher(current_app._get_current_object())
+    return _shared_batcher
+
+
+def batched_write(fn):
+    """Run ``fn``, which writes through db.session, and commit it.
+
+    ``fn`` runs on the writer thread when batching is on, so it must not
+    use ORM objects loaded by the caller (use ids and bulk statements),
+    and the caller must hold no uncommitted writes, or the two would wait
+    on each other's lock.
+    """
+    batcher = get_write_batcher()
+    if batcher is None:
+        fn()
+        db.session.commit()
+        return
+    batcher.submit(fn)
@@ -0,0 +1,193 @@
+"""Execution worker: runs queued command batches from Redis.
+
+Start one or more replicas next to the API (``EXECUTION_BACKEND=queue``):
+
+    python -m src.worker --threads 4
+
+Each thread takes one batch at a time, runs it through the shared
+SSHManager (so admission control still applies per process), stores the
+results and acknowledges the task. The worker that stores an execution's
+last batch writes the aggregated results to its ExecutionLog. Batches run
+under the execution's deadline and stop when it is cancelled (see
+execution_control).
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+from datetime import datetime
+
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import create_app
+from src.models.server import db, ExecutionLog
+from src.utils.execution_control import ExecutionControl, watch
+from src.utils.execution_queue import EXECUTION_MAX_DELIVERIES, get_execution_queue
+from src.utils.execution_stats import failed_hosts, host_result
+from src.utils.output_search import index_outputs
+from src.utils.health_history import record_results, start_health_rollups
+from src.utils.live_events import publish_execution
+from src.utils.scheduler import start_scheduler
+from src.utils.ssh_manager import CONNECTION_KEYS, get_ssh_manager
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_WORKER_THREADS = int(os.environ.get('EXECUTION_WORKER_THREADS', '4'))
+
+
+class ExecutionWorker:
+    def __init__(self, app, queue=None, threads=EXECUTION_WORKER_THREADS, consumer=None):
+        self.app = app
+        self.queue = queue or get_execution_queue()
+        self.threads = threads
+        self.consumer = consumer or f'{socket.gethostname()}-{os.getpid()}'
+        self.stopping = threading.Event()
+        self._in_flight = set()
+        self._in_flight_lock = threading.Lock()
+
+    def stop(self, *args):
+        logger.info("Stopping after in-flight batches finish")
+        self.stopping.set()
+
+    def run(self):
+        self.queue.prune_consumers()
+        logger.info(f"Worker {self.consumer} consuming {self.queue.stream} with {self.threads} threads")
+        workers = [
+            threading.Thread(target=self._consume, name=f'execution-worker-{i}')
+            for i in range(self.threads)
+        ]
+        heartbeat = threading.Thread(target=self._heartbeat, name='execution-heartbeat', daemon=True)
+        heartbeat.start()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+    def _heartbeat(self):
+        interval = max(1, self.queue.visibility_timeout / 3)
+        while not self.stopping.wait(interval):
+            with self._in_flight_lock:
+                message_ids = list(self._in_flight)
+            try:
+                self.queue.heartbeat(self.consumer, message_ids)
+            except Exception as e:
+                logger.error(f"Heartbeat failed: {str(e)}")
+
+    def _consume(self):
+        while not self.stopping.is_set():
+            try:
+                tasks = self.queue.claim(self.consumer, count=1, block_ms=2000)
+            except Exception as e:
+                logger.error(f"Failed to read tasks: {str(e)}")
+                self.stopping.wait(5)
+                continue
+            for task in tasks:
+                with self._in_flight_lock:
+                    self._in_flight.add(task.message_id)
+                try:
+                    self.process(task)
+                except Exception as e:
+                    # Left unacknowledged: redelivered after the visibility timeout
+                    logger.error(f"Batch {task.batch} of execution {task.execution_id} failed: {str(e)}")
+                finally:
+                    with self._in_flight_lock:
+                        self._in_flight.discard(task.message_id)
+
+    def process(self, task):
+        with self.app.app_context():
+            if task.deliveries > EXECUTION_MAX_DELIVERIES:
+                logger.warning(f"Giving up on batch {task.batch} of execution {task.execution_id} "
+                               f"after {task.deliveries} deliveries")
+                results = [
+                    {
+                        'server_id': target['server_id'],
+                        'server_name': target['server_name'],
+                        'status': 'error',
+                        'error': f'Abandoned after {task.deliveries} delivery attempts',
+                        'timings_ms': {},
+                        'bytes': {'stdout': 0, 'stderr': 0}
+                    }
+                    for target in task.targets
+                ]
+            else:
+                control = ExecutionControl(task.execution_id, task.deadline)
+                if mark_running(task.execution_id) == 'cancelling':
+                    control.stop('cancelled')
+                hosts = [
+                    # Tasks queued before bastion support carry no 'bastion'
+                    {key: target.get(key) for key in CONNECTION_KEYS}
+                    for target in task.targets
+                ]
+                with watch(control, self.app):
+                    host_results = get_ssh_manager().execute_on_hosts(
+                        hosts, task.command, timeout=task.timeout, script=task.script, control=control,
+                        skip_open_circuits=task.skip_open_circuits
+                    )
+                results = [host_result(target, result) for target, result in zip(task.targets, host_results)]
+
+            aggregated = self.queue.store_result(task, results)
+            if aggregated is not None:
+                finalize(task.execution_id, aggregated)
+            self.queue.ack(task)
+            if aggregated is not None:
+                self.queue.discard_results(task.execution_id)
+
+
+def mark_running(execution_id):
+    """Move a queued execution to running when its first batch starts; return its status"""
+    started = ExecutionLog.query.filter(
+        ExecutionLog.id == execution_id, ExecutionLog.status == 'queued'
+    ).update({'status': 'running'}, synchronize_session=False)
+    db.session.commit()
+    if started:
+        publish_execution(execution_id)
+    return db.session.query(ExecutionLog.status).filter(ExecutionLog.id == execution_id).scalar()
+
+
+def finalize(execution_id, results):
+    """Write the merged, compacted host results; a no-op if already finalized"""
+    deadline_hit = any(entry.get('stopped') == 'deadline' for entry in results['results'])
+    finalized = ExecutionLog.query.filter(
+        ExecutionLog.id == execution_id, ExecutionLog.status.in_(['queued', 'running', 'cancelling'])
+    ).update({
+        'status': sa.case(
+            (ExecutionLog.status == 'cancelling', 'cancelled'),
+            else_='timed_out' if deadline_hit else 'completed'
+        ),
+        'completed_at': datetime.utcnow(),
+        'output': json.dumps(results),
+        'failed_hosts': failed_hosts(results['results'])
+    }, synchronize_session=False)
+    if finalized:
+        index_outputs(execution_id, results)
+        record_results(results['results'])
+    db.session.commit()
+    if finalized:
+        publish_execution(execution_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run queued command executions')
+    parser.add_argument('--threads', type=int, default=EXECUTION_WORKER_THREADS,
+                        help='batches processed concurrently by this process')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    app = create_app()
+    start_scheduler(app)
+    start_health_rollups(app)
+    worker = ExecutionWorker(app, threads=args.threads)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Deterministic settings for every test process, before src reads them
+os.environ.setdefault('SSH_KEYS_DIR', '/tmp/server-automation-test-keys')
+os.environ['DB_WRITE_BATCHING'] = '0'
+os.environ['LIVE_EVENTS_BACKEND'] = 'local'
+os.environ.pop('REDIS_URL', None)
+
+from src.main import create_app
+from src.models.server import db, Server, CustomCommand, ExecutionLog
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'TESTING': True
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_server(app):
+    def make(name='web-1', **fields):
+        fields.setdefault('hostname', f'{name}.example')
+        fields.setdefault('ip_address', '127.0.0.1')
+        fields.setdefault('username', 'deploy')
+        server = Server(name=name, **fields)
+        db.session.add(server)
+        db.session.commit()
+        return server
+    return make
+
+
+@pytest.fixture
+def make_command(app):
+    def make(name='uptime', command='uptime', **fields):
+        command = CustomCommand(name=name, command=command, **fields)
+        db.session.add(command)
+        db.session.commit()
+        return command
+    return make
+
+
+@pytest.fixture
+def make_execution(app):
+    def make(**fields):
+        fields.setdefault('execution_type', 'command')
+        fields.setdefault('status', 'running')
+        execution = ExecutionLog(**fields)
+        db.session.add(execution)
+        db.session.commit()
+        return execution
+    return make
+
+
+def start_fleet(size, **profile):
+    """Simulated SSH hosts (benchmarks/fleet_sim) served from a background thread"""
+    from benchmarks.fleet_sim import Fleet
+
+    fleet = Fleet(size, profile=profile)
+    threading.Thread(target=fleet.serve_forever, daemon=True).start()
+    return fleet
+
+
+@pytest.fixture(scope='session')
+def fleet():
+    return start_fleet(4)
+
+
+@pytest.fixture(scope='session')
+def ssh_key(tmp_path_factory):
+    """Path of a private key; the simulated hosts accept any key"""
+    from src.utils.ssh_manager import SSHManager
+
+    return SSHManager(str(tmp_path_factory.mktemp('keys'))).generate_ssh_key_pair('fleet')['private_key_path']
+
+
+@pytest.fixture
+def make_fleet_servers(make_server, ssh_key):
+    """Register every host of a fleet as a server"""
+    def make(fleet, prefix='sim'):
+        return [
+            make_server(f'{prefix}-{index}', hostname=fleet.bind, port=port, username='bench', ssh_key_path=ssh_key)
+            for index, port in enumerate(fleet.ports)
+        ]
+    return make
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from src.utils.admission import AdmissionController, AdmissionDropped, AdmissionTimeout
+
+WEB, DB = ('web-1', 22), ('db-1', 22)
+
+
+def wait_for_waiters(controller, count):
+    deadline = time.monotonic() + 5
+    while controller.stats()['waiting'] < count:
+        assert time.monotonic() < deadline, 'waiter never queued'
+        time.sleep(0.001)
+
+
+def queue_session(controller, host, group, outcomes, name):
+    """Start a session in a thread once the previous one has queued"""
+    def run():
+        try:
+            with controller.slot(host, group=group, timeout=5):
+                outcomes.append(name)
+        except Exception as e:
+            outcomes.append((name, type(e)))
+
+    waiting = controller.stats()['waiting']
+    thread = threading.Thread(target=run)
+    thread.start()
+    wait_for_waiters(controller, waiting + 1)
+    return thread
+
+
+def test_global_cap_times_out_then_admits_after_release():
+    controller = AdmissionController(max_sessions=2, max_per_host=2, timeout=0.05)
+    controller.acquire(WEB)
+    controller.acquire(DB)
+    with pytest.raises(AdmissionTimeout):
+        controller.acquire(('cache-1', 22))
+    assert controller.stats()['waiting'] == 0
+
+    controller.release(WEB)
+    controller.acquire(('cache-1', 22))
+    assert controller.stats()['active'] == 2
+
+
+def test_host_at_its_cap_does_not_block_other_hosts():
+    controller = AdmissionController(max_sessions=10, max_per_host=1, timeout=5)
+    controller.acquire(WEB)
+    outcomes = []
+    queued = queue_session(controller, WEB, None, outcomes, 'web')
+
+    started = time.perf_counter()
+    with controller.slot(DB):
+        pass
+    assert time.perf_counter() - started < 1
+    assert outcomes == []
+
+    controller.release(WEB)
+    queued.join()
+    assert outcomes == ['web']
+
+
+def test_free_slots_alternate_between_executions():
+    controller = AdmissionController(max_sessions=1, max_per_host=10, timeout=5)
+    controller.acquire(WEB)
+    fan_out = object()
+    order = []
+    threads = [queue_session(controller, WEB, fan_out, order, f'fan-out-{i}') for i in range(3)]
+    threads.append(queue_session(controller, DB, None, order, 'ping'))
+
+    controller.release(WEB)
+    for thread in threads:
+        thread.join()
+    # The ping goes second, not behind the whole fan-out
+    assert order == ['fan-out-0', 'ping', 'fan-out-1', 'fan-out-2']
+
+
+def test_dropped_group_fails_its_waiters_at_once():
+    controller = AdmissionController(max_sessions=1, max_per_host=1, timeout=5)
+    controller.acquire(WEB)
+    cancelled = object()
+    outcomes = []
+    threads = [queue_session(controller, WEB, cancelled, outcomes, i) for i in range(2)]
+
+    assert controller.drop_group(cancelled) == 2
+    for thread in threads:
+        thread.join()
+    assert sorted(outcomes) == [(0, AdmissionDropped), (1, AdmissionDropped)]
+    assert (controller.stats()['active'], controller.stats()['waiting']) == (1, 0)
+
+
+def test_slot_records_queue_time_and_releases():
+    controller = AdmissionController(max_sessions=1, max_per_host=1, timeout=5)
+    timings = {}
+    with controller.slot(WEB, timings=timings):
+        assert controller.stats()['active'] == 1
+    assert controller.stats()['active'] == 0
+    assert timings['queue'] >= 0
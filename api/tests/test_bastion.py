@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from src.utils.admission import AdmissionController
+from src.utils.bastion import BastionPool, TunnelFailed
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpen
+from src.utils.ssh_manager import SSHManager
+
+BASTION = {'hostname': 'bastion.example', 'port': 22, 'username': 'jump', 'max_channels': 8}
+
+
+class Transport:
+    def __init__(self):
+        self.closed = False
+
+    def is_active(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+    def set_keepalive(self, seconds):
+        pass
+
+    def open_channel(self, kind, destination, origin, timeout=None):
+        return Transport()
+
+
+def test_dead_bastion_fails_waiting_tunnels_at_once():
+    attempts = []
+
+    def connect(hostname, port, username, key_path=None, timeout=None):
+        attempts.append(hostname)
+        time.sleep(0.3)
+        raise TimeoutError('timed out')
+
+    pool = BastionPool(connect)
+    errors = []
+
+    def tunnel(target):
+        try:
+            with pool.tunnel(BASTION, (target, 22), timeout=0.3):
+                pass
+        except Exception as e:
+            errors.append(e)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=tunnel, args=(f'web-{i}',)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # One connect timeout in total, not one per target
+    assert time.perf_counter() - started < 1
+    assert attempts == ['bastion.example']
+    assert sum(isinstance(e, TimeoutError) for e in errors) == 1
+    assert sum(isinstance(e, CircuitOpen) for e in errors) == 5
+
+
+def test_bastion_reconnects_after_backoff():
+    outcomes = [TimeoutError('timed out')]
+
+    def connect(hostname, port, username, key_path=None, timeout=None):
+        if outcomes:
+            raise outcomes.pop()
+        return Transport()
+
+    pool = BastionPool(connect)
+    pool.circuits.backoff = 0.05
+    with pytest.raises(TimeoutError):
+        with pool.tunnel(BASTION, ('web-1', 22)):
+            pass
+    with pytest.raises(CircuitOpen):
+        with pool.tunnel(BASTION, ('web-1', 22)):
+            pass
+    time.sleep(0.06)
+    with pool.tunnel(BASTION, ('web-1', 22)) as channel:
+        assert channel.is_active()
+    assert pool.circuits.stats() == []
+
+
+class RefusingTransport(Transport):
+    def open_channel(self, kind, destination, origin, timeout=None):
+        raise ConnectionRefusedError('Connect failed')
+
+
+def test_tunnel_failures_count_against_the_target_not_the_bastion(tmp_path):
+    manager = SSHManager(str(tmp_path), admission=AdmissionController(), circuits=CircuitBreaker(threshold=1))
+    manager.bastions = BastionPool(lambda *args, **kwargs: RefusingTransport())
+    with pytest.raises(TunnelFailed):
+        with manager._session('10.0.0.5', 22, 'deploy', bastion=BASTION, timeout=0.1):
+            pass
+    [stats] = manager.circuits.stats()
+    assert (stats['hostname'], stats['state']) == ('10.0.0.5', 'open')
+    assert 'Connect failed' in stats['last_error']
+    assert manager.bastions.circuits.stats() == []
+
+
+def test_bastion_failures_leave_the_target_circuit_alone(tmp_path):
+    def connect(hostname, port, username, key_path=None, timeout=None):
+        raise TimeoutError('timed out')
+
+    manager = SSHManager(str(tmp_path), admission=AdmissionController(), circuits=CircuitBreaker(threshold=1))
+    manager.bastions = BastionPool(connect)
+    for error in (TimeoutError, CircuitOpen):
+        with pytest.raises(error):
+            with manager._session('10.0.0.5', 22, 'deploy', bastion=BASTION, timeout=0.1):
+                pass
+    assert manager.circuits.stats() == []
+    [stats] = manager.bastions.circuits.stats()
+    assert (stats['hostname'], stats['state']) == ('bastion.example', 'open')
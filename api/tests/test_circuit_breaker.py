@@ -0,0 +1,88 @@
+import socket
+import time
+
+import pytest
+
+from src.utils.admission import AdmissionController
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpen
+from src.utils.ssh_manager import SSHManager
+
+from conftest import start_fleet
+
+HOST = ('web-1', 22)
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_opens_after_threshold_and_lets_one_probe_through():
+    breaker = CircuitBreaker(threshold=2, backoff=0.05, max_backoff=1)
+    assert breaker.before(HOST) is False
+    breaker.failure(HOST, OSError('refused'))
+    assert breaker.before(HOST) is False
+    breaker.failure(HOST, OSError('refused'))
+    with pytest.raises(CircuitOpen):
+        breaker.before(HOST)
+    [stats] = breaker.stats()
+    assert (stats['state'], stats['consecutive_failures'], stats['last_error']) == ('open', 2, 'refused')
+
+    time.sleep(0.06)
+    assert breaker.before(HOST) is True
+    # Only the probe is let through while it runs
+    with pytest.raises(CircuitOpen):
+        breaker.before(HOST)
+    breaker.success(HOST)
+    assert breaker.stats() == []
+    assert breaker.before(HOST) is False
+
+
+def test_failed_probe_doubles_the_backoff():
+    breaker = CircuitBreaker(threshold=1, backoff=10, max_backoff=15)
+    breaker.failure(HOST)
+    first = breaker._circuits[HOST].retry_at
+    breaker._circuits[HOST].retry_at = time.time()
+    assert breaker.before(HOST) is True
+    breaker.failure(HOST)
+    assert breaker._circuits[HOST].retry_at - time.time() == pytest.approx(15, abs=1)
+    assert first - time.time() == pytest.approx(10, abs=1)
+
+
+def test_released_probe_lets_the_next_session_probe():
+    breaker = CircuitBreaker(threshold=1, backoff=0)
+    breaker.failure(HOST)
+    assert breaker.before(HOST) is True
+    breaker.release(HOST)
+    assert breaker.before(HOST) is True
+
+
+def test_dead_host_fails_fast_once_open(tmp_path, fleet):
+    manager = SSHManager(str(tmp_path), admission=AdmissionController(),
+                         circuits=CircuitBreaker(threshold=2, backoff=60))
+    port = closed_port()
+    for _ in range(2):
+        result = manager.execute_command('127.0.0.1', port, 'bench', 'uptime', password='bench')
+        assert result['exit_code'] == -1 and 'Circuit open' not in result['error']
+
+    result = manager.execute_command('127.0.0.1', port, 'bench', 'uptime', password='bench')
+    assert 'Circuit open' in result['error'] and 'connect' not in result['timings_ms']
+    skipped = manager.execute_command('127.0.0.1', port, 'bench', 'uptime', password='bench', skip_open_circuits=True)
+    assert skipped['skipped'] == 'circuit_open'
+
+    # Pings bypass the circuit; other hosts are unaffected
+    ping = manager.test_ssh_connection('127.0.0.1', port, 'bench', password='bench')
+    assert not ping['success'] and 'Circuit open' not in ping['error']
+    ok = manager.execute_command(fleet.bind, fleet.ports[0], 'bench', 'uptime', password='bench')
+    assert ok['exit_code'] == 0
+
+
+def test_non_zero_exit_does_not_count(tmp_path):
+    failing = start_fleet(1, failure_rate=1.0)
+    circuits = CircuitBreaker(threshold=1)
+    manager = SSHManager(str(tmp_path), admission=AdmissionController(), circuits=circuits)
+    for _ in range(3):
+        result = manager.execute_command(failing.bind, failing.ports[0], 'bench', 'uptime', password='bench')
+        assert result['exit_code'] == 1
+    assert circuits.stats() == []
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+import src.utils.coalescing as coalescing
+from src.models.server import db, ExecutionIdempotencyKey, ExecutionLog
+from src.utils.coalescing import IdempotencyConflict, fingerprint, start_execution
+
+
+def new_log():
+    return ExecutionLog(execution_type='command', command_id=None, target_servers=[1, 2], status='running')
+
+
+def test_fingerprint_ignores_server_order_and_repeats():
+    assert fingerprint('command', 1, [2, 1, 2], {'timeout': 30}) == fingerprint('command', 1, [1, 2], {'timeout': 30})
+    assert fingerprint('command', 1, [1, 2], {'timeout': 30}) != fingerprint('command', 1, [1, 2], {'timeout': 60})
+
+
+def test_identical_request_joins_in_flight_execution(app):
+    first, coalesced = start_execution(new_log(), 'f' * 32)
+    assert not coalesced
+    joined, coalesced = start_execution(new_log(), 'f' * 32)
+    assert coalesced and joined.id == first.id
+
+
+def test_finished_execution_is_not_joined(app):
+    first, _ = start_execution(new_log(), 'f' * 32)
+    first.status = 'completed'
+    db.session.commit()
+    second, coalesced = start_execution(new_log(), 'f' * 32)
+    assert not coalesced and second.id != first.id
+
+
+def test_coalescing_off(app, monkeypatch):
+    monkeypatch.setattr(coalescing, 'EXECUTION_COALESCE_SECONDS', 0)
+    first, _ = start_execution(new_log(), 'f' * 32)
+    second, coalesced = start_execution(new_log(), 'f' * 32)
+    assert not coalesced and second.id != first.id
+
+
+def test_replayed_key_returns_execution_after_it_finished(app):
+    first, _ = start_execution(new_log(), 'f' * 32, 'key-1')
+    first.status = 'completed'
+    db.session.commit()
+    replay, coalesced = start_execution(new_log(), 'f' * 32, 'key-1')
+    assert coalesced and replay.id == first.id
+
+
+def test_key_reused_for_different_request_conflicts(app):
+    start_execution(new_log(), 'f' * 32, 'key-1')
+    with pytest.raises(IdempotencyConflict):
+        start_execution(new_log(), 'e' * 32, 'key-1')
+
+
+def test_key_of_coalesced_request_is_recorded(app):
+    first, _ = start_execution(new_log(), 'f' * 32, 'key-1')
+    joined, coalesced = start_execution(new_log(), 'f' * 32, 'key-2')
+    assert coalesced and joined.id == first.id
+    first.status = 'completed'
+    db.session.commit()
+
+    # Replaying the joining request's key still finds the execution it joined
+    replay, coalesced = start_execution(new_log(), 'f' * 32, 'key-2')
+    assert coalesced and replay.id == first.id
+    assert {key.idempotency_key for key in ExecutionIdempotencyKey.query} == {'key-1', 'key-2'}
+
+
+def test_concurrent_duplicates_start_one_execution(app):
+    results = []
+
+    def submit():
+        with app.app_context():
+            execution, coalesced = start_execution(new_log(), 'f' * 32)
+            results.append((execution.id, coalesced))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({execution_id for execution_id, _ in results}) == 1
+    assert sum(not coalesced for _, coalesced in results) == 1
+    assert ExecutionLog.query.count() == 1
+
+
+def test_execute_route_coalesces_and_validates_key(client, make_server, make_command, monkeypatch):
+    server = make_server()
+    command = make_command()
+    # Keep the first request in flight without SSH
+    monkeypatch.setattr('src.utils.execution_queue.EXECUTION_BACKEND', 'queue')
+    monkeypatch.setattr('src.routes.servers.EXECUTION_BACKEND', 'queue')
+
+    class Queue:
+        def enqueue(self, *args, **kwargs):
+            return 1
+
+    monkeypatch.setattr('src.routes.servers.get_execution_queue', lambda: Queue())
+    body = {'server_ids': [server.id]}
+    first = client.post(f'/api/commands/{command.id}/execute', json=body, headers={'Idempotency-Key': 'a'})
+    second = client.post(f'/api/commands/{command.id}/execute', json=body)
+    assert first.status_code == 202 and second.status_code == 202
+    assert second.get_json() == {'execution_id': first.get_json()['execution_id'], 'status': 'queued', 'coalesced': True}
+
+    conflict = client.post(f'/api/commands/{command.id}/execute', json={'server_ids': [server.id], 'deadline_seconds': 5},
+                           headers={'Idempotency-Key': 'a'})
+    assert conflict.status_code == 422
+    assert client.post(f'/api/commands/{command.id}/execute', json=body, headers={'Idempotency-Key': ''}).status_code == 400
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+from src.models.server import db
+from src.utils.dashboard import compute_summary
+from src.utils.execution_stats import compact_results, failed_hosts
+
+
+def results(*exit_codes):
+    return [
+        {'server_id': index, 'status': 'error', 'error': 'timed out'} if code == 'error'
+        else {'server_id': index, 'status': 'success', 'exit_code': code, 'output': '', 'error': ''}
+        for index, code in enumerate(exit_codes, 1)
+    ]
+
+
+def test_failed_hosts_counts_errors_and_non_zero_exits():
+    stopped = {'server_id': 9, 'status': 'timed_out', 'exit_code': None, 'stopped': 'deadline'}
+    assert failed_hosts(results(0, 1, 'error', 2) + [stopped]) == 3
+    assert failed_hosts(compact_results(results(0, 0))['results']) == 0
+
+
+def test_top_failing_commands_ranks_by_failed_hosts(app, make_command, make_execution):
+    disk = make_command('disk', 'df -h')
+    ping = make_command('ping', 'true')
+    old = make_command('old', 'false')
+    # A completed run with 4 failing hosts outranks three failed runs
+    make_execution(command_id=disk.id, status='completed', failed_hosts=4)
+    make_execution(command_id=ping.id, status='failed', failed_hosts=1)
+    make_execution(command_id=ping.id, status='completed', failed_hosts=1)
+    make_execution(command_id=ping.id, status='completed', failed_hosts=0)
+    # Failed outright, with no host results to count
+    make_execution(command_id=ping.id, status='failed')
+    make_execution(command_id=old.id, status='failed', failed_hosts=0)
+    make_execution(command_id=old.id, status='completed', failed_hosts=9,
+                   started_at=datetime.utcnow() - timedelta(days=8))
+
+    top = compute_summary()['top_failing_commands']
+    assert top == [
+        {'command_id': disk.id, 'name': 'disk', 'failures': 4},
+        {'command_id': ping.id, 'name': 'ping', 'failures': 3},
+        {'command_id': old.id, 'name': 'old', 'failures': 1},
+    ]
+
+
+def test_finalize_records_failed_hosts(app, make_execution):
+    from src.models.server import ExecutionLog
+    from src.worker import finalize
+
+    execution = make_execution(status='running')
+    finalize(execution.id, compact_results(results(0, 1, 'error')))
+    db.session.expire_all()
+    assert ExecutionLog.query.get(execution.id).failed_hosts == 2
@@ -0,0 +1,84 @@
+import pytest
+import sqlalchemy as sa
+from flask import g
+
+from src.main import create_app
+from src.models.server import db, Server
+from src.utils.db_routing import REPLICA_BIND, SQLITE_BUSY_TIMEOUT_MS
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    """An app on two SQLite files, the second bound as its read replica"""
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'SQLALCHEMY_BINDS': {REPLICA_BIND: f"sqlite:///{tmp_path / 'replica.db'}"},
+        'TESTING': True
+    })
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        # Replication lag: a server the primary no longer has
+        with db.engines[REPLICA_BIND].begin() as conn:
+            conn.execute(sa.insert(Server.__table__).values(
+                name='replica-only', hostname='old.example', ip_address='10.0.0.1', username='deploy'
+            ))
+    yield app
+    # init_app registered a metadata for the bind on the shared extension
+    db.metadatas.pop(REPLICA_BIND, None)
+
+
+def names(app, bind=None):
+    with app.app_context():
+        with db.engines[bind].connect() as conn:
+            return conn.execute(sa.select(Server.name).order_by(Server.name)).scalars().all()
+
+
+def test_replica_routes_read_from_the_replica_and_writes_go_to_the_primary(replicated):
+    client = replicated.test_client()
+    assert [server['name'] for server in client.get('/api/servers').get_json()] == ['replica-only']
+    consistent = client.get('/api/servers', headers={'X-Read-Consistency': 'primary'})
+    assert consistent.get_json() == []
+
+    created = client.post('/api/servers', json={
+        'name': 'web-1', 'hostname': 'web-1.example', 'ip_address': '10.0.0.2', 'username': 'deploy'
+    })
+    assert created.status_code == 201
+    assert names(replicated) == ['web-1']
+    assert names(replicated, REPLICA_BIND) == ['replica-only']
+    # Undecorated reads stay on the primary
+    assert client.get(f"/api/servers/{created.get_json()['id']}").status_code == 200
+
+
+def test_a_flush_moves_the_rest_of_the_request_to_the_primary(replicated):
+    def query():
+        return [server.name for server in Server.query.order_by(Server.name)]
+
+    with replicated.test_request_context('/api/servers'):
+        g.db_read_replica = True
+        assert query() == ['replica-only']
+        db.session.add(Server(name='web-1', hostname='web-1.example', ip_address='10.0.0.2', username='deploy'))
+        db.session.flush()
+        # Reads its own write
+        assert query() == ['web-1']
+        db.session.commit()
+
+    # Routing starts over with the next request
+    with replicated.test_request_context('/api/servers'):
+        assert query() == ['web-1']
+        g.db_read_replica = True
+        assert query() == ['replica-only']
+
+
+def test_sqlite_connections_are_tuned(app):
+    def pragma(name):
+        return db.session.execute(sa.text(f'PRAGMA {name}')).scalar()
+
+    assert pragma('journal_mode') == 'wal'
+    assert pragma('synchronous') == 1
+    assert pragma('busy_timeout') == SQLITE_BUSY_TIMEOUT_MS
+    assert pragma('foreign_keys') == 1
+    with pytest.raises(sa.exc.IntegrityError):
+        db.session.execute(sa.insert(Server.__table__).values(
+            name='web-1', hostname='web-1.example', ip_address='10.0.0.2', username='deploy', bastion_id=999
+        ))
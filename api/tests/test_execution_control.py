@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+import sqlalchemy as sa
+
+import src.utils.execution_control as execution_control
+from src.models.server import db, ExecutionLog
+from src.utils.execution_control import ExecutionControl, ExecutionStopped, final_status
+from src.utils.ssh_manager import get_ssh_manager
+
+from conftest import start_fleet
+
+
+def test_first_stop_reason_wins():
+    control = ExecutionControl(1)
+    stopped = []
+    control.on_stop(lambda: stopped.append('first'))
+    control.stop('deadline')
+    control.stop('cancelled')
+    control.on_stop(lambda: stopped.append('late'))
+    assert (control.stop_reason, stopped) == ('deadline', ['first', 'late'])
+    with pytest.raises(ExecutionStopped, match='deadline exceeded'):
+        control.check()
+
+
+def test_passed_deadline_stops_the_control():
+    control = ExecutionControl.with_timeout(1, 0.01)
+    assert control.stopped() is None
+    time.sleep(0.02)
+    assert (control.stopped(), control.remaining()) == ('deadline', 0.0)
+    assert ExecutionControl.with_timeout(1, 0).deadline is None
+
+
+def test_final_status():
+    assert final_status(ExecutionControl(1)) == 'completed'
+    deadline, cancelled = ExecutionControl(1), ExecutionControl(1)
+    deadline.stop('deadline')
+    cancelled.stop('cancelled')
+    assert final_status(deadline) == 'timed_out'
+    assert final_status(cancelled) == 'cancelled'
+    # A cancel that arrived after every host returned, or during a deadline stop
+    assert final_status(ExecutionControl(1), cancelling=True) == 'cancelled'
+    assert final_status(deadline, cancelling=True) == 'cancelled'
+
+
+def execute(client, command, servers, **body):
+    return client.post(f'/api/commands/{command.id}/execute?expand=true',
+                       json={'server_ids': [server.id for server in servers], **body})
+
+
+def statuses(response):
+    return {result['server_name'].split('-')[0]: (result['status'], result.get('stopped'))
+            for result in response.get_json()['results']}
+
+
+def test_deadline_times_out_hung_and_slow_hosts(client, fleet, make_fleet_servers, make_command):
+    servers = (make_fleet_servers(fleet, 'fast')[:1]
+               + make_fleet_servers(start_fleet(1, hang_rate=1.0, hang_seconds=10), 'hung')
+               + make_fleet_servers(start_fleet(1, command_ms=10000), 'slow'))
+
+    started = time.perf_counter()
+    response = execute(client, make_command(), servers, deadline_seconds=1)
+    assert time.perf_counter() - started < 3
+
+    body = response.get_json()
+    assert body['status'] == 'timed_out'
+    assert statuses(response) == {
+        'fast': ('success', None), 'hung': ('timed_out', 'deadline'), 'slow': ('timed_out', 'deadline')
+    }
+    slow = body['results'][2]
+    # Stopped mid-command: the output written so far is kept
+    assert slow['exit_code'] is None and slow['output'].startswith('simulated output line')
+    assert db.session.get(ExecutionLog, body['execution_id']).status == 'timed_out'
+
+
+def run_in_background(app, command, servers):
+    responses = []
+    url = f'/api/commands/{command.id}/execute?expand=true'
+    body = {'server_ids': [server.id for server in servers]}
+
+    def run():
+        responses.append(app.test_client().post(url, json=body))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, responses
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+
+def test_cancel_stops_running_hosts(app, client, make_fleet_servers, make_command):
+    servers = make_fleet_servers(start_fleet(2, command_ms=10000), 'slow')
+    admission = get_ssh_manager().admission
+    active = admission.stats()['active']
+    thread, responses = run_in_background(app, make_command(), servers)
+    wait_until(lambda: admission.stats()['active'] == active + 2)
+    execution_id = db.session.query(sa.func.max(ExecutionLog.id)).scalar()
+
+    response = client.post(f'/api/executions/{execution_id}/cancel')
+    assert (response.status_code, response.get_json()['status']) == (202, 'cancelling')
+    thread.join(5)
+
+    [result] = responses
+    assert result.get_json()['status'] == 'cancelled'
+    assert statuses(result) == {'slow': ('cancelled', 'cancelled')}
+    db.session.expire_all()
+    assert db.session.get(ExecutionLog, execution_id).status == 'cancelled'
+    assert client.post(f'/api/executions/{execution_id}/cancel').status_code == 409
+
+
+def test_cancel_from_another_process_is_picked_up_by_polling(app, make_fleet_servers, make_command, monkeypatch):
+    # Watch this test's database with a fast poll
+    monkeypatch.setattr(execution_control, 'EXECUTION_CANCEL_POLL_SECONDS', 0.05)
+    monkeypatch.setattr(execution_control, '_watcher', None)
+    servers = make_fleet_servers(start_fleet(1, command_ms=10000), 'slow')
+    thread, responses = run_in_background(app, make_command(), servers)
+    wait_until(lambda: execution_control._active)
+    [execution_id] = execution_control._active
+
+    # As the cancel route of another API instance would
+    ExecutionLog.query.filter(ExecutionLog.id == execution_id).update({'status': 'cancelling'})
+    db.session.commit()
+    thread.join(5)
+    assert responses[0].get_json()['status'] == 'cancelled'
+
+
+def test_only_command_executions_can_be_cancelled(client, make_execution):
+    playbook = make_execution(execution_type='playbook', status='running')
+    assert client.post(f'/api/executions/{playbook.id}/cancel').status_code == 400
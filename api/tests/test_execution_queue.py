@@ -0,0 +1,112 @@
+import json
+
+import fakeredis
+import pytest
+
+import src.routes.servers as servers_routes
+from src.models.server import db, ExecutionLog, ExecutionOutput, ServerHealthSample
+from src.utils.execution_queue import ExecutionQueue
+from src.worker import ExecutionWorker, finalize
+
+
+def target(server_id):
+    return {'server_id': server_id, 'server_name': f'web-{server_id}', 'hostname': f'web-{server_id}.example',
+            'port': 22, 'username': 'deploy', 'key_path': None, 'bastion': None}
+
+
+def success(entry):
+    return {'server_id': entry['server_id'], 'server_name': entry['server_name'], 'status': 'success',
+            'exit_code': 0, 'output': 'ok', 'error': '', 'timings_ms': {}, 'bytes': {'stdout': 2, 'stderr': 0}}
+
+
+@pytest.fixture
+def queue():
+    return ExecutionQueue(fakeredis.FakeRedis(decode_responses=True), stream='test:tasks', group='test-workers')
+
+
+def test_batches_merge_in_target_order_once_all_are_stored(queue):
+    assert queue.enqueue(7, [target(i) for i in range(1, 26)], 'uptime', 30, batch_size=10) == 3
+    tasks = queue.claim('worker-a', count=5, block_ms=10)
+    assert [(task.execution_id, task.batch, task.total, len(task.targets)) for task in tasks] == [
+        (7, 0, 3, 10), (7, 1, 3, 10), (7, 2, 3, 5)
+    ]
+
+    # Batches finish out of order; a redelivered batch keeps its first result
+    assert queue.store_result(tasks[2], [success(entry) for entry in tasks[2].targets]) is None
+    assert queue.store_result(tasks[0], [success(entry) for entry in tasks[0].targets]) is None
+    assert queue.store_result(tasks[0], []) is None
+    merged = queue.store_result(tasks[1], [success(entry) for entry in tasks[1].targets])
+    assert [entry['server_id'] for entry in merged['results']] == list(range(1, 26))
+    assert len(merged['outputs']) == 1
+
+    for task in tasks:
+        queue.ack(task)
+    assert queue.stats()['stream_length'] == 0 and queue.stats()['pending'] == 0
+
+
+def test_task_of_a_dead_worker_is_reclaimed(queue):
+    queue.enqueue(7, [target(1)], 'uptime', 30)
+    [task] = queue.claim('worker-a', block_ms=10)
+    assert queue.claim('worker-b', block_ms=10) == []
+
+    queue.visibility_timeout = 0
+    [reclaimed] = queue.claim('worker-b', block_ms=10)
+    assert (reclaimed.message_id, reclaimed.deliveries) == (task.message_id, 2)
+
+
+def test_queued_execution_runs_on_workers_and_finalizes(client, app, queue, fleet, make_fleet_servers, make_command,
+                                                       monkeypatch):
+    fleet_servers = make_fleet_servers(fleet)
+    monkeypatch.setattr(servers_routes, 'EXECUTION_BACKEND', 'queue')
+    monkeypatch.setattr(servers_routes, 'get_execution_queue', lambda: queue)
+    monkeypatch.setattr('src.utils.execution_queue.EXECUTION_BATCH_SIZE', 3)
+    command = make_command()
+    server_ids = [server.id for server in reversed(fleet_servers)]
+
+    response = client.post(f'/api/commands/{command.id}/execute', json={'server_ids': server_ids})
+    assert response.status_code == 202
+    execution_id = response.get_json()['execution_id']
+    assert ExecutionLog.query.get(execution_id).status == 'queued'
+
+    worker = ExecutionWorker(app, queue=queue, consumer='worker-a')
+    while True:
+        tasks = queue.claim(worker.consumer, count=1, block_ms=10)
+        if not tasks:
+            break
+        worker.process(tasks[0])
+
+    db.session.expire_all()
+    execution = ExecutionLog.query.get(execution_id)
+    assert (execution.status, execution.failed_hosts) == ('completed', 0)
+    stored = json.loads(execution.output)
+    assert [entry['server_id'] for entry in stored['results']] == server_ids
+    assert all(entry['exit_code'] == 0 for entry in stored['results'])
+    assert ExecutionOutput.query.filter_by(execution_id=execution_id).count() == 1
+    assert ServerHealthSample.query.count() == len(server_ids)
+    assert queue.redis.exists(f'executions:{execution_id}:results') == 0
+    assert queue.stats()['stream_length'] == 0
+
+
+def test_batch_past_max_deliveries_records_host_errors(app, queue, make_execution, monkeypatch):
+    execution = make_execution(status='queued')
+    queue.enqueue(execution.id, [target(1), target(2)], 'uptime', 30)
+    [task] = queue.claim('worker-a', block_ms=10)
+    task.deliveries = 4
+
+    ExecutionWorker(app, queue=queue, consumer='worker-a').process(task)
+    db.session.expire_all()
+    execution = ExecutionLog.query.get(execution.id)
+    assert (execution.status, execution.failed_hosts) == ('completed', 2)
+    assert {entry['status'] for entry in json.loads(execution.output)['results']} == {'error'}
+
+
+def test_finalize_is_a_no_op_the_second_time(app, make_execution):
+    from src.utils.execution_stats import compact_results
+
+    execution = make_execution(status='running')
+    results = compact_results([success(target(1))])
+    finalize(execution.id, results)
+    finalize(execution.id, compact_results([]))
+    db.session.expire_all()
+    assert json.loads(ExecutionLog.query.get(execution.id).output) == results
+    assert ExecutionOutput.query.count() == 1
@@ -0,0 +1,69 @@
+import json
+
+from src.utils.execution_stats import (
+    compact_results, expand_results, group_results, load_results, percentile, summarize_timings
+)
+
+
+def test_legacy_rows_keep_their_output():
+    # Stored before compaction, and before host results had an exit_code
+    legacy = [
+        {'server_id': 1, 'server_name': 'a', 'status': 'success', 'output': 'hello', 'error': ''},
+        {'server_id': 2, 'server_name': 'b', 'status': 'error', 'output': '', 'error': 'Connection refused'},
+    ]
+    assert expand_results(load_results(json.dumps(legacy))) == legacy
+
+
+def test_hosts_without_output_stay_without_output():
+    results = [
+        {'server_id': 1, 'status': 'success', 'exit_code': 0, 'output': 'up', 'error': ''},
+        {'server_id': 2, 'status': 'error', 'error': 'Connection refused'},
+        {'server_id': 3, 'status': 'success', 'exit_code': 0, 'output': 'up', 'error': ''},
+    ]
+    stored = compact_results(results)
+    assert len(stored['outputs']) == 2
+    assert expand_results(json.loads(json.dumps(stored))) == results
+    assert [group['hosts'] for group in group_results(stored)] == [2, 1]
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([7], 50) == percentile([7], 95) == 7
+    # Nearest rank: a percentile between two samples takes one of them
+    # rather than interpolating
+    assert percentile([40, 10, 30, 20], 50) == 20
+    assert percentile([10, 20, 30, 40], 70) == 30
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert percentile([10, 20], 0) == 10
+    assert percentile([10, 20], 100) == 20
+
+
+def timed(server_id, stdout=0, **timings_ms):
+    return {'server_id': server_id, 'status': 'success', 'exit_code': 0, 'output': '', 'error': '',
+            'timings_ms': timings_ms, 'bytes': {'stdout': stdout, 'stderr': 0}}
+
+
+def test_summarize_timings_leaves_out_phases_a_host_never_reached():
+    results = [
+        timed(1, stdout=10, connect=5.0, exec=100.0, total=110.0),
+        timed(2, stdout=30, connect=15.0, exec=300.0, total=320.0),
+        {'server_id': 3, 'status': 'error', 'error': 'Connection refused', 'timings_ms': {'connect': 50.0}},
+    ]
+    summary = summarize_timings(results)
+    assert summary['hosts'] == 3
+    assert summary['phases_ms'] == {
+        'connect': {'count': 3, 'p50': 15.0, 'p95': 50.0, 'max': 50.0},
+        'exec': {'count': 2, 'p50': 100.0, 'p95': 300.0, 'max': 300.0},
+        'total': {'count': 2, 'p50': 110.0, 'p95': 320.0, 'max': 320.0},
+    }
+    assert summary['bytes'] == {'stdout_total': 40, 'stderr_total': 0, 'stdout_max': 30, 'stderr_max': 0}
+    assert summarize_timings([])['phases_ms'] == {}
+
+
+def test_get_execution_includes_the_phase_breakdown(client, make_execution):
+    results = [timed(1, queue=1.0, kex=20.0, auth=4.0), timed(2, queue=3.0, kex=40.0, auth=6.0)]
+    execution = make_execution(status='completed', output=json.dumps(compact_results(results)))
+    summary = client.get(f'/api/executions/{execution.id}').get_json()['timing_summary']
+    assert sorted(summary['phases_ms']) == ['auth', 'kex', 'queue']
+    assert summary['phases_ms']['kex'] == {'count': 2, 'p50': 20.0, 'p95': 40.0, 'max': 40.0}
+    assert summary['hosts'] == 2
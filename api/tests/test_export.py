@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import src.utils.export as export
+from src.utils.execution_stats import compact_results
+
+
+def test_rows_are_streamed_in_chunks(app, monkeypatch):
+    monkeypatch.setattr(export, 'EXPORT_CHUNK_ROWS', 2)
+    produced = []
+
+    def rows():
+        for index in range(5):
+            produced.append(index)
+            yield {'id': index, 'target_servers': [index, index + 1]}
+
+    with app.test_request_context():
+        response = export.stream_export(rows(), 'ndjson', ['id'], 'rows')
+        assert response.is_streamed and produced == []
+        chunks = response.response
+        assert next(chunks) == '{"id":0,"target_servers":[0,1]}\n{"id":1,"target_servers":[1,2]}\n'
+        # Only the rows of the chunks sent so far have been read
+        assert produced == [0, 1]
+        assert len(list(chunks)) == 2
+
+    csv_chunks = list(export._csv_chunks(rows(), ['id', 'target_servers']))
+    assert len(csv_chunks) == 3
+    assert ''.join(csv_chunks).splitlines() == ['id,target_servers', '0,0 1', '1,1 2', '2,2 3', '3,3 4', '4,4 5']
+
+
+def test_execution_history_export(client, make_execution):
+    make_execution(status='completed', target_servers=[1, 2], started_at=datetime(2025, 6, 1), output='secret')
+    make_execution(status='failed', started_at=datetime(2025, 6, 2))
+    make_execution(status='completed', started_at=datetime(2025, 6, 3))
+
+    response = client.get('/api/executions/export', query_string={'status': 'completed', 'until': '2025-06-02'})
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'filename="executions.ndjson"' in response.headers['Content-Disposition']
+    [row] = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert (row['target_servers'], row['started_at']) == ([1, 2], '2025-06-01T00:00:00')
+    assert 'output' not in row
+
+    response = client.get('/api/executions/export', query_string={'format': 'csv', 'include_output': 'true'})
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['status'] for row in rows] == ['completed', 'failed', 'completed']
+    assert (rows[0]['target_servers'], rows[0]['output']) == ('1 2', 'secret')
+
+    assert client.get('/api/executions/export', query_string={'format': 'xml'}).status_code == 400
+    assert client.get('/api/executions/export', query_string={'since': 'yesterday'}).status_code == 400
+
+
+def test_host_results_export(client, make_execution):
+    results = [
+        {'server_id': 1, 'server_name': 'web-1', 'status': 'success', 'exit_code': 0, 'output': 'up, 3 days',
+         'error': '', 'timings_ms': {'total': 12.5}, 'bytes': {'stdout': 10, 'stderr': 0}},
+        {'server_id': 2, 'server_name': 'web-2', 'status': 'error', 'error': 'Connection refused',
+         'timings_ms': {}, 'bytes': {'stdout': 0, 'stderr': 0}},
+    ]
+    execution = make_execution(status='completed', output=json.dumps(compact_results(results)))
+
+    response = client.get(f'/api/executions/{execution.id}/results/export', query_string={'format': 'csv'})
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [list(row) for row in rows] == [export.HOST_RESULT_FIELDS] * 2
+    assert (rows[0]['output'], rows[0]['total_ms'], rows[1]['error']) == ('up, 3 days', '12.5', 'Connection refused')
+
+    lines = client.get(f'/api/executions/{execution.id}/results/export').get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == results
+
+    playbook = make_execution(execution_type='playbook', status='completed', output='{"job_id": 4}')
+    assert client.get(f'/api/executions/{playbook.id}/results/export').status_code == 400
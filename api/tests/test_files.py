@@ -0,0 +1,143 @@
+import hashlib
+import io
+import os
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import paramiko
+import pytest
+
+import src.routes.files as files
+from src.models.server import db
+from src.utils.ssh_manager import SSHManager
+
+
+class RemoteFile(io.BytesIO):
+    def __init__(self, host, path):
+        super().__init__()
+        self.host, self.path = host, path
+
+    def set_pipelined(self, pipelined):
+        pass
+
+    def __exit__(self, *exc_info):
+        self.host[self.path] = self.getvalue()
+        return super().__exit__(*exc_info)
+
+
+class SFTP:
+    def __init__(self, host):
+        self.host = host
+
+    def get_channel(self):
+        return SimpleNamespace(settimeout=lambda timeout: None)
+
+    def stat(self, path):
+        if path not in self.host:
+            raise IOError(path)
+        return SimpleNamespace(st_size=len(self.host[path]))
+
+    def open(self, path, mode):
+        return RemoteFile(self.host, path)
+
+    def chmod(self, path, mode):
+        pass
+
+    def posix_rename(self, source, destination):
+        self.host[destination] = self.host.pop(source)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def remote(tmp_path, monkeypatch):
+    """Files on each fake host, by hostname; SFTP writes land here"""
+    hosts = {}
+    manager = SSHManager(str(tmp_path / 'keys'))
+
+    @contextmanager
+    def session(hostname, port, username, **kwargs):
+        yield hosts.setdefault(hostname, {})
+
+    def run(host, command, timeout=300, **kwargs):
+        path = command.split(' ', 1)[1].strip("'")
+        return f'{hashlib.sha256(host[path]).hexdigest()}  {path}\n', '', 0
+
+    monkeypatch.setattr(manager, '_session', session)
+    monkeypatch.setattr(manager, '_run', run)
+    monkeypatch.setattr(paramiko.SFTPClient, 'from_transport', SFTP)
+    monkeypatch.setattr(files, 'get_ssh_manager', lambda: manager)
+    monkeypatch.setattr(files, 'UPLOADS_DIR', str(tmp_path / 'uploads'))
+    return hosts
+
+
+def distribute(client, server_ids, content, remote_path='/etc/app.conf'):
+    # Ids rather than servers: the route closes the session the test shares
+    return client.post('/api/files/distribute', data={
+        'file': (io.BytesIO(content), 'app.conf'),
+        'remote_path': remote_path,
+        'server_ids': ','.join(str(server_id) for server_id in server_ids),
+    }, content_type='multipart/form-data')
+
+
+def test_uploads_once_then_skips_matching_copies(client, make_server, remote, tmp_path):
+    servers = [make_server('web-1').id, make_server('web-2').id]
+
+    first = distribute(client, servers, b'workers = 4\n').get_json()
+    assert [result['status'] for result in first['results']] == ['uploaded', 'uploaded']
+    assert first['summary']['bytes_sent'] == 2 * len(b'workers = 4\n')
+    assert remote['web-1.example'] == {'/etc/app.conf': b'workers = 4\n'}
+    # The local copy of the upload is removed afterwards
+    assert os.listdir(tmp_path / 'uploads') == []
+
+    again = distribute(client, servers, b'workers = 4\n').get_json()
+    assert [result['status'] for result in again['results']] == ['skipped', 'skipped']
+    assert (again['summary']['skipped'], again['summary']['uploaded'], again['summary']['bytes_sent']) == (2, 0, 0)
+
+    # Same size, different content: only the checksum tells them apart
+    remote['web-2.example']['/etc/app.conf'] = b'workers = 8\n'
+    mixed = distribute(client, servers, b'workers = 4\n').get_json()
+    assert [result['status'] for result in mixed['results']] == ['skipped', 'uploaded']
+    assert remote['web-2.example']['/etc/app.conf'] == b'workers = 4\n'
+
+
+def test_missing_server_is_rejected_before_resolving_bastions(client, make_server, remote, monkeypatch):
+    server = make_server()
+
+    def bastion_params(servers):
+        raise AssertionError('bastions resolved for a request that is rejected')
+
+    monkeypatch.setattr(files, 'bastion_params', bastion_params)
+    response = client.post('/api/files/distribute', data={
+        'file': (io.BytesIO(b'x'), 'x'),
+        'remote_path': '/tmp/x',
+        'server_ids': f'{server.id},999',
+    }, content_type='multipart/form-data')
+    assert response.status_code == 404
+    assert response.get_json() == {'error': 'Servers not found: [999]'}
+    assert remote == {}
+
+
+def test_rejects_relative_remote_path(client, make_server):
+    response = distribute(client, [make_server().id], b'x', remote_path='app.conf')
+    assert response.status_code == 400
+
+
+def test_duplicate_ids_are_sent_once_without_holding_a_connection(client, make_server, remote, monkeypatch):
+    web1, web2 = make_server('web-1').id, make_server('web-2').id
+    manager = files.get_ssh_manager()
+    transfer = manager.distribute_file
+    in_transaction = []
+
+    def distribute_file(hosts, *args, **kwargs):
+        in_transaction.append(db.session().in_transaction())
+        return transfer(hosts, *args, **kwargs)
+
+    monkeypatch.setattr(manager, 'distribute_file', distribute_file)
+    response = distribute(client, [web2, web1, web2], b'x').get_json()
+    assert [(result['server_id'], result['server_name']) for result in response['results']] == [
+        (web2, 'web-2'), (web1, 'web-1')
+    ]
+    assert response['summary']['uploaded'] == 2
+    assert in_transaction == [False]
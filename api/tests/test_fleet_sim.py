@@ -0,0 +1,16 @@
+import paramiko
+
+
+def test_exec_reply_follows_request_acknowledgement(fleet):
+    # The reply used to race the exec acknowledgement and close the channel first
+    for attempt in range(20):
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(fleet.bind, port=fleet.ports[attempt % len(fleet.ports)], username='bench',
+                       password='bench', look_for_keys=False, allow_agent=False)
+        try:
+            _, stdout, _ = client.exec_command('uptime')
+            assert stdout.read().startswith(b'simulated output line')
+            assert stdout.channel.recv_exit_status() == 0
+        finally:
+            client.close()
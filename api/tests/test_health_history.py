@@ -0,0 +1,95 @@
+import json
+from datetime import datetime, timedelta
+
+from src.models.server import db, ExecutionLog, ServerHealthRollup, ServerHealthSample
+from src.utils.execution_stats import compact_results
+from src.utils.health_history import HealthRollups, choose_resolution, history, record_results
+from src.worker import finalize
+
+
+def host(server_id, **fields):
+    return {'server_id': server_id, 'status': 'success', 'exit_code': 0,
+            'timings_ms': {'connect': 2.0, 'kex': 10.0, 'auth': 5.0, 'exec': 1.0}, **fields}
+
+
+def test_record_results_samples_hosts_that_tried_to_connect(make_server):
+    servers = [make_server(f'web-{i}') for i in range(4)]
+    record_results([
+        host(servers[0].id),
+        {'server_id': servers[1].id, 'status': 'error', 'timings_ms': {'connect': 3000.0}},
+        # Rejected before contacting the host (open circuit): says nothing about it
+        {'server_id': servers[2].id, 'status': 'error', 'timings_ms': {}},
+        {'server_id': servers[3].id, 'status': 'skipped'}
+    ])
+    db.session.commit()
+
+    samples = {sample.server_id: sample for sample in ServerHealthSample.query}
+    assert set(samples) == {servers[0].id, servers[1].id}
+    assert samples[servers[0].id].ok and samples[servers[0].id].rtt_ms == 17.0
+    assert not samples[servers[1].id].ok and samples[servers[1].id].rtt_ms is None
+
+
+def test_finalize_keeps_results_of_server_deleted_during_run(make_server, make_execution):
+    kept, deleted = make_server('kept'), make_server('deleted')
+    execution = make_execution(status='running', target_servers=[kept.id, deleted.id])
+    deleted_id = deleted.id
+    db.session.delete(deleted)
+    db.session.commit()
+
+    results = compact_results([host(kept.id, output='up 3 days'), host(deleted_id, output='up 3 days')])
+    finalize(execution.id, results)
+
+    db.session.expire_all()
+    execution = db.session.get(ExecutionLog, execution.id)
+    assert execution.status == 'completed'
+    assert len(json.loads(execution.output)['results']) == 2
+    assert [sample.server_id for sample in ServerHealthSample.query] == [kept.id]
+
+
+def test_rollups_merge_levels_and_history_reads_them(make_server):
+    server = make_server()
+    start = datetime(2026, 1, 1, 10, 0)
+    for minute in range(120):
+        db.session.add(ServerHealthSample(server_id=server.id, ts=start + timedelta(minutes=minute, seconds=5),
+                                          ok=minute % 10 != 0, rtt_ms=10.0 if minute % 10 else None))
+    db.session.commit()
+
+    rollups = HealthRollups(None)
+    written, _ = rollups.tick(now=start + timedelta(hours=3))
+    assert written['1m'] == 120
+    assert written['1h'] == 2
+
+    hourly = ServerHealthRollup.query.filter_by(resolution='1h').order_by(ServerHealthRollup.bucket).all()
+    assert [(bucket.samples, bucket.ok) for bucket in hourly] == [(60, 54), (60, 54)]
+    # A second tick starts from the watermark and writes nothing new
+    assert rollups.tick(now=start + timedelta(hours=3))[0]['1m'] == 0
+
+    points = history(server.id, start, start + timedelta(hours=2), resolution='1h')['points']
+    assert [point['uptime'] for point in points] == [0.9, 0.9]
+    assert points[0]['rtt_avg'] == 10.0
+
+
+def test_choose_resolution_by_span():
+    now = datetime(2026, 1, 10)
+    assert choose_resolution(now - timedelta(hours=1), now, now) == 'raw'
+    assert choose_resolution(now - timedelta(hours=12), now, now) == '1m'
+    assert choose_resolution(now - timedelta(days=5), now, now) == '1h'
+
+
+def test_explicit_resolution_is_held_to_its_span(client, make_server):
+    server = make_server()
+    url = f'/api/servers/{server.id}/health-history'
+    until = datetime(2025, 11, 21)
+
+    def get(span, resolution):
+        return client.get(url, query_string={
+            'since': (until - span).isoformat(), 'until': until.isoformat(), 'resolution': resolution
+        })
+
+    assert get(timedelta(hours=2), 'raw').status_code == 200
+    too_long = get(timedelta(days=30), 'raw')
+    assert too_long.status_code == 400
+    assert 'raw serves at most 2:00:00' in too_long.get_json()['error']
+    assert get(timedelta(days=2), '1m').status_code == 400
+    assert get(timedelta(days=365), '1d').status_code == 200
+    assert get(timedelta(days=30), 'auto').status_code == 200
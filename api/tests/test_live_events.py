@@ -0,0 +1,89 @@
+import json
+import time
+
+import fakeredis
+
+import src.utils.live_events as live_events
+from src.utils.live_events import RESYNC, EventHub, get_event_hub
+
+
+def next_event(client, timeout=2):
+    message = client.get(timeout)
+    return json.loads(message) if message is not None else None
+
+
+def test_clients_get_only_their_topics():
+    hub = EventHub(backend='local')
+    servers = hub.connect(['servers'])
+    everything = hub.connect(['servers', 'executions'])
+
+    hub.publish('executions', 'execution.updated', {'id': 3, 'status': 'running'})
+    hub.publish('servers', 'server.deleted', {'id': 5})
+    assert next_event(everything)['data'] == {'id': 3, 'status': 'running'}
+    assert next_event(everything)['type'] == 'server.deleted'
+    assert next_event(servers) == {'topic': 'servers', 'type': 'server.deleted', 'data': {'id': 5}}
+    assert servers.get(0.01) is None
+
+    hub.disconnect(everything)
+    hub.publish('servers', 'server.deleted', {'id': 6})
+    assert everything.get(0.01) is None
+
+
+def test_slow_client_is_told_to_resync(monkeypatch):
+    monkeypatch.setattr(live_events, 'LIVE_EVENTS_CLIENT_BUFFER', 3)
+    hub = EventHub(backend='local')
+    client = hub.connect(['servers'])
+    for server_id in range(4):
+        hub.publish('servers', 'server.updated', {'id': server_id})
+    assert client.get(0.01) == RESYNC
+    assert client.get(0.01) is None
+
+
+def test_client_limit_and_off_backend():
+    hub = EventHub(backend='local', max_clients=1)
+    assert hub.connect(['servers']) is not None
+    assert hub.connect(['servers']) is None
+    assert EventHub(backend='off').connect(['servers']) is None
+
+
+def test_events_reach_clients_of_other_processes(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(live_events, 'get_redis',
+                        lambda: fakeredis.FakeRedis(server=server, decode_responses=True))
+    api_worker = EventHub(backend='redis', channel='test:live')
+    execution_worker = EventHub(backend='redis', channel='test:live')
+    client = api_worker.connect(['executions'])
+
+    # Wait for the subscription before publishing: pub/sub does not replay
+    deadline = time.monotonic() + 5
+    while not fakeredis.FakeRedis(server=server).pubsub_numsub('test:live')[0][1]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    execution_worker.publish('servers', 'server.updated', {'id': 1})
+    execution_worker.publish('executions', 'execution.updated', {'id': 9, 'status': 'completed'})
+    assert next_event(client) == {'topic': 'executions', 'type': 'execution.updated',
+                                  'data': {'id': 9, 'status': 'completed'}}
+    assert client.get(0.05) is None
+
+
+def test_api_changes_are_published(client, make_execution):
+    hub = get_event_hub()
+    events = hub.connect(['servers', 'executions'])
+    try:
+        created = client.post('/api/servers', json={
+            'name': 'web-9', 'hostname': 'web-9.example', 'ip_address': '10.0.0.9', 'username': 'deploy'
+        }).get_json()
+        event = next_event(events)
+        assert (event['type'], event['data']['id'], event['data']['name']) == ('server.updated', created['id'], 'web-9')
+
+        client.delete(f"/api/servers/{created['id']}")
+        assert next_event(events) == {'topic': 'servers', 'type': 'server.deleted', 'data': {'id': created['id']}}
+
+        execution = make_execution(status='running', target_servers=None)
+        live_events.publish_execution(execution.id)
+        event = next_event(events)
+        assert (event['data']['id'], event['data']['status'], event['data']['target_servers']) == (
+            execution.id, 'running', []
+        )
+    finally:
+        hub.disconnect(events)
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+
+import requests
+from prometheus_client.parser import text_string_to_metric_families
+
+from src.utils.awx_client import AWXClient
+from src.utils.metrics import awx_endpoint_label
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def scrape(client):
+    """Samples of a /metrics scrape, by (name, sorted labels)"""
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.get_data(as_text=True))
+        for sample in family.samples
+    }
+
+
+def delta(before, after, name, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    return after.get(key, 0) - before.get(key, 0)
+
+
+def test_scrape_after_an_execution(client, fleet, make_fleet_servers, make_command):
+    servers = make_fleet_servers(fleet)
+    command = make_command()
+    body = {'server_ids': [server.id for server in servers]}
+    before = scrape(client)
+    response = client.post(f'/api/commands/{command.id}/execute', json=body)
+    assert response.status_code == 200
+    after = scrape(client)
+
+    route = '/api/commands/<int:command_id>/execute'
+    assert delta(before, after, 'api_http_request_duration_seconds_count',
+                 method='POST', route=route, status='200') == 1
+    assert delta(before, after, 'api_http_request_duration_seconds_bucket',
+                 method='POST', route=route, status='200', le='+Inf') == 1
+    for phase in ('connect', 'kex', 'auth', 'exec'):
+        assert delta(before, after, 'api_ssh_phase_duration_seconds_count', phase=phase, outcome='success') == 4
+    assert delta(before, after, 'api_db_queries_per_request_count') >= 1
+    # The request leaves nothing in flight; stopped executions of earlier
+    # tests may still be winding down, which only lowers the gauges
+    for gauge in ('api_executions_in_flight', 'api_ssh_sessions_in_flight'):
+        assert (gauge, ()) in after
+        assert delta(before, after, gauge) <= 0
+    assert after[('api_db_pool_connections_checked_out', ())] >= 0
+
+
+def test_multiprocess_registry_aggregates_worker_files(client, tmp_path, monkeypatch):
+    # Not tmp_path itself, which holds the test database
+    metrics_dir = tmp_path / 'prometheus'
+    metrics_dir.mkdir()
+    observe = ("from src.utils.metrics import EXECUTIONS_IN_FLIGHT, observe_ssh_phase_seconds; "
+               "observe_ssh_phase_seconds('exec', 'success', 0.2); EXECUTIONS_IN_FLIGHT.inc()")
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(metrics_dir))
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', observe], cwd=API_DIR, env=env, check=True)
+    assert any(name.startswith('histogram_') for name in os.listdir(metrics_dir))
+
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(metrics_dir))
+    samples = scrape(client)
+    assert samples[('api_ssh_phase_duration_seconds_count', (('outcome', 'success'), ('phase', 'exec')))] == 2
+    assert samples[('api_ssh_phase_duration_seconds_sum', (('outcome', 'success'), ('phase', 'exec')))] == 0.4
+    # livesum: one series summed over the processes' files
+    assert samples[('api_executions_in_flight', ())] == 2
+
+
+class Response:
+    status_code = 200
+    content = b'{"results": []}'
+    text = content.decode()
+
+    def json(self):
+        return {'results': []}
+
+
+def test_awx_requests_are_timed_by_endpoint_and_outcome(client, monkeypatch):
+    awx = AWXClient('http://awx.example')
+    outcomes = [Response(), requests.ConnectionError('refused')]
+
+    def request(**kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(awx.session, 'request', request)
+    before = scrape(client)
+    assert awx._make_request('GET', '/job_templates/12/') == {'results': []}
+    assert awx._make_request('POST', '/job_templates/12/launch/') is None
+    after = scrape(client)
+
+    name = 'api_awx_request_duration_seconds_count'
+    assert delta(before, after, name, method='GET', endpoint='/job_templates/:id/', outcome='200') == 1
+    assert delta(before, after, name, method='POST', endpoint='/job_templates/:id/launch/', outcome='error') == 1
+    assert awx_endpoint_label('inventories/3/hosts') == '/inventories/:id/hosts/'
@@ -0,0 +1,96 @@
+import os
+
+from src.utils.output_capture import OUTPUT_HEAD_BYTES, OUTPUT_TAIL_BYTES, StreamCapture
+
+from conftest import start_fleet
+
+
+def capture(data, chunk_size, **kwargs):
+    stream = StreamCapture('stdout', **kwargs)
+    for start in range(0, len(data), chunk_size):
+        stream.write(data[start:start + chunk_size])
+    stream.close()
+    return stream
+
+
+def test_short_output_is_kept_whole_across_split_characters():
+    data = 'héllo → wörld\n'.encode() * 3
+    for chunk_size in (1, 2, 3, 7):
+        stream = capture(data, chunk_size, head_bytes=5, tail_bytes=100)
+        assert not stream.truncated
+        assert stream.text() == data.decode()
+
+
+def test_long_output_keeps_head_and_tail():
+    data = bytes(range(48, 58)) * 10
+    stream = capture(data, 7, head_bytes=10, tail_bytes=10)
+    assert stream.truncated and stream.total == 100
+    assert stream.text() == '0123456789\n[... 80 bytes truncated ...]\n0123456789'
+
+
+def test_tail_starts_at_a_whole_character():
+    data = b'a' * 20 + 'é'.encode() * 10
+    stream = capture(data, 3, head_bytes=4, tail_bytes=5)
+    # The 5-byte tail begins with the second half of an 'é'
+    assert stream.text() == 'aaaa\n[... 31 bytes truncated ...]\néé'
+
+
+def files_in(directory):
+    return [name for _, _, names in os.walk(directory) for name in names]
+
+
+def test_spill_file_keeps_every_byte_until_the_capture_exits(tmp_path):
+    data = os.urandom(5000)
+    with StreamCapture('stdout', head_bytes=100, tail_bytes=100, spill_dir=str(tmp_path)) as stream:
+        for start in range(0, len(data), 512):
+            stream.write(data[start:start + 512])
+        stream.close()
+        assert stream.truncated
+        with open(stream.spill_path, 'rb') as spilled:
+            assert spilled.read() == data
+    assert files_in(tmp_path) == []
+    assert os.listdir(tmp_path) == []
+
+
+def test_spill_file_is_removed_when_reading_fails(tmp_path):
+    try:
+        with StreamCapture('stderr', spill_dir=str(tmp_path)) as stream:
+            stream.write(b'partial')
+            raise ConnectionResetError('channel closed')
+    except ConnectionResetError:
+        pass
+    assert files_in(tmp_path) == []
+
+
+def test_executions_leave_no_spill_files(tmp_path, fleet, monkeypatch):
+    from src.utils import output_capture
+    from src.utils.admission import AdmissionController
+    from src.utils.circuit_breaker import CircuitBreaker
+    from src.utils.ssh_manager import SSHManager
+
+    spill_dir = tmp_path / 'spill'
+    monkeypatch.setattr(output_capture, 'OUTPUT_SPILL_DIR', str(spill_dir))
+    manager = SSHManager(str(tmp_path / 'keys'), admission=AdmissionController(), circuits=CircuitBreaker())
+    result = manager.execute_command(fleet.bind, fleet.ports[0], 'bench', 'uptime', password='bench')
+    assert result['exit_code'] == 0 and result['output']
+    assert 'spill_paths' not in result
+    # Spilled, then cleaned up
+    assert spill_dir.is_dir() and files_in(spill_dir) == []
+
+
+def test_large_host_output_is_truncated(tmp_path):
+    from src.utils.admission import AdmissionController
+    from src.utils.circuit_breaker import CircuitBreaker
+    from src.utils.ssh_manager import SSHManager
+
+    size = 2 * (OUTPUT_HEAD_BYTES + OUTPUT_TAIL_BYTES)
+    chatty = start_fleet(1, output_bytes=size)
+    manager = SSHManager(str(tmp_path), admission=AdmissionController(), circuits=CircuitBreaker())
+
+    result = manager.execute_command(chatty.bind, chatty.ports[0], 'bench', 'cat big.log', password='bench')
+    assert result['exit_code'] == 0
+    assert result['bytes']['stdout'] == size
+    assert result['truncated'] == {'stdout': True, 'stderr': False}
+    dropped = size - OUTPUT_HEAD_BYTES - OUTPUT_TAIL_BYTES
+    assert f'[... {dropped} bytes truncated ...]' in result['output']
+    assert len(result['output']) < OUTPUT_HEAD_BYTES + OUTPUT_TAIL_BYTES + 100
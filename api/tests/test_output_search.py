@@ -0,0 +1,52 @@
+from src.models.server import db
+from src.utils.execution_stats import compact_results
+from src.utils.output_search import headline_snippet, index_outputs, snippet
+
+
+def test_snippet_escapes_output_around_highlights():
+    content = '<script>alert(1)</script> error: disk <full> & done'
+    assert snippet(content, ['<full>']) == (
+        '&lt;script&gt;alert(1)&lt;/script&gt; error: disk <mark>&lt;full&gt;</mark> &amp; done'
+    )
+
+
+def test_snippet_highlights_every_term_and_elides():
+    content = 'x' * 100 + ' Disk full, disk FULL ' + 'y' * 100
+    excerpt = snippet(content, ['disk', 'full'], context=20)
+    assert excerpt.startswith('...') and excerpt.endswith('...')
+    assert excerpt.count('<mark>') == 4
+    assert '<mark>Disk</mark> <mark>full</mark>' in excerpt
+
+
+def test_snippet_without_match_is_escaped():
+    assert snippet('<b>', ['missing']) == '&lt;b&gt;'
+
+
+def test_headline_snippet_keeps_only_its_own_highlights():
+    assert headline_snippet('<mark> a <b>') == '&lt;mark&gt; a <mark>&lt;b&gt;</mark>'
+
+
+def test_search_route(client, make_execution):
+    execution = make_execution(status='completed')
+    results = compact_results([
+        {'server_id': 1, 'status': 'success', 'exit_code': 1, 'output': '', 'error': 'No space left on <device>'},
+        {'server_id': 2, 'status': 'success', 'exit_code': 1, 'output': '', 'error': 'No space left on <device>'},
+        {'server_id': 3, 'status': 'success', 'exit_code': 0, 'output': 'fine', 'error': ''},
+    ])
+    index_outputs(execution.id, results)
+    db.session.commit()
+
+    response = client.get('/api/executions/search', query_string={'q': 'no SPACE'})
+    assert response.status_code == 200
+    [match] = response.get_json()['matches']
+    assert match['execution_id'] == execution.id
+    assert sorted(match['server_ids']) == [1, 2]
+    assert match['snippet'] == '<mark>No space</mark> left on &lt;device&gt;'
+
+    words = client.get('/api/executions/search', query_string={'q': 'left device', 'mode': 'text'}).get_json()
+    assert len(words['matches']) == 1
+    assert client.get('/api/executions/search', query_string={'q': '100%'}).get_json()['matches'] == []
+    assert client.get('/api/executions/search').status_code == 400
+    for limit in (0, -5):
+        clamped = client.get('/api/executions/search', query_string={'q': 'space', 'limit': limit})
+        assert len(clamped.get_json()['matches']) == 1
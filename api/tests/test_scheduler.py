@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+import src.utils.scheduler as scheduler
+from src.models.server import db, ExecutionLog, Schedule
+from src.utils.scheduler import Scheduler
+
+NOW = datetime(2025, 12, 1, 12, 0)
+
+
+def make_schedule(make_command, name):
+    command = make_command(name=name)
+    schedule = Schedule(name=name, command_id=command.id, cron_expression='*/5 * * * *',
+                        target_selector={'server_ids': []}, next_run_at=NOW - timedelta(minutes=1))
+    db.session.add(schedule)
+    db.session.commit()
+    return schedule.id
+
+
+def test_failing_schedule_does_not_stop_the_others(app, make_command, monkeypatch):
+    broken = make_schedule(make_command, 'broken')
+    healthy = make_schedule(make_command, 'healthy')
+
+    def fire(self, schedule_id, now=None):
+        execution = ExecutionLog(execution_type='command', status='running')
+        db.session.add(execution)
+        db.session.flush()
+        if schedule_id == broken:
+            raise RuntimeError('target lookup failed')
+        db.session.commit()
+        return execution.id
+
+    monkeypatch.setattr(Scheduler, 'fire', fire)
+    assert Scheduler(app).tick(NOW) == [healthy]
+    # The broken run's half-written execution was rolled back
+    assert ExecutionLog.query.count() == 1
+    # Both were claimed: the broken run is not retried on every tick
+    assert {schedule.next_run_at for schedule in Schedule.query} == {datetime(2025, 12, 1, 12, 5)}
+
+
+def test_run_claimed_by_another_instance_is_not_fired(app, make_command, monkeypatch):
+    schedule_id = make_schedule(make_command, 'nightly')
+    fired = []
+    monkeypatch.setattr(Scheduler, 'fire', lambda self, schedule_id, now=None: fired.append(schedule_id) or 1)
+
+    next_run_after = scheduler.next_run_after
+
+    def claimed_elsewhere(cron_expression, base):
+        # Another instance claims the run between our read and our update
+        with db.engine.begin() as connection:
+            connection.execute(sa.update(Schedule).where(Schedule.id == schedule_id).values(
+                next_run_at=datetime(2025, 12, 1, 12, 5)
+            ))
+        return next_run_after(cron_expression, base)
+
+    monkeypatch.setattr(scheduler, 'next_run_after', claimed_elsewhere)
+    assert Scheduler(app).tick(NOW) == []
+    assert fired == []
+
+
+def test_due_run_fires_once(app, make_command, monkeypatch):
+    schedule_id = make_schedule(make_command, 'nightly')
+    fired = []
+    monkeypatch.setattr(Scheduler, 'fire', lambda self, schedule_id, now=None: fired.append(schedule_id) or 1)
+    assert Scheduler(app).tick(NOW) == [schedule_id]
+    assert Scheduler(app).tick(NOW) == []
+    assert fired == [schedule_id]
+
+
+def test_count_fields_must_be_integers_not_booleans(client, make_command):
+    command = make_command()
+    body = {'name': 'nightly', 'command_id': command.id, 'cron_expression': '0 3 * * *',
+            'target_selector': {'tags': ['web']}}
+
+    for field, value in (('max_concurrency', True), ('jitter_seconds', False), ('max_concurrency', 0),
+                         ('max_concurrency', 2.5)):
+        response = client.post('/api/schedules', json={**body, field: value})
+        assert response.status_code == 400
+        assert response.get_json() == {'error': f'Invalid {field}: {value}'}
+
+    created = client.post('/api/schedules', json={**body, 'max_concurrency': 1, 'jitter_seconds': 0})
+    assert created.status_code == 201
+    assert created.get_json()['max_concurrency'] == 1
@@ -0,0 +1,75 @@
+import paramiko
+import pytest
+
+from src.utils.ssh_manager import SSHManager
+
+
+class SFTP:
+    def __init__(self):
+        self.files = {}
+
+    def putfo(self, fileobj, path):
+        self.files[path] = fileobj.read()
+
+    def chmod(self, path, mode):
+        pass
+
+    def posix_rename(self, source, destination):
+        self.files[destination] = self.files.pop(source)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    manager = SSHManager(str(tmp_path))
+    sftp = SFTP()
+    monkeypatch.setattr(paramiko.SFTPClient, 'from_transport', lambda transport: sftp)
+    manager.sftp = sftp
+    return manager
+
+
+def script_host(manager, monkeypatch, test_exit_code):
+    commands = []
+
+    def run(transport, command, timeout=300, **kwargs):
+        commands.append(command)
+        if command.startswith('test -x'):
+            return '', '', test_exit_code
+        return '', '', 0
+
+    monkeypatch.setattr(manager, '_run', run)
+    return commands
+
+
+def test_present_script_is_not_uploaded(manager, monkeypatch):
+    commands = script_host(manager, monkeypatch, 0)
+    command = manager._cached_script(None, '#!/bin/sh\nuptime\n', timeout=5)
+    assert len(commands) == 1 and manager.sftp.files == {}
+    assert command.startswith("./.cache/server-automation/scripts/")
+
+
+@pytest.mark.parametrize('exit_code', [1, 2, 127])
+def test_any_failed_check_uploads_the_script(manager, monkeypatch, exit_code):
+    commands = script_host(manager, monkeypatch, exit_code)
+    command = manager._cached_script(None, 'uptime\n', timeout=5)
+    assert commands[1].startswith('mkdir -p')
+    [(path, body)] = manager.sftp.files.items()
+    assert body == b'uptime\n' and path in command
+
+
+def test_unfinished_check_raises(manager, monkeypatch):
+    script_host(manager, monkeypatch, None)
+    with pytest.raises(paramiko.SSHException):
+        manager._cached_script(None, 'uptime\n', timeout=5)
+    assert manager.sftp.files == {}
+
+
+def test_script_cache_that_cannot_be_created_raises(manager, monkeypatch):
+    def run(transport, command, timeout=300, **kwargs):
+        return '', 'mkdir: Permission denied\n', 1
+
+    monkeypatch.setattr(manager, '_run', run)
+    with pytest.raises(paramiko.SSHException, match='Permission denied'):
+        manager._cached_script(None, 'uptime\n', timeout=5)
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+from flask import jsonify
+
+import src.utils.serialization as serialization
+from src.models.server import db, CustomCommand, CustomPlaybook, ExecutionLog, Server
+
+
+@pytest.fixture
+def rows(make_server, make_command, make_execution):
+    make_server('web-1', tags=None, last_ping=datetime(2025, 11, 3, 9, 30, 15, 250))
+    make_server('web-2', tags=['prod', 'eu-west'], description='Zürich rack 2   \x7f', port=2222)
+    make_server('web-3', tags=[], ip_address='2001:db8::1', last_ping=datetime(2025, 11, 3, 9, 30))
+    command = make_command('uptime', description=None)
+    make_command('disk', 'df -h', description='Espace libre — /', run_as_script=True)
+    db.session.add_all([
+        CustomPlaybook(name='deploy', file_path='/playbooks/deploy.yml', variables=None),
+        CustomPlaybook(name='tune', file_path='/playbooks/tune.yml',
+                       variables={'workers': 4, 'ratio': 0.75, 'limit': 1e16, 'zone': 'é', 'nested': {'b': 1, 'a': [2.5]}}),
+    ])
+    db.session.commit()
+    make_execution(command_id=command.id, target_servers=None, status='running',
+                   started_at=datetime(2025, 11, 3, 9, 0, 0, 1))
+    make_execution(command_id=command.id, target_servers=[3, 1], status='completed', output='[{"server_id": 1}]',
+                   started_at=datetime(2025, 11, 3, 10, 0), completed_at=datetime(2025, 11, 3, 10, 0, 5, 123456))
+
+
+def previous_body(objects):
+    """The body the list routes sent when they used to_dict and jsonify"""
+    return jsonify([obj.to_dict() for obj in objects]).get_data()
+
+
+@pytest.mark.parametrize('url, objects', [
+    ('/api/servers', lambda: Server.query.all()),
+    ('/api/commands', lambda: CustomCommand.query.all()),
+    ('/api/playbooks', lambda: CustomPlaybook.query.all()),
+    ('/api/executions', lambda: ExecutionLog.query.order_by(ExecutionLog.started_at.desc()).limit(100).all()),
+])
+@pytest.mark.parametrize('chunk_rows', [1000, 1])
+def test_list_bodies_match_to_dict(client, rows, monkeypatch, url, objects, chunk_rows):
+    # One chunk is sent whole; a chunk of one row streams every list here
+    monkeypatch.setattr(serialization, 'LIST_CHUNK_ROWS', chunk_rows)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert ('Content-Length' in response.headers) == (chunk_rows == 1000)
+    assert response.mimetype == 'application/json'
+    assert response.get_data() == previous_body(objects())
+
+
+def test_dumps_without_orjson(monkeypatch):
+    data = {'b': [1e16, 'é'], 'a': datetime(2025, 11, 3, 9, 30)}
+    with_orjson = serialization.dumps(data)
+    monkeypatch.setattr(serialization, 'orjson', None)
+    assert serialization.dumps(data) == with_orjson == b'{"a":"2025-11-03T09:30:00","b":[1e+16,"\\u00e9"]}'
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+import sqlalchemy as sa
+
+from src.models.server import db, Server
+from src.utils.write_batcher import WriteBatcher
+
+
+def add_server(name):
+    def write():
+        db.session.execute(sa.insert(Server.__table__).values(
+            name=name, hostname=f'{name}.example', ip_address='10.0.0.1', username='deploy'
+        ))
+    return write
+
+
+def server_names():
+    db.session.expire_all()
+    return sorted(db.session.execute(sa.select(Server.name)).scalars())
+
+
+@pytest.fixture
+def batcher(app, monkeypatch):
+    """A WriteBatcher of at most 3 writes that records each batch's size"""
+    batcher = WriteBatcher(app, max_batch=3)
+    batcher.batches = []
+    apply = batcher._apply
+
+    def record(batch):
+        batcher.batches.append(len(batch))
+        apply(batch)
+
+    monkeypatch.setattr(batcher, '_apply', record)
+    return batcher
+
+
+def submit_all(batcher, writes):
+    errors = {}
+
+    def submit(index, write):
+        try:
+            batcher.submit(write)
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=submit, args=(index, write)) for index, write in enumerate(writes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_a_lone_write_is_committed_without_waiting_for_more(batcher):
+    started = time.perf_counter()
+    batcher.submit(add_server('web-1'))
+    assert time.perf_counter() - started < 0.5
+    assert batcher.batches == [1]
+    assert server_names() == ['web-1']
+
+
+def test_queued_writes_are_committed_in_batches_of_at_most_max_batch(batcher):
+    # Hold the writer so the next writes queue up behind it
+    release = threading.Event()
+    blocker = threading.Thread(target=batcher.submit, args=(release.wait,))
+    blocker.start()
+    while not batcher.batches:
+        time.sleep(0.01)
+
+    writes = [add_server(f'web-{index}') for index in range(7)]
+    submitting = threading.Thread(target=submit_all, args=(batcher, writes))
+    submitting.start()
+    while batcher._queue.qsize() < 7:
+        time.sleep(0.01)
+    release.set()
+    submitting.join()
+    blocker.join()
+
+    assert batcher.batches[0] == 1
+    assert batcher.batches[1:] == [3, 3, 1]
+    assert len(server_names()) == 7
+
+
+def test_a_failed_write_raises_to_its_caller_only(batcher):
+    batcher.submit(add_server('web-1'))
+    release = threading.Event()
+    blocker = threading.Thread(target=batcher.submit, args=(release.wait,))
+    blocker.start()
+    while len(batcher.batches) < 2:
+        time.sleep(0.01)
+
+    # The duplicate fails the batch; each write is then retried on its own
+    writes = [add_server('web-2'), add_server('web-1'), add_server('web-3')]
+    result = {}
+    submitting = threading.Thread(target=lambda: result.update(errors=submit_all(batcher, writes)))
+    submitting.start()
+    while batcher._queue.qsize() < 3:
+        time.sleep(0.01)
+    release.set()
+    submitting.join()
+    blocker.join()
+
+    [(index, error)] = result['errors'].items()
+    assert index == 1 and isinstance(error, sa.exc.IntegrityError)
+    assert batcher.batches[2:] == [3, 1, 1, 1]
+    assert server_names() == ['web-1', 'web-2', 'web-3']
@@ -10,6 +10,10 @@ import { Checkbox } from './ui/checkbox'
 import { Plus, Terminal, Edit, Trash2, Play } from 'lucide-react'
 import { useToast } from './ui/use-toast'
 
+// crypto.randomUUID is only available on HTTPS and localhost
+const newIdempotencyKey = () =>
+  window.crypto?.randomUUID?.() ?? `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+
 export function CommandsPage() {
   const [commands, setCommands] = useState([])
   const [servers, setServers] = useState([])
@@ -19,15 +23,23 @@ export function CommandsPage() {
   const [editingCommand, setEditingCommand] = useState(null)
   const [executingCommand, setExecutingCommand] = useState(null)
   const [selectedServers, setSelectedServers] = useState([])
+  // One key per distinct request: double-clicks and retries reuse it, so the server runs it once
+  const [idempotencyKey, setIdempotencyKey] = useState(null)
+  const [submitting, setSubmitting] = useState(false)
   const { toast } = useToast()
 
   const [formData, setFormData] = useState({
     name: '',
     description: '',
     command: '',
-    timeout: 300
+    timeout: 300,
+    run_as_script: false
   })
 
+  useEffect(() => {
+    setIdempotencyKey(newIdempotencyKey())
+  }, [executingCommand, selectedServers])
+
   useEffect(() => {
     fetchCommands()
     fetchServers()
@@ -108,7 +120,8 @@ export function CommandsPage() {
       name: command.name,
       description: command.description || '',
       command: command.command,
-      timeout: command.timeout
+      timeout: command.timeout,
+      run_as_script: command.run_as_script || false
     })
     setDialogOpen(true)
   }
@@ -159,11 +172,13 @@ export function CommandsPage() {
       return
     }
 
+    setSubmitting(true)
     try {
       const response = await fetch(`/api/commands/${executingCommand.id}/execute`, {
         method: 'POST',
         headers: {
-          'Content-Type': 'application/json'
+          'Content-Type': 'application/json',
+          'Idempotency-Key': idempotencyKey
         },
         body: JSON.stringify({
           server_ids: selectedServers,
@@ -175,7 +190,11 @@ export function CommandsPage() {
         const result = await response.json()
         toast({
           title: "Success",
-          description: `Command executed on ${selectedServers.length} server(s)`
+          description: result.coalesced
+            ? `Already running as execution #${result.execution_id}`
+            : result.status === 'queued'
+              ? `Command queued for ${selectedServers.length} server(s)`
+              : `Command executed on ${selectedServers.length} server(s)`
         })
         setExecuteDialogOpen(false)
         setSelectedServers([])
@@ -193,6 +212,8 @@ export function CommandsPage() {
         description: "Failed to execute command",
         variant: "destructive"
       })
+    } finally {
+      setSubmitting(false)
     }
   }
 
@@ -201,7 +222,8 @@ export function CommandsPage() {
       name: '',
       description: '',
       command: '',
-      timeout: 300
+      timeout: 300,
+      run_as_script: false
     })
     setEditingCommand(null)
   }
@@ -285,6 +307,16 @@ export function CommandsPage() {
                     className="col-span-3"
                   />
                 </div>
+                <div className="grid grid-cols-4 items-center gap-4">
+                  <div className="col-start-2 col-span-3 flex items-center space-x-2">
+                    <Checkbox
+                      id="run_as_script"
+                      checked={formData.run_as_script}
+                      onCheckedChange={(checked) => setFormData({...formData, run_as_script: checked === true})}
+                    />
+                    <Label htmlFor="run_as_script">Upload once and run as a cached script</Label>
+                  </div>
+                </div>
               </div>
               <DialogFooter>
                 <Button type="submit">
@@ -335,7 +367,7 @@ export function CommandsPage() {
           <DialogFooter>
             <Button 
               onClick={handleExecuteCommand}
-              disabled={selectedServers.length === 0}
+              disabled={selectedServers.length === 0 || submitting}
             >
               Execute on {selectedServers.length} server(s)
             </Button>
@@ -1,46 +1,61 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from './ui/card'
 import { Badge } from './ui/badge'
 import { Server, Terminal, FileText, Activity, AlertCircle, CheckCircle } from 'lucide-react'
+import { useLiveEvents } from '../hooks/use-live-events'
+
+// The summary is cached server-side for a few seconds; refreshing more often gains nothing
+const REFRESH_INTERVAL_MS = 5000
 
 export function Dashboard() {
   const [stats, setStats] = useState({
     servers: { total: 0, active: 0, error: 0 },
     commands: { total: 0 },
     playbooks: { total: 0 },
-    executions: { total: 0, recent: [] }
+    executions: { total: 0, last24h: 0, failed24h: 0, recent: [] },
+    topFailing: []
   })
 
+  const refreshTimer = useRef(null)
+
   useEffect(() => {
     fetchDashboardData()
+    return () => clearTimeout(refreshTimer.current)
   }, [])
 
+  // Refresh on pushed changes, at most once per REFRESH_INTERVAL_MS
+  const scheduleRefresh = () => {
+    if (refreshTimer.current === null) {
+      refreshTimer.current = setTimeout(() => {
+        refreshTimer.current = null
+        fetchDashboardData()
+      }, REFRESH_INTERVAL_MS)
+    }
+  }
+  useLiveEvents('servers', scheduleRefresh)
+  useLiveEvents('executions', scheduleRefresh)
+
   const fetchDashboardData = async () => {
     try {
-      // Fetch servers
-      const serversResponse = await fetch('/api/servers')
-      const servers = await serversResponse.json()
-      
-      // Fetch commands
-      const commandsResponse = await fetch('/api/commands')
-      const commands = await commandsResponse.json()
-      
-      // Fetch executions
-      const executionsResponse = await fetch('/api/executions')
-      const executions = await executionsResponse.json()
+      const response = await fetch('/api/dashboard/summary')
+      const summary = await response.json()
+      const sum = (counts) => Object.values(counts).reduce((total, count) => total + count, 0)
 
       setStats({
         servers: {
-          total: servers.length,
-          active: servers.filter(s => s.status === 'active').length,
-          error: servers.filter(s => s.status === 'error').length
+          total: summary.servers.total,
+          active: summary.servers.by_status.active || 0,
+          error: summary.servers.by_status.error || 0
         },
-        commands: { total: commands.length },
-        playbooks: { total: 0 }, // Will be implemented later
+        commands: { total: summary.commands.total },
+        playbooks: { total: summary.playbooks.total },
         executions: { 
-          total: executions.length,
-          recent: executions.slice(0, 5)
-        }
+          total: sum(summary.executions.total),
+          last24h: sum(summary.executions['24h']),
+          failed24h: summary.executions['24h'].failed || 0,
+          recent: summary.recent_executions
+        },
+        topFailing: summary.top_failing_commands
       })
     } catch (error) {
       console.error('Failed to fetch dashboard data:', error)
@@ -72,7 +87,7 @@ export function Dashboard() {
     {
       title: 'Executions',
       value: stats.executions.total,
-      description: 'Total executions',
+      description: `${stats.executions.last24h} in the last 24h, ${stats.executions.failed24h} failed`,
       icon: Activity,
       color: 'orange'
     }
@@ -192,6 +207,17 @@ export function Dashboard() {
                 </div>
                 <span className="text-sm font-medium">{stats.servers.total}</span>
               </div>
+              {stats.topFailing.length > 0 && (
+                <div className="pt-4 border-t space-y-2">
+                  <p className="text-sm font-medium text-gray-900">Most failing commands (7 days)</p>
+                  {stats.topFailing.map((command) => (
+                    <div key={command.command_id} className="flex items-center justify-between">
+                      <span className="text-sm text-gray-600">{command.name}</span>
+                      <Badge variant="destructive">{command.failures}</Badge>
+                    </div>
+                  ))}
+                </div>
+              )}
             </div>
           </CardContent>
         </Card>
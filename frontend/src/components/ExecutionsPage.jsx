@@ -1,9 +1,12 @@
 import { useState, useEffect } from 'react'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from './ui/card'
 import { Badge } from './ui/badge'
+import { Button } from './ui/button'
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from './ui/table'
-import { History, CheckCircle, AlertCircle, Activity } from 'lucide-react'
+import { History, CheckCircle, AlertCircle, Activity, Clock, XCircle, Timer } from 'lucide-react'
 import { useToast } from './ui/use-toast'
+import { useLiveEvents } from '../hooks/use-live-events'
+import { mergeById } from '../lib/live-events'
 
 export function ExecutionsPage() {
   const [executions, setExecutions] = useState([])
@@ -14,6 +17,15 @@ export function ExecutionsPage() {
     fetchExecutions()
   }, [])
 
+  // New executions and status changes are pushed as they happen
+  useLiveEvents('executions', (event) => {
+    if (event.type === 'resync') {
+      fetchExecutions()
+    } else if (event.type === 'execution.updated') {
+      setExecutions((current) => mergeById(current, event.data, 'start'))
+    }
+  })
+
   const fetchExecutions = async () => {
     try {
       const response = await fetch('/api/executions')
@@ -30,6 +42,35 @@ export function ExecutionsPage() {
     }
   }
 
+  const cancelExecution = async (executionId) => {
+    try {
+      const response = await fetch(`/api/executions/${executionId}/cancel`, {
+        method: 'POST'
+      })
+
+      if (response.ok) {
+        toast({
+          title: "Success",
+          description: "Execution is being cancelled"
+        })
+        fetchExecutions()
+      } else {
+        const data = await response.json()
+        toast({
+          title: "Error",
+          description: data.error || "Failed to cancel execution",
+          variant: "destructive"
+        })
+      }
+    } catch (error) {
+      toast({
+        title: "Error",
+        description: "Failed to cancel execution",
+        variant: "destructive"
+      })
+    }
+  }
+
   const getStatusIcon = (status) => {
     switch (status) {
       case 'completed':
@@ -38,6 +79,13 @@ export function ExecutionsPage() {
         return <AlertCircle className="w-4 h-4 text-red-600" />
       case 'running':
         return <Activity className="w-4 h-4 text-blue-600 animate-spin" />
+      case 'queued':
+        return <Clock className="w-4 h-4 text-gray-500" />
+      case 'cancelling':
+      case 'cancelled':
+        return <XCircle className="w-4 h-4 text-gray-500" />
+      case 'timed_out':
+        return <Timer className="w-4 h-4 text-orange-600" />
       default:
         return <Activity className="w-4 h-4 text-gray-400" />
     }
@@ -51,6 +99,14 @@ export function ExecutionsPage() {
         return <Badge variant="destructive">Failed</Badge>
       case 'running':
         return <Badge variant="secondary">Running</Badge>
+      case 'queued':
+        return <Badge variant="outline">Queued</Badge>
+      case 'cancelling':
+        return <Badge variant="outline">Cancelling</Badge>
+      case 'cancelled':
+        return <Badge variant="outline">Cancelled</Badge>
+      case 'timed_out':
+        return <Badge variant="default" className="bg-orange-100 text-orange-800">Timed Out</Badge>
       default:
         return <Badge variant="outline">Unknown</Badge>
     }
@@ -96,6 +152,7 @@ export function ExecutionsPage() {
                 <TableHead>Started</TableHead>
                 <TableHead>Duration</TableHead>
                 <TableHead>Executed By</TableHead>
+                <TableHead></TableHead>
               </TableRow>
             </TableHeader>
             <TableBody>
@@ -118,6 +175,13 @@ export function ExecutionsPage() {
                     {formatDuration(execution.started_at, execution.completed_at)}
                   </TableCell>
                   <TableCell>{execution.executed_by || '-'}</TableCell>
+                  <TableCell>
+                    {execution.execution_type === 'command' && ['queued', 'running'].includes(execution.status) && (
+                      <Button variant="outline" size="sm" onClick={() => cancelExecution(execution.id)}>
+                        Cancel
+                      </Button>
+                    )}
+                  </TableCell>
                 </TableRow>
               ))}
             </TableBody>
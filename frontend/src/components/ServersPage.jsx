@@ -9,6 +9,8 @@ import { Dialog, DialogContent, DialogDescription, DialogFooter, DialogHeader, D
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from './ui/table'
 import { Plus, Server, Edit, Trash2, Activity, AlertCircle, CheckCircle } from 'lucide-react'
 import { useToast } from './ui/use-toast'
+import { useLiveEvents } from '../hooks/use-live-events'
+import { mergeById } from '../lib/live-events'
 
 export function ServersPage() {
   const [servers, setServers] = useState([])
@@ -31,6 +33,18 @@ export function ServersPage() {
     fetchServers()
   }, [])
 
+  // Status changes from pings and edits in other tabs are pushed, not polled
+  useLiveEvents('servers', (event) => {
+    if (event.type === 'resync') {
+      fetchServers()
+    } else if (event.type === 'server.deleted') {
+      setServers((current) => current.filter((server) => server.id !== event.data.id))
+    } else if (event.type === 'server.updated') {
+      // Pings only carry the changed fields; new servers come as full rows
+      setServers((current) => mergeById(current, event.data, 'name' in event.data ? 'end' : null))
+    }
+  })
+
   const fetchServers = async () => {
     try {
       const response = await fetch('/api/servers')
@@ -0,0 +1,9 @@
+import * as React from "react"
+import { subscribe } from "../lib/live-events"
+
+export function useLiveEvents(topic, handler) {
+  const handlerRef = React.useRef(handler)
+  handlerRef.current = handler
+
+  React.useEffect(() => subscribe(topic, (event) => handlerRef.current(event)), [topic])
+}
@@ -0,0 +1,71 @@
+// One WebSocket per tab carries every live topic ('servers', 'executions');
+// pages subscribe to the topics they show instead of polling the API.
+const RECONNECT_DELAYS_MS = [1000, 2000, 5000, 10000, 30000]
+
+const handlers = new Map()
+let socket = null
+let attempt = 0
+
+function notify(topic, event) {
+  for (const handler of handlers.get(topic) ?? []) {
+    handler(event)
+  }
+}
+
+function notifyAll(event) {
+  for (const topic of handlers.keys()) {
+    notify(topic, event)
+  }
+}
+
+function connect() {
+  const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws'
+  socket = new WebSocket(`${protocol}://${window.location.host}/api/events`)
+
+  socket.onopen = () => {
+    attempt = 0
+    // Events sent while we were disconnected are gone: re-read the lists
+    notifyAll({ type: 'resync' })
+  }
+
+  socket.onmessage = (message) => {
+    const event = JSON.parse(message.data)
+    if (event.type === 'resync') {
+      notifyAll(event)
+    } else if (event.topic) {
+      notify(event.topic, event)
+    }
+  }
+
+  socket.onclose = () => {
+    socket = null
+    const delay = RECONNECT_DELAYS_MS[Math.min(attempt, RECONNECT_DELAYS_MS.length - 1)]
+    attempt += 1
+    setTimeout(connect, delay)
+  }
+}
+
+export function subscribe(topic, handler) {
+  if (!handlers.has(topic)) {
+    handlers.set(topic, new Set())
+  }
+  handlers.get(topic).add(handler)
+  if (socket === null && attempt === 0) {
+    connect()
+  }
+  return () => handlers.get(topic).delete(handler)
+}
+
+// Merge a pushed row into a list by id. Rows not in the list are added
+// only if `insert` is 'start' or 'end' (e.g. a newly created server).
+export function mergeById(items, data, insert = null) {
+  const index = items.findIndex((item) => item.id === data.id)
+  if (index !== -1) {
+    const merged = [...items]
+    merged[index] = { ...items[index], ...data }
+    return merged
+  }
+  if (insert === 'start') return [data, ...items]
+  if (insert === 'end') return [...items, data]
+  return items
+}